@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with hit/miss/eviction counters.
+
+    `generation` is a callable returning a token for the data the cached
+    values were computed from; when the token changes (a lexicon reload),
+    every cached value is dropped before the next lookup.
+    """
+
+    def __init__(self, maxsize=4096, generation=None):
+        self.maxsize = maxsize
+        self.generation = generation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._token = None
+        self._lock = threading.Lock()
+
+    def _check_generation(self):
+        if self.generation is None:
+            return
+        token = self.generation()
+        if token != self._token:
+            if self._data:
+                self._data.clear()
+                self.invalidations += 1
+            self._token = token
+
+    def get_or_compute(self, key, compute):
+        if self.maxsize <= 0:
+            return compute(key)
+
+        with self._lock:
+            self._check_generation()
+            token = self._token
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # Computed outside the lock so slow misses do not serialize readers;
+        # two threads missing on the same key may both compute it.
+        value = compute(key)
+
+        with self._lock:
+            if self._token == token:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
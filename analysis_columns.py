@@ -0,0 +1,153 @@
+from array import array
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from lexicon_index import LabelTable
+
+# Analyses in columnar form, for corpus statistics (see corpus_stats.py) and
+# other tools that read Arrow or Parquet:
+#
+#     with AnalysisWriter("kanda.parquet") as writer:     # or "kanda.arrow"
+#         writer.write({"id": 0, "words": analyze_sentence(words)})
+#
+# One row per token: the sentence id, the token's position in the sentence
+# and its analysis fields. The segments of a sandhi split get a row each,
+# numbered from 1 in `segment` and with the surface word in `compound`.
+# Nested fields (meanings, candidates, suggestions) are left out; `readings`
+# counts the candidates.
+#
+# Every string column is dictionary-encoded: while rows are gathered, each
+# value is replaced by its code in a LabelTable and only the int32 codes are
+# kept, in an array per column. A batch is handed to Arrow as those arrays,
+# without copying, plus the labels its own rows use. The tables start over
+# with each batch, so a batch costs the same however much of the corpus came
+# before it. Each Parquet row group holds its own dictionary anyway; the
+# Arrow IPC stream sends each batch's as a replacement.
+
+STRING_FIELDS = ("word", "compound", "type", "naamapada", "linga", "vibhakti", "vachana", "karaka",
+                 "dhatu", "arthah", "lakaara", "purusha", "ganah", "upasarga", "artha",
+                 "karaka_sutra", "vibhakti_sutra", "apadana_sutra", "fuzzy_match")
+INT_FIELDS = (("sentence_id", "q", pa.int64()), ("position", "i", pa.int32()), ("segment", "i", pa.int32()),
+              ("readings", "b", pa.int8()), ("edit_distance", "b", pa.int8()))
+NULLABLE_INTS = {"edit_distance"}
+SCHEMA = pa.schema(
+    [pa.field(name, arrow_type, nullable=name in NULLABLE_INTS) for name, _, arrow_type in INT_FIELDS] +
+    [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in STRING_FIELDS]
+)
+FORMATS = ("parquet", "arrow")
+BATCH_SIZE = 1 << 16
+
+
+def iter_tokens(words):
+    # (position, segment, compound, analysis) per token of an analyzed
+    # sentence, sandhi splits flattened into their segments
+    for position, analysis in enumerate(words):
+        segments = analysis.get("segments")
+        if segments:
+            for segment, part in enumerate(segments, 1):
+                yield position, segment, analysis.get("word"), part
+        else:
+            yield position, 0, None, analysis
+
+
+class ColumnBatcher:
+    """Token analyses gathered into dictionary-encoded column arrays."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.labels = {name: LabelTable() for name in STRING_FIELDS}
+        self.codes = {name: array('i') for name in STRING_FIELDS}
+        self.ints = {name: array(typecode) for name, typecode, _ in INT_FIELDS}
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def add(self, sentence_id, words):
+        labels = self.labels
+        codes = self.codes
+        ints = self.ints
+        for position, segment, compound, analysis in iter_tokens(words):
+            # The whole row is built (and the small counts clamped) before any
+            # column grows, so one odd token cannot leave the columns of
+            # different lengths.
+            distance = analysis.get("edit_distance")
+            row_ints = (sentence_id, position, segment, min(len(analysis.get("candidates") or ()), 127),
+                        -1 if distance is None else min(distance, 127))
+            row_codes = []
+            for name in STRING_FIELDS:
+                value = compound if name == "compound" else analysis.get(name)
+                row_codes.append(-1 if value is None else labels[name].code(str(value)))
+            for (name, _, _), value in zip(INT_FIELDS, row_ints):
+                ints[name].append(value)
+            for name, code in zip(STRING_FIELDS, row_codes):
+                codes[name].append(code)
+            self.rows += 1
+
+    def batch(self):
+        # The gathered rows as a RecordBatch; the batcher starts over empty.
+        columns = []
+        for name, _, arrow_type in INT_FIELDS:
+            values = np.frombuffer(self.ints[name], dtype=arrow_type.to_pandas_dtype())
+            columns.append(pa.array(values, mask=values < 0 if name in NULLABLE_INTS else None))
+        for name in STRING_FIELDS:
+            indices = np.frombuffer(self.codes[name], dtype=np.int32)
+            columns.append(pa.DictionaryArray.from_arrays(
+                pa.array(indices, mask=indices < 0), pa.array(self.labels[name].labels, pa.string())))
+        batch = pa.RecordBatch.from_arrays(columns, schema=SCHEMA)
+        self._reset()
+        return batch
+
+
+class AnalysisWriter:
+    """Writes analyzed sentences as Parquet or an Arrow IPC stream, one
+    record batch (Parquet row group) per batch_size tokens."""
+
+    def __init__(self, path, fmt=None, batch_size=BATCH_SIZE):
+        fmt = fmt or ("arrow" if path.endswith((".arrow", ".arrows")) else "parquet")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.batch_size = batch_size
+        self.batcher = ColumnBatcher()
+        self.tokens = 0
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, SCHEMA, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_stream(path, SCHEMA)
+
+    def write(self, record):
+        # One analyzed sentence: {"id": ..., "words": [...]}, as batch_analyze
+        # produces them.
+        self.batcher.add(record["id"], record["words"])
+        if len(self.batcher) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.batcher):
+            self.tokens += len(self.batcher)
+            self._writer.write_batch(self.batcher.batch())
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_batches(path, columns=None):
+    # The record batches of a file AnalysisWriter wrote, optionally only
+    # some columns, one at a time.
+    if path.endswith((".arrow", ".arrows")):
+        with pa.ipc.open_stream(path) as reader:
+            for batch in reader:
+                yield batch.select(columns) if columns else batch
+    else:
+        yield from pq.ParquetFile(path).iter_batches(columns=columns)
@@ -1,17 +1,45 @@
 import streamlit as st
-from sentence_analyzer_with_meaning import clean_and_split, analyze_word
+from sentence_analyzer_with_meaning import (
+    analyze_document, clean_and_split, get_dhatus, iter_analyze_sentence, lexicon_generations,
+    split_sentences, start_watcher
+)
+from shabda_vibhakti import get_lexicon
 from pathlib import Path
 import base64
 
 # ================= Page Config =================
 st.set_page_config(page_title="Sanskrit Sentence Analyzer", layout="wide")
 
+
+# ================= Shared Resources =================
+# The lexicons are loaded once per server process and shared by every session.
+@st.cache_resource(show_spinner="🔄 Loading lexicons...")
+def load_lexicons():
+    try:
+        shabdas = get_lexicon()
+    except Exception as e:
+        # Noun lookups report the missing lexicon per word, as before.
+        print(f"❌ Error loading shabdas: {e}")
+        shabdas = None
+    dhatus = get_dhatus()
+    # Edits to the lexicon files show up without restarting the app.
+    start_watcher()
+    return shabdas, dhatus
+
+
+@st.cache_data(show_spinner=False)
+def load_logo_b64(path):
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+load_lexicons()
+
 # ================= Logo (optional) =================
 assets_path = Path(__file__).parent / "assets"
 logo_path = assets_path / "logo.png"
 if logo_path.exists():
-    with open(logo_path, "rb") as f:
-        logo_b64 = base64.b64encode(f.read()).decode()
+    logo_b64 = load_logo_b64(str(logo_path))
     st.markdown(
         f"""
         <div style="text-align:center; padding: 20px;">
@@ -24,51 +52,132 @@ if logo_path.exists():
 # ================= Title =================
 st.title("🧠 Sanskrit Sentence Analyzer with Meanings")
 st.markdown(
-    "Enter a Sanskrit sentence in **Devanagari script**, and view noun/verb analysis with kāraka & meaning details."
+    "Enter a Sanskrit sentence in **Devanagari** (or IAST, Harvard-Kyoto or SLP1), and view noun/verb analysis with kāraka & meaning details."
 )
 
-# ================= Input Field =================
-sentence = st.text_input("🔠 Enter Sanskrit sentence (Devanagari):")
+mode = st.radio("Mode", ["Sentence", "Document"], horizontal=True)
 
-if sentence:
-    st.divider()
-    st.subheader("📊 Word-by-word Analysis")
 
-    sentence_words = clean_and_split(sentence)
-    results = []
+# ================= Rendering =================
+def describe_candidate(candidate):
+    if candidate["type"] == "नामपद (Noun)":
+        return f"{candidate['naamapada']} {candidate['vibhakti']} {candidate['vachana']} ({candidate['karaka'].split(' - ')[0]})"
+    return f"{candidate['dhatu']} {candidate['lakaara']} {candidate['purusha']} {candidate['vachana']}"
+
+
+def render_result(result):
+    with st.expander(f"🔍 {result['word']} — {result['type']}"):
+        if result.get("fuzzy_match"):
+            st.caption(f"✏️ Not in the lexicon; showing the closest form **{result['fuzzy_match']}** "
+                       f"(edit distance {result['edit_distance']}). Also close: {', '.join(result['suggestions'][1:]) or '—'}")
+        if result["type"] == "नामपद (Noun)":
+            st.write(f"**नामपद**: {result['naamapada']}")
+            st.write(f"**लिङ्गः**: {result['linga']}")
+            st.write(f"**विभक्तिः**: {result['vibhakti']}")
+            st.write(f"**वचनम्**: {result['vachana']}")
+            st.write(f"**कारकः**: {result['karaka']}")
+            if result.get("artha"):
+                st.write(f"**अर्थः**: {result['artha']}")
+            if result.get("karaka_sutra") or result.get("apadana_sutra"):
+                st.info(f"📜 **सूत्रम्**: {result.get('karaka_sutra') or result['apadana_sutra']}")
+            if result.get("vibhakti_sutra"):
+                st.caption(f"📜 विभक्तिसूत्रम्: {result['vibhakti_sutra']}")
+
+        elif result["type"] == "धातु (Verb)":
+            st.write(f"**धातुः**: {result['dhatu']}")
+            st.write(f"**अर्थः**: {result['arthah']}")
+            st.write(f"**लकारः**: {result['lakaara']}")
+            st.write(f"**पुरुषः**: {result['purusha']}")
+            st.write(f"**वचनम्**: {result['vachana']}")
+            st.write(f"**गणः**: {result['ganah']}")
+            if result.get("karaka_sutra"):
+                st.info(f"📜 **Kāraka Sūtra**: {result['karaka_sutra']}")
+
+        elif result["type"] == "सन्धि (Sandhi)":
+            st.write(f"**सन्धिविच्छेदः**: {' + '.join(result['split'])}")
+            for segment in result["segments"]:
+                if segment["type"] in ("नामपद (Noun)", "धातु (Verb)"):
+                    st.write(f"↳ **{segment['word']}**: {describe_candidate(segment)}")
+                else:
+                    st.write(f"↳ **{segment['word']}**: {segment['type']}")
+                if segment["type"] == "नामपद (Noun)" and (segment.get("karaka_sutra") or segment.get("apadana_sutra")):
+                    st.info(f"📜 **सूत्रम्**: {segment.get('karaka_sutra') or segment['apadana_sutra']}")
+
+        elif result["type"] == "अव्यय (Indeclinable)":
+            st.write("**अव्ययम्** (indeclinable)")
+        else:
+            st.warning("🛑 No grammatical info found.")
+
+        candidates = result.get("candidates", [])
+        if len(candidates) > 1:
+            st.caption("🔀 Other readings: " + "; ".join(describe_candidate(c) for c in candidates[1:]))
 
-    for word in sentence_words:
-        result = analyze_word(word)
+        # Meanings
+        meanings = result.get("meanings", {})
+        if meanings:
+            st.subheader("📚 Meanings")
+            for key, value in meanings.items():
+                with st.expander(f"{key} Meaning"):
+                    st.write(value)
+
+
+# Each word's expander is drawn as soon as that word is analyzed. On a repeat
+# of the same sentence Streamlit replays the cached elements instead of
+# re-running the analysis; `generation` changes when a lexicon is reloaded.
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_sentence_analysis(words, generation):
+    results = []
+    for result in iter_analyze_sentence(list(words)):
+        render_result(result)
         results.append(result)
+    return results
+
+
+# Whole passages are split on daṇḍas and analyzed in one batch, with every
+# distinct form looked up once; only the current page of results is drawn.
+@st.cache_data(max_entries=32, show_spinner="🔎 Analyzing document...")
+def analyze_document_text(text, generation):
+    return analyze_document(split_sentences(text))
+
+
+# ================= Input Field =================
+if mode == "Sentence":
+    sentence = st.text_input("🔠 Enter Sanskrit sentence (Devanagari, IAST, HK or SLP1):")
+
+    if sentence:
+        st.divider()
+        st.subheader("📊 Word-by-word Analysis")
+
+        sentence_words = tuple(clean_and_split(sentence))
+        render_sentence_analysis(sentence_words, lexicon_generations())
+
+else:
+    text = st.text_area("📄 Paste a Sanskrit passage (Devanagari, IAST, HK or SLP1), sentences separated by । or ॥:", height=200)
+    uploaded = st.file_uploader("…or upload a UTF-8 text file", type=["txt"])
+    if uploaded is not None:
+        text = uploaded.getvalue().decode("utf-8")
+
+    if text and text.strip():
+        st.divider()
+        document = analyze_document_text(text, lexicon_generations())
+
+        word_count = sum(len(words) for words in document)
+        distinct = len({result["word"] for words in document for result in words})
+        unknown = sum(result["type"] == "❓ Unknown" for words in document for result in words)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Sentences", len(document))
+        col2.metric("Words", word_count)
+        col3.metric("Distinct forms", distinct)
+        col4.metric("Unknown", unknown)
+
+        if document:
+            per_page = st.select_slider("Sentences per page", options=[5, 10, 20, 50], value=10)
+            pages = (len(document) + per_page - 1) // per_page
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+            st.caption(f"Page {page} of {pages}")
 
-        with st.expander(f"🔍 {result['word']} — {result['type']}"):
-            if result["type"] == "नामपद (Noun)":
-                st.write(f"**नामपद**: {result['naamapada']}")
-                st.write(f"**लिङ्गः**: {result['linga']}")
-                st.write(f"**विभक्तिः**: {result['vibhakti']}")
-                st.write(f"**वचनम्**: {result['vachana']}")
-                st.write(f"**कारकः**: {result['karaka']}")
-                if result.get("artha"):
-                    st.write(f"**अर्थः**: {result['artha']}")
-                if result.get("apadana_sutra"):
-                    st.info(f"📜 **सूत्रम्**: {result['apadana_sutra']}")
-
-            elif result["type"] == "धातु (Verb)":
-                st.write(f"**धातुः**: {result['dhatu']}")
-                st.write(f"**अर्थः**: {result['arthah']}")
-                st.write(f"**लकारः**: {result['lakaara']}")
-                st.write(f"**पुरुषः**: {result['purusha']}")
-                st.write(f"**वचनम्**: {result['vachana']}")
-                st.write(f"**गणः**: {result['ganah']}")
-                if result.get("karaka_sutra"):
-                    st.info(f"📜 **Kāraka Sūtra**: {result['karaka_sutra']}")
-            else:
-                st.warning("🛑 No grammatical info found.")
-
-            # Meanings
-            meanings = result.get("meanings", {})
-            if meanings:
-                st.subheader("📚 Meanings")
-                for key, value in meanings.items():
-                    with st.expander(f"{key} Meaning"):
-                        st.write(value)
+            start = (page - 1) * per_page
+            for number, results in enumerate(document[start:start + per_page], start + 1):
+                st.subheader(f"📜 {number}. {' '.join(result['word'] for result in results)}")
+                for result in results:
+                    render_result(result)
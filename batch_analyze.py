@@ -0,0 +1,140 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+# Batch annotation of whole texts without the interactive prompts:
+#
+#     python batch_analyze.py kanda.txt -o kanda.jsonl --workers 4
+#
+# The input is streamed sentence by sentence (split on daṇḍas and blank lines),
+# analyzed in a process pool where every worker loads the lexicons once, and
+# written out as one JSON object per sentence, in input order. Only a bounded
+# window of chunks is in flight at any time, so memory does not grow with the
+# size of the input. Progress and throughput go to stderr.
+#
+#     python batch_analyze.py kanda.txt -o kanda.parquet   # or kanda.arrow
+#
+# writes one row per token instead, for corpus_stats.py (see
+# analysis_columns.py).
+
+
+def init_worker(watch_interval=0):
+    # The analyzer reports loading progress and lookup errors with print();
+    # keep all of that out of the JSONL stream. A long-lived worker (the
+    # server's batch pool) watches the lexicon files itself, since reloads in
+    # the parent do not reach a worker process; a forked worker does not
+    # inherit the parent's watcher (see start_watcher).
+    sys.stdout = sys.stderr
+    from shabda_vibhakti import get_lexicon
+    from sentence_analyzer_with_meaning import get_dhatus, start_watcher
+    get_lexicon()
+    get_dhatus()
+    if watch_interval:
+        start_watcher(watch_interval)
+
+
+def analyze_chunk(chunk, scheme=None):
+    from sentence_analyzer_with_meaning import analyze_sentence, clean_and_split
+    return [
+        {"id": sentence_id, "sentence": sentence, "words": analyze_sentence(clean_and_split(sentence, scheme))}
+        for sentence_id, sentence in chunk
+    ]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_stream(chunks, workers, max_pending, scheme=None):
+    if workers <= 1:
+        init_worker()
+        for chunk in chunks:
+            yield analyze_chunk(chunk, scheme)
+        return
+
+    with Pool(workers, initializer=init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(analyze_chunk, (chunk, scheme)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def report(done, started, final=False):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0.0
+    end = "\n" if final else "\r"
+    print(f"📈 {done} sentence(s) in {elapsed:.1f}s — {rate:.1f} sentences/s", end=end, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate a Sanskrit text file sentence by sentence as JSONL.")
+    parser.add_argument("input", help="UTF-8 text file in Devanagari, IAST, Harvard-Kyoto or SLP1")
+    parser.add_argument("-o", "--output", help="output file (default: stdout, JSONL)")
+    parser.add_argument("--format", choices=["jsonl", "parquet", "arrow"],
+                        help="default: from the output file's extension (.parquet, .arrow), else jsonl")
+    parser.add_argument("--scheme", choices=["iast", "hk", "slp1"],
+                        help="romanization of the input (default: detected per sentence)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=64, help="sentences per worker task")
+    parser.add_argument("--max-pending", type=int, default=0,
+                        help="chunks in flight at once (default: 4 per worker)")
+    args = parser.parse_args()
+
+    max_pending = args.max_pending or 4 * max(args.workers, 1)
+    extension = os.path.splitext(args.output or "")[1]
+    fmt = args.format or {".parquet": "parquet", ".arrow": "arrow"}.get(extension, "jsonl")
+    if fmt == "jsonl":
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    elif args.output:
+        # One row per token, for corpus_stats.py; see analysis_columns.py.
+        try:
+            from analysis_columns import AnalysisWriter
+        except ImportError as e:
+            parser.error(f"--format {fmt} needs pyarrow and numpy ({e})")
+        out = AnalysisWriter(args.output, fmt)
+    else:
+        parser.error(f"--format {fmt} needs an output file (-o)")
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+
+    from sentence_analyzer_with_meaning import iter_sentences
+
+    started = time.perf_counter()
+    done = 0
+    last_report = started
+    try:
+        with open(args.input, "r", encoding="utf-8") as file:
+            chunks = chunked(enumerate(iter_sentences(file)), args.chunk_size)
+            for records in analyze_stream(chunks, args.workers, max_pending, args.scheme):
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n" if fmt == "jsonl" else record)
+                done += len(records)
+                now = time.perf_counter()
+                if now - last_report >= 1.0:
+                    report(done, started)
+                    last_report = now
+    finally:
+        sys.stdout = stdout
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    report(done, started, final=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Columnar export and corpus statistics against the list-of-dicts approach,
+# on synthetic analyses. Run from the repository root:
+#
+#     python -m benchmarks.bench_corpus_stats --tokens 2000000
+#
+# The analyses are drawn from the synthetic lexicons' forms with a Zipf-like
+# skew, shaped as analyze_sentence returns them. "dicts" keeps every result
+# dict in a list and counts with collections.Counter; "columnar" writes them
+# through AnalysisWriter and counts with corpus_stats. Memory is the growth of
+# peak RSS, so the columnar side is measured first.
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from collections import Counter
+
+from analysis_columns import AnalysisWriter
+from benchmarks.synthetic import LAKARA_ENDINGS, VIBHAKTI_ENDINGS, stem
+from corpus_stats import NOUN, TABLES, VERB, corpus_stats
+
+KARAKAS = {"प्रथमा": "कर्तृ - The doer of the action.", "द्वितीया": "कर्म - The object of the action.",
+           "तृतीया": "करण - The instrument.", "चतुर्थी": "सम्प्रदान - Recipient.",
+           "पञ्चमी": "अपादान - Point of separation or origin.", "षष्ठी": "सम्बन्ध - Relation or possession.",
+           "सप्तमी": "अधिकरण - Location or context.", "सम्बोधनम्": "❓ - ❓"}
+VACHANAS = ("एकवचन", "द्विवचन", "बहुवचन")
+PURUSHAS = ("प्रथम पुरुष", "मध्यम पुरुष", "उत्तम पुरुष")
+
+
+def vocabulary(rng, size=5000):
+    words = []
+    for i in range(size):
+        if rng.random() < 0.6:
+            vibhakti = rng.choice(VIBHAKTI_ENDINGS)[0]
+            words.append({"word": stem(i) + "ः", "type": NOUN, "naamapada": stem(i), "linga": "पुंलिङ्ग",
+                          "vibhakti": vibhakti, "vachana": rng.choice(VACHANAS), "karaka": KARAKAS[vibhakti],
+                          "artha": f"artha{i}", "meanings": {"English": f"meaning {i}"},
+                          "candidates": [{}] * rng.choice((1, 1, 2))})
+        else:
+            words.append({"word": stem(i, "ध") + "ति", "type": VERB, "dhatu": stem(i % 500, "ध"),
+                          "arthah": "गतौ", "lakaara": rng.choice(list(LAKARA_ENDINGS)),
+                          "purusha": rng.choice(PURUSHAS), "vachana": rng.choice(VACHANAS),
+                          "ganah": rng.choice(("भ्वादिः", "दिवादिः", "तुदादिः")), "upasarga": None})
+    return words
+
+
+def sentences(tokens, seed=0):
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    drawn = rng.choices(words, weights, k=tokens)
+    for i in range(0, tokens, 8):
+        yield {"id": i // 8, "words": drawn[i:i + 8]}
+
+
+def dict_stats(records):
+    # The per-table counts with plain Python over the result dicts
+    tables = {}
+    for name, (by, token_type) in TABLES.items():
+        tables[name] = Counter(tuple(word.get(column) for column in by)
+                               for record in records for word in record["words"]
+                               if token_type is None or word["type"] == token_type)
+    return tables
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def timed(fn):
+    # (result, seconds, growth of peak RSS in MiB)
+    peak = peak_rss_mib()
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started, peak_rss_mib() - peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure columnar export and corpus statistics.")
+    parser.add_argument("--tokens", type=int, default=2000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "corpus.jsonl")
+        parquet_path = os.path.join(tmp, "corpus.parquet")
+
+        def write_jsonl():
+            with open(jsonl_path, "w", encoding="utf-8") as out:
+                for record in sentences(args.tokens):
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        def write_parquet():
+            with AnalysisWriter(parquet_path) as writer:
+                for record in sentences(args.tokens):
+                    writer.write(record)
+
+        def load_jsonl():
+            with open(jsonl_path, encoding="utf-8") as file:
+                return [json.loads(line) for line in file]
+
+        _, jsonl_s, _ = timed(write_jsonl)
+        _, parquet_s, _ = timed(write_parquet)
+        tables, stats_s, stats_mib = timed(lambda: corpus_stats([parquet_path]))
+        records, load_s, dicts_mib = timed(load_jsonl)
+        expected, dict_s, _ = timed(lambda: dict_stats(records))
+        del records
+
+        same = all(
+            {tuple(row[:-2]): row[-2] for row in tables[name].itertuples(index=False)} ==
+            {key: count for key, count in expected[name].items() if None not in key}
+            for name in TABLES
+        )
+        print(f"tokens:                  {args.tokens}")
+        print(f"write JSONL:             {jsonl_s:.2f} s, {os.path.getsize(jsonl_path) / 2 ** 20:.1f} MiB")
+        print(f"write Parquet:           {parquet_s:.2f} s, {os.path.getsize(parquet_path) / 2 ** 20:.1f} MiB")
+        print(f"columnar: corpus_stats:  {stats_s:.2f} s, peak RSS +{stats_mib:.0f} MiB")
+        print(f"dicts: load + count:     {load_s:.2f} s + {dict_s:.2f} s, peak RSS +{dicts_mib:.0f} MiB")
+        print(f"same counts:             {'ok' if same else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
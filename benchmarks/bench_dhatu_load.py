@@ -0,0 +1,82 @@
+# Startup time, resident footprint and lookup latency of DhatuLexicon on a
+# synthetic dhātu file. Run from the repository root:
+#
+#     python -m benchmarks.bench_dhatu_load --entries 20000
+#
+# The "before" column is read from bench_dhatu_load.json, recorded from the
+# tree before dhātu blocks were kept as mmap offsets (whole block text and
+# token sets in memory); see benchmarks/measure.py for how to re-record it.
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from dhatu_search import DhatuLexicon
+from benchmarks.measure import record_before, recorded_before, rss_mb
+from benchmarks.synthetic import dhatu_forms, write_dhatu_file
+
+BEFORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_dhatu_load.json")
+
+ROWS = [
+    ("load time", "load_s", "s"),
+    ("python heap retained", "heap_mib", "MiB"),
+    ("RSS growth", "rss_mib", "MiB"),
+    ("lookup, first hit", "first_us", "µs"),
+    ("lookup, repeated", "repeat_us", "µs"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dhātu lexicon load cost.")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--record-before", metavar="PATH", help="save this tree's numbers as the before column")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dhatu_all_combined.txt")
+        write_dhatu_file(path, args.entries)
+        queries = [rng.choice(dhatu_forms(rng.randrange(args.entries))) for _ in range(args.queries)]
+
+        gc.collect()
+        rss_before = rss_mb()
+        tracemalloc.start()
+        started = time.perf_counter()
+        lexicon = DhatuLexicon.from_file(path)
+        load_s = time.perf_counter() - started
+        heap_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+        gc.collect()
+        rss_after = rss_mb()
+
+        started = time.perf_counter()
+        for q in queries:
+            lexicon.search_form(q)
+        first_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        started = time.perf_counter()
+        for q in queries:
+            lexicon.search_form(q)
+        repeat_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+    results = {"load_s": load_s, "heap_mib": heap_mb, "rss_mib": rss_after - rss_before,
+               "first_us": first_us, "repeat_us": repeat_us}
+    if args.record_before:
+        record_before(args.record_before, args.entries, results)
+        return
+
+    before = recorded_before(BEFORE_PATH, args.entries) or {}
+    print(f"entries: {args.entries}")
+    print(f"{'':<22}{'before':>12}{'after':>12}")
+    for label, key, unit in ROWS:
+        old = f"{before[key]:.1f} {unit}" if key in before else "-"
+        new = f"{results[key]:.1f} {unit}"
+        print(f"{label:<22}{old:>12}{new:>12}")
+
+
+if __name__ == "__main__":
+    main()
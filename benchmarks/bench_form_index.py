@@ -0,0 +1,64 @@
+# Lookup latency of the linear scans against the inverted form index as the
+# lexicon grows. Run from the repository root:
+#
+#     python -m benchmarks.bench_form_index
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from dhatu_search import DhatuLexicon, load_dhatus, search_form
+from shabda_vibhakti import ShabdaLexicon, load_shabdas, search_shabda
+from benchmarks.synthetic import dhatu_forms, shabda_forms, write_dhatu_file, write_shabda_file
+
+
+def per_lookup_us(fn, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def run(sizes, queries_per_size, linear_limit):
+    rng = random.Random(0)
+    print(f"{'entries':>8} | {'dhātu scan µs':>14} {'dhātu index µs':>15} | {'śabda scan µs':>14} {'śabda index µs':>15}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            dhatu_path = os.path.join(tmp, f"dhatu_{size}.txt")
+            shabda_path = os.path.join(tmp, f"shabda_{size}.txt")
+            write_dhatu_file(dhatu_path, size)
+            write_shabda_file(shabda_path, size)
+
+            dhatus = load_dhatus(dhatu_path)
+            shabdas = load_shabdas(shabda_path)
+            dhatu_lexicon = DhatuLexicon.from_file(dhatu_path)
+            shabda_lexicon = ShabdaLexicon(shabdas)
+
+            verb_queries = [rng.choice(dhatu_forms(rng.randrange(size))) for _ in range(queries_per_size)]
+            noun_queries = [rng.choice(shabda_forms(rng.randrange(size))) for _ in range(queries_per_size)]
+
+            if size <= linear_limit:
+                d_scan = f"{per_lookup_us(lambda q: search_form(dhatus, q), verb_queries, 1):14.1f}"
+                s_scan = f"{per_lookup_us(lambda q: search_shabda(shabdas, q), noun_queries, 1):14.1f}"
+            else:
+                d_scan = s_scan = f"{'skipped':>14}"
+            d_index = per_lookup_us(dhatu_lexicon.search_form, verb_queries, 20)
+            s_index = per_lookup_us(shabda_lexicon.lookup, noun_queries, 20)
+            print(f"{size:>8} | {d_scan} {d_index:15.2f} | {s_scan} {s_index:15.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark form lookup against lexicon size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--linear-limit", type=int, default=10000,
+                        help="skip the linear scans above this many entries")
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.linear_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Resident memory of the loaded dhātu and śabda lexicons, parsed from text
+# (not from a compiled index). Run from the repository root:
+#
+#     python -m benchmarks.bench_memory --entries 20000
+#
+# The "before" columns are read from bench_memory.json, recorded from the
+# tree before entries were stored compactly (dict entries, tuple index cells);
+# see benchmarks/measure.py for how to re-record them.
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from dhatu_search import DhatuLexicon
+from shabda_vibhakti import ShabdaLexicon
+from benchmarks.measure import record_before, recorded_before, rss_mb
+from benchmarks.synthetic import write_dhatu_file, write_shabda_file
+
+BEFORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_memory.json")
+
+
+def measure(load):
+    # RSS is taken from a load without tracemalloc, whose own bookkeeping
+    # would otherwise be counted; the Python heap from a second load.
+    gc.collect()
+    rss_before = rss_mb()
+    lexicon = load()
+    gc.collect()
+    rss = rss_mb() - rss_before
+
+    tracemalloc.start()
+    second = load()
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    del second
+    return lexicon, heap, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure lexicon memory footprint.")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--record-before", metavar="PATH", help="save this tree's numbers as the before columns")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dhatu_path = os.path.join(tmp, "dhatu_all_combined.txt")
+        shabda_path = os.path.join(tmp, "shabda_combined.txt")
+        write_dhatu_file(dhatu_path, args.entries)
+        write_shabda_file(shabda_path, args.entries)
+
+        results = {}
+        kept = []
+        for name, load in (("dhātu", lambda: DhatuLexicon.from_file(dhatu_path)),
+                           ("śabda", lambda: ShabdaLexicon.from_file(shabda_path))):
+            lexicon, heap, rss = measure(load)
+            kept.append(lexicon)
+            results[name] = {"heap_mib": heap, "rss_mib": rss}
+
+    if args.record_before:
+        record_before(args.record_before, args.entries, results)
+        return
+
+    before = recorded_before(BEFORE_PATH, args.entries) or {}
+    print(f"{'lexicon':<8} {'entries':>8} {'heap MiB':>18} {'RSS MiB':>18}")
+    for name, after in results.items():
+        columns = []
+        for key in ("heap_mib", "rss_mib"):
+            old = before.get(name, {}).get(key)
+            columns.append(f"{after[key]:.1f}" if old is None else f"{old:.1f} -> {after[key]:.1f}")
+        print(f"{name:<8} {args.entries:>8} {columns[0]:>18} {columns[1]:>18}")
+
+
+if __name__ == "__main__":
+    main()
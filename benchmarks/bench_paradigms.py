@@ -0,0 +1,70 @@
+# Build cost, size and generation latency of the paradigm arrays on
+# synthetic lexicons. Run from the repository root:
+#
+#     python -m benchmarks.bench_paradigms --entries 20000
+#
+# "cell" is one (stem, coordinates) -> forms lookup, "table" a whole
+# paradigm. Both should stay flat as --entries grows.
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from dhatu_search import DhatuLexicon
+from paradigms import dhatu_paradigms, shabda_paradigms
+from shabda_vibhakti import ShabdaLexicon
+from benchmarks.synthetic import write_dhatu_file, write_shabda_file
+
+
+def per_call_us(fn, queries):
+    started = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def array_mib(paradigms):
+    arrays = (paradigms.slot_starts, paradigms.form_bounds)
+    return sum(len(a) * a.itemsize for a in arrays) / 2 ** 20
+
+
+def report(label, paradigms, build_s, queries):
+    rng = random.Random(0)
+    stems = [paradigms.stems[rng.randrange(len(paradigms))] for _ in range(queries)]
+    cells = []
+    for stem in stems:
+        e_idx = paradigms.entries(stem)[0]
+        cells.append((e_idx, {axis: rng.randrange(len(labels)) for axis, (_, labels) in enumerate(paradigms.axes)}))
+    cell_us = per_call_us(lambda e_idx, fixed: paradigms.table(e_idx, fixed), cells)
+    table_us = per_call_us(lambda stem: paradigms.table(paradigms.entries(stem)[0]), [(stem,) for stem in stems])
+    print(f"{label:<7} {len(paradigms):>8} {build_s:>8.2f} {len(paradigms.text) / 1e6:>8.2f} "
+          f"{array_mib(paradigms):>10.2f} {cell_us:>8.2f} {table_us:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure paradigm generation.")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dhatu_path = os.path.join(tmp, "dhatu_all_combined.txt")
+        shabda_path = os.path.join(tmp, "shabda_combined.txt")
+        write_dhatu_file(dhatu_path, args.entries)
+        write_shabda_file(shabda_path, args.entries)
+        dhatus = DhatuLexicon.from_file(dhatu_path)
+        shabdas = ShabdaLexicon.from_file(shabda_path)
+
+        print(f"{'kind':<7} {'entries':>8} {'build s':>8} {'Mchars':>8} {'arrays MiB':>10} "
+              f"{'cell µs':>8} {'table µs':>9}")
+        started = time.perf_counter()
+        paradigms = dhatu_paradigms(dhatus)
+        report("dhatu", paradigms, time.perf_counter() - started, args.queries)
+        started = time.perf_counter()
+        paradigms = shabda_paradigms(shabdas)
+        report("shabda", paradigms, time.perf_counter() - started, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Speedup of the parallel index build against the number of workers, on
+# synthetic lexicons and on the real data files. Run from the repository
+# root:
+#
+#     python -m benchmarks.bench_parallel_index --entries 20000
+#     python -m benchmarks.bench_parallel_index --workers 1 2 4 8
+#
+# Each build is checked against the sequential one (same entries, same form
+# index, same readings). Worker counts default to powers of two up to the
+# number of CPUs; more workers than CPUs only adds overhead. Files smaller
+# than parallel_index.MIN_RANGE_BYTES are always built sequentially, so the
+# small sample data shows no speedup.
+import argparse
+import os
+import tempfile
+import time
+
+from dhatu_search import DHATU_FILE_PATH, DhatuLexicon
+from shabda_vibhakti import SHABDA_FILE_PATH, ShabdaLexicon
+from benchmarks.synthetic import write_dhatu_file, write_shabda_file
+
+
+def default_workers():
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    return counts if counts[-1] == cpus else counts + [cpus]
+
+
+def signature(lexicon):
+    if isinstance(lexicon, ShabdaLexicon):
+        entries = [entry.full_block for entry in lexicon.shabdas], list(lexicon.vibhaktis.labels)
+    else:
+        entries = list(lexicon.offsets)
+    return entries, dict(lexicon.form_index.items()), dict(lexicon.readings.items())
+
+
+def best_of(fn, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def report(label, cls, path, workers, rounds):
+    size = os.path.getsize(path) / 2 ** 20
+    sequential, base = best_of(lambda: cls.from_file(path, workers=1), rounds)
+    expected = signature(sequential)
+    print(f"{label}: {os.path.basename(path)}, {len(sequential)} entries, {size:.1f} MiB")
+    print(f"  {'workers':>7} {'build s':>8} {'speedup':>8} {'same':>5}")
+    for count in workers:
+        if count == 1:
+            lexicon, elapsed = sequential, base
+        else:
+            lexicon, elapsed = best_of(lambda: cls.from_file(path, workers=count), rounds)
+        same = signature(lexicon) == expected
+        print(f"  {count:>7} {elapsed:>8.2f} {base / elapsed:>7.2f}x {'ok' if same else 'DIFF':>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the parallel lexicon index build.")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--rounds", type=int, default=3, help="best of this many builds")
+    args = parser.parse_args()
+    workers = args.workers or default_workers()
+    print(f"CPUs: {os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dhatu_path = os.path.join(tmp, "dhatu_all_combined.txt")
+        shabda_path = os.path.join(tmp, "shabda_combined.txt")
+        write_dhatu_file(dhatu_path, args.entries)
+        write_shabda_file(shabda_path, args.entries)
+        report("synthetic śabda", ShabdaLexicon, shabda_path, workers, args.rounds)
+        report("synthetic dhātu", DhatuLexicon, dhatu_path, workers, args.rounds)
+
+    for label, cls, path in (("real śabda", ShabdaLexicon, SHABDA_FILE_PATH),
+                             ("real dhātu", DhatuLexicon, DHATU_FILE_PATH)):
+        if os.path.exists(path):
+            report(label, cls, path, workers, args.rounds)
+        else:
+            print(f"{label}: {path} not found, skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Peak memory of the streaming loaders against the whole-file read + split
+# they replaced, on large synthetic files. Run from the repository root:
+#
+#     python -m benchmarks.bench_stream --entries 50000
+#
+# "scan" is a bare pass over iter_blocks that keeps nothing, i.e. the
+# parser's own working set.
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from dhatu_search import DEVANAGARI_WORD_RE, DhatuLexicon, load_dhatus
+from lexicon_stream import iter_blocks
+from shabda_vibhakti import ShabdaEntry, ShabdaLexicon, load_shabdas
+from benchmarks.synthetic import write_dhatu_file, write_shabda_file
+
+
+def whole_file_shabdas(file_path):
+    # The previous load_shabdas.
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    raw_blocks = content.split("Sanskrit Header:")
+    return [ShabdaEntry.parse(block) for block in raw_blocks[1:]]
+
+
+def whole_file_dhatus(file_path):
+    # The previous load_dhatus.
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    dhatus = []
+    for block in content.split("Heading:")[1:]:
+        full_block = "Heading:" + block.strip()
+        dhatus.append({
+            "heading": block.strip().split('\n')[0],
+            "block": full_block,
+            "forms": set(DEVANAGARI_WORD_RE.findall(full_block)),
+        })
+    return dhatus
+
+
+def scan(file_path, marker):
+    count = 0
+    for _ in iter_blocks(file_path, marker):
+        count += 1
+    return count
+
+
+def peak(load):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    peak_mib = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    del result
+    return peak_mib, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare streaming and whole-file loader memory.")
+    parser.add_argument("--entries", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dhatu_path = os.path.join(tmp, "dhatu_all_combined.txt")
+        shabda_path = os.path.join(tmp, "shabda_combined.txt")
+        write_dhatu_file(dhatu_path, args.entries)
+        write_shabda_file(shabda_path, args.entries)
+
+        runs = [
+            ("śabda", "whole-file read", lambda: whole_file_shabdas(shabda_path)),
+            ("śabda", "load_shabdas", lambda: load_shabdas(shabda_path)),
+            ("śabda", "ShabdaLexicon", lambda: ShabdaLexicon.from_file(shabda_path)),
+            ("śabda", "scan", lambda: scan(shabda_path, "Sanskrit Header:")),
+            ("dhātu", "whole-file read", lambda: whole_file_dhatus(dhatu_path)),
+            ("dhātu", "load_dhatus", lambda: load_dhatus(dhatu_path)),
+            ("dhātu", "DhatuLexicon", lambda: DhatuLexicon.from_file(dhatu_path)),
+            ("dhātu", "scan", lambda: scan(dhatu_path, "Heading:")),
+        ]
+        sizes = {"śabda": os.path.getsize(shabda_path), "dhātu": os.path.getsize(dhatu_path)}
+        print(f"{'file':<6} {'MiB':>6}  {'loader':<16} {'peak MiB':>9} {'seconds':>8}")
+        for name, loader, load in runs:
+            peak_mib, elapsed = peak(load)
+            print(f"{name:<6} {sizes[name] / 2 ** 20:>6.1f}  {loader:<16} {peak_mib:>9.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Throughput of the transliteration front end on a synthetic romanized
+# corpus. Run from the repository root:
+#
+#     python -m benchmarks.bench_translit --words 500000
+#
+# The corpus is the śabda and dhātu forms of the synthetic lexicons spelled
+# back out in each scheme, drawn with a Zipf-like skew as in running text.
+# "cold" converts with an empty word memo, "warm" repeats the same text.
+import argparse
+import random
+import re
+import time
+
+import transliterate
+from benchmarks.synthetic import dhatu_forms, shabda_forms
+from transliterate import CONSONANTS, SCHEMES, SIGNS, VIRAMA, VOWELS, to_devanagari
+
+STACKED_SIGNS_RE = re.compile("[ा-ौ][ा-ौ]")
+
+
+def romanizer(scheme):
+    # Devanagari -> `scheme`, the inverse of the scheme's first spellings
+    column = SCHEMES.index(scheme)
+    letters = {letter: spellings[column].split()[0] for letter, *spellings in CONSONANTS}
+    vowels = {}
+    for independent, sign, *spellings in VOWELS:
+        vowels[independent] = vowels[sign] = spellings[column].split()[0]
+    signs = {sign: spellings[column].split()[0] for sign, *spellings in SIGNS}
+
+    def romanize(word):
+        out = []
+        for i, char in enumerate(word):
+            if char in letters:
+                out.append(letters[char])
+                following = word[i + 1:i + 2]
+                if not following or following not in vowels and following != VIRAMA:
+                    out.append(vowels["अ"])
+            elif char in vowels:
+                out.append(vowels[char])
+            elif char in signs:
+                out.append(signs[char])
+        return "".join(out)
+    return romanize
+
+
+def corpus(words, seed=0):
+    rng = random.Random(seed)
+    vocabulary = []
+    for i in range(2000):
+        vocabulary += shabda_forms(i) + dhatu_forms(i)
+    # Synthetic stems can stack two vowel signs, which no scheme can spell.
+    vocabulary = [word for word in vocabulary if not STACKED_SIGNS_RE.search(word)]
+    rng.shuffle(vocabulary)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return rng.choices(vocabulary, weights, k=words)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure transliteration throughput.")
+    parser.add_argument("--words", type=int, default=500000)
+    args = parser.parse_args()
+
+    words = corpus(args.words)
+    print(f"{'scheme':<6} {'MiB':>6} {'cold MB/s':>10} {'warm MB/s':>10} {'round trip':>11}")
+    for scheme in SCHEMES:
+        romanize = romanizer(scheme)
+        romanized = [romanize(word) for word in words]
+        text = "\n".join(" ".join(romanized[i:i + 12]) for i in range(0, len(romanized), 12))
+        size = len(text.encode("utf-8"))
+        transliterate._MEMOS.clear()
+        converted, cold = timed(lambda: to_devanagari(text, scheme))
+        _, warm = timed(lambda: to_devanagari(text, scheme))
+        same = converted.split() == words
+        print(f"{scheme:<6} {size / 2 ** 20:>6.1f} {size / cold / 1e6:>10.1f} {size / warm / 1e6:>10.1f} "
+              f"{'ok' if same else 'MISMATCH':>11}")
+
+if __name__ == "__main__":
+    main()
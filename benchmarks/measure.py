@@ -0,0 +1,36 @@
+# Helpers shared by the standalone benchmark scripts: resident memory, and
+# the "before" numbers a script records from an older tree so its before/after
+# comparison can be rerun. To record them, run the script from a checkout of
+# the older tree with this directory copied in:
+#
+#     git worktree add /tmp/before <revision>
+#     cp benchmarks/*.py /tmp/before/benchmarks/
+#     (cd /tmp/before && python -m benchmarks.bench_memory --record-before $PWD/benchmarks/bench_memory.json)
+import json
+import os
+import platform
+
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def recorded_before(path, entries):
+    # The results recorded for `entries` entries, or None.
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"].get(str(entries))
+
+
+def record_before(path, entries, results):
+    recorded = {"machine": platform.platform(), "python": platform.python_version(), "results": {}}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+    recorded["results"][str(entries)] = results
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recorded, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"💾 Before numbers written to {path}")
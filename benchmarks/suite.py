@@ -0,0 +1,223 @@
+# Reproducible benchmark suite over synthetic lexicons of several sizes.
+#
+#     python -m benchmarks.suite                      # run and compare to baseline
+#     python -m benchmarks.suite --update-baseline    # record a new baseline
+#     python -m benchmarks.suite --check              # exit 1 on a regression
+#
+# For each size it reports load time and peak traced memory of the text
+# loaders, single-lookup latency of search_shabda, search_form and
+# analyze_word (with the analysis cache disabled), and end-to-end sentences per
+# second through analyze_sentence (with the cache at its normal size). The
+# baseline in benchmarks/baseline.json is machine-specific: record it on the
+# machine the comparisons will run on.
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dhatu_search
+import sentence_analyzer_with_meaning as analyzer
+import shabda_vibhakti
+from dhatu_search import DhatuLexicon, load_dhatus, search_form
+from shabda_vibhakti import ShabdaLexicon, load_shabdas, search_shabda
+from benchmarks.synthetic import dhatu_forms, shabda_forms, write_dhatu_file, write_shabda_file
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# metric -> True if larger is better
+METRICS = {
+    "load_dhatus_s": False,
+    "load_shabdas_s": False,
+    "dhatu_lexicon_load_s": False,
+    "shabda_lexicon_load_s": False,
+    "dhatu_lexicon_peak_mib": False,
+    "shabda_lexicon_peak_mib": False,
+    "search_form_us": False,
+    "search_shabda_us": False,
+    "analyze_word_us": False,
+    "sentences_per_s": True,
+}
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def peak_mib(fn):
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def per_call_us(fn, queries, rounds=5):
+    # Median over several rounds of the mean per-call time.
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for q in queries:
+            fn(q)
+        samples.append((time.perf_counter() - started) / len(queries) * 1e6)
+    return statistics.median(samples)
+
+
+def sentences_per_s(batch, rounds=3):
+    # Median over several rounds, each starting from an empty analysis cache.
+    samples = []
+    for _ in range(rounds):
+        analyzer.analysis_cache.clear()
+        _, elapsed = timed(lambda: [analyzer.analyze_sentence(words) for words in batch])
+        samples.append(len(batch) / elapsed)
+    return statistics.median(samples)
+
+
+@contextlib.contextmanager
+def use_lexicons(dhatu_path, shabda_path):
+    # Points the analyzer's process-wide lexicons at the synthetic files for
+    # the duration of the block, then puts back the lexicons it had before
+    # (None ones load lazily again, so real data that isn't there is never
+    # read).
+    real_paths = shabda_vibhakti.SHABDA_FILE_PATH, dhatu_search.DHATU_FILE_PATH
+    real_lexicons = shabda_vibhakti._lexicon, dhatu_search._dhatus
+    shabda_vibhakti.SHABDA_FILE_PATH = shabda_path
+    dhatu_search.DHATU_FILE_PATH = dhatu_path
+    try:
+        reload_lexicons()
+        yield
+    finally:
+        shabda_vibhakti.SHABDA_FILE_PATH, dhatu_search.DHATU_FILE_PATH = real_paths
+        shabda_vibhakti.publish_lexicon(real_lexicons[0])
+        dhatu_search.publish_dhatus(real_lexicons[1])
+
+
+def reload_lexicons():
+    with contextlib.redirect_stdout(io.StringIO()):
+        shabda_vibhakti.reload_lexicon()
+        dhatu_search.reload_dhatus()
+        # Rebuild the segmenter and fuzzy index now, rather than in the
+        # background while lookups are being timed.
+        analyzer._fuzzy_index.fresh()
+
+
+def run_size(size, queries, sentences, seed):
+    rng = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        dhatu_path = os.path.join(tmp, "dhatu_all_combined.txt")
+        shabda_path = os.path.join(tmp, "shabda_combined.txt")
+        write_dhatu_file(dhatu_path, size)
+        write_shabda_file(shabda_path, size)
+
+        _, results["load_dhatus_s"] = timed(lambda: load_dhatus(dhatu_path))
+        _, results["load_shabdas_s"] = timed(lambda: load_shabdas(shabda_path))
+        dhatus, results["dhatu_lexicon_load_s"] = timed(lambda: DhatuLexicon.from_file(dhatu_path))
+        shabdas, results["shabda_lexicon_load_s"] = timed(lambda: ShabdaLexicon.from_file(shabda_path))
+        results["dhatu_lexicon_peak_mib"] = peak_mib(lambda: DhatuLexicon.from_file(dhatu_path))
+        results["shabda_lexicon_peak_mib"] = peak_mib(lambda: ShabdaLexicon.from_file(shabda_path))
+
+        verb_queries = [rng.choice(dhatu_forms(rng.randrange(size))) for _ in range(queries)]
+        noun_queries = [rng.choice(shabda_forms(rng.randrange(size))) for _ in range(queries)]
+        results["search_form_us"] = per_call_us(lambda q: search_form(dhatus, q), verb_queries)
+        results["search_shabda_us"] = per_call_us(lambda q: search_shabda(shabdas, q), noun_queries)
+
+        with use_lexicons(dhatu_path, shabda_path):
+            cache_size = analyzer.analysis_cache.maxsize
+            try:
+                analyzer.analysis_cache.resize(0)
+                mixed = noun_queries + verb_queries + ["अज्ञातम्"] * (queries // 10)
+                results["analyze_word_us"] = per_call_us(analyzer.analyze_word, mixed, rounds=3)
+
+                analyzer.analysis_cache.resize(cache_size)
+                # Zipf-like reuse: a few forms recur constantly, as in real text.
+                vocabulary = noun_queries + verb_queries
+                weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+                batch = [rng.choices(vocabulary, weights, k=rng.randint(3, 8)) for _ in range(sentences)]
+                results["sentences_per_s"] = sentences_per_s(batch)
+            finally:
+                analyzer.analysis_cache.resize(cache_size)
+    return results
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for size, metrics in current.items():
+        for metric, value in metrics.items():
+            old = baseline.get(size, {}).get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            worse = change < -tolerance if METRICS[metric] else change > tolerance
+            if worse:
+                regressions.append((size, metric, old, value, change))
+    return regressions
+
+
+def print_table(current, baseline):
+    sizes = list(current)
+    print(f"{'metric':<26}" + "".join(f"{size:>22}" for size in sizes))
+    for metric in METRICS:
+        row = f"{metric:<26}"
+        for size in sizes:
+            value = current[size][metric]
+            old = baseline.get(size, {}).get(metric)
+            delta = f" ({(value - old) / old:+.0%})" if old else ""
+            row += f"{value:>14.2f}{delta:>8}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the lexicon benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative change counted as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any metric regressed")
+    args = parser.parse_args()
+
+    current = {}
+    for size in args.sizes:
+        print(f"⏱️  {size} entries...", file=sys.stderr)
+        current[str(size)] = run_size(size, args.queries, args.sentences, args.seed)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_table(current, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "results": current}, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(current, baseline, args.tolerance)
+    for size, metric, old, value, change in regressions:
+        print(f"❌ {metric} at {size} entries: {old:.2f} -> {value:.2f} ({change:+.0%})")
+    if not regressions and baseline:
+        print("✅ No regressions against the baseline.")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Synthetic lexicon files in the same layout as dhatu_all_combined.txt and
+# shabda_combined.txt, so the loaders and lookups can be measured at any size
+# without the real data. Every entry gets its own stem, so its forms are unique
+# and can be regenerated with dhatu_forms(i) / shabda_forms(i).
+#
+#     python -m benchmarks.synthetic --dhatus 5000 --shabdas 20000 --out /tmp/lexicon
+import argparse
+import os
+import random
+
+CONSONANTS = ["क", "ख", "ग", "घ", "च", "ज", "ट", "ड", "त", "द", "न",
+              "प", "ब", "म", "य", "र", "ल", "व", "श", "स", "ह"]
+VOWEL_SIGNS = ["", "ा", "ि", "ी", "ु", "ू", "े", "ो"]
+SYLLABLES = [c + v for c in CONSONANTS for v in VOWEL_SIGNS]
+
+GANAS = ["भ्वादिः", "अदादिः", "जुहोत्यादिः", "दिवादिः", "स्वादिः", "तुदादिः", "रुधादिः", "तनादिः", "क्र्यादिः", "चुरादिः"]
+PADAS = ["परस्मैपदी", "आत्मनेपदी", "उभयपदी"]
+KARMAKATAS = ["सकर्मकः", "अकर्मकः"]
+SET_ANIT = ["सेट्", "अनिट्", "वेट्"]
+ARTHAS = ["गतौ", "सत्तायाम्", "भक्षणे", "दाने", "ज्ञाने", "शब्दे", "हिंसायाम्", "पालने"]
+
+LAKARA_ENDINGS = {
+    "लट्": [["ति", "तः", "न्ति"], ["सि", "थः", "थ"], ["ामि", "ावः", "ामः"]],
+    "लङ्": [["त्", "ताम्", "न्"], ["ः", "तम्", "त"], ["म्", "ाव", "ाम"]],
+    "लोट्": [["तु", "ताम्", "न्तु"], ["", "तम्", "त"], ["ानि", "ाव", "ाम"]],
+    "विधिलिङ्": [["ेत्", "ेताम्", "ेयुः"], ["ेः", "ेतम्", "ेत"], ["ेयम्", "ेव", "ेम"]],
+}
+
+VIBHAKTI_ENDINGS = [
+    ("प्रथमा", "ः", "ौ", "ाः"),
+    ("द्वितीया", "म्", "ौ", "ान्"),
+    ("तृतीया", "ेण", "ाभ्याम्", "ैः"),
+    ("चतुर्थी", "ाय", "ाभ्याम्", "ेभ्यः"),
+    ("पञ्चमी", "ात्", "ाभ्याम्", "ेभ्यः"),
+    ("षष्ठी", "स्य", "योः", "ानाम्"),
+    ("सप्तमी", "े", "योः", "ेषु"),
+    ("सम्बोधनम्", "", "ौ", "ाः"),
+]
+LINGAS = ["पुंलिङ्गः", "नपुंसकलिङ्गः", "स्त्रीलिङ्गः"]
+
+
+def stem(i, prefix=""):
+    # Bijective base-len(SYLLABLES) numbering, so every index has its own stem.
+    syllables = []
+    i += len(SYLLABLES)
+    while i:
+        i, rem = divmod(i, len(SYLLABLES))
+        syllables.append(SYLLABLES[rem])
+    return prefix + "".join(reversed(syllables))
+
+
+def dhatu_block(i):
+    rng = random.Random(i)
+    root = stem(i, "ध")
+    artha = rng.choice(ARTHAS)
+    meta = " ".join((rng.choice(GANAS), rng.choice(PADAS), rng.choice(KARMAKATAS), rng.choice(SET_ANIT)))
+    lines = [f"Heading: {i + 1}) {root} {artha} ({meta})", f"{root} {artha}", ""]
+    for lakaara, rows in LAKARA_ENDINGS.items():
+        lines.append(f"कर्तरि {lakaara}")
+        lines.extend(" ".join(root + ending for ending in row) for row in rows)
+        lines.append("")
+    # Trailing section, so the last कर्तरि table is terminated like the others.
+    lines.append("धातुपाठः")
+    return "\n".join(lines) + "\n\n"
+
+
+def shabda_block(i):
+    rng = random.Random(i)
+    base = stem(i, "श")
+    lines = [f"Sanskrit Header: {i + 1}. {base} अकारान्तः {rng.choice(LINGAS)} meaning{i}", "<<TABLE>>"]
+    for vibhakti, eka, dvi, bahu in VIBHAKTI_ENDINGS:
+        lines.append(f"{vibhakti}\t{base + eka}\t{base + dvi}\t{base + bahu}")
+    lines += ["</TABLE>", "<<INFO>>", f"अर्थः: {base}अर्थः"]
+    if rng.random() < 0.5:
+        lines.append(f"Sanskrit Detail: (Bharati Kosha) {base}ः इति शब्दः")
+    if rng.random() < 0.5:
+        lines.append(f"Sanskrit Detail: (San → Hin) {base} का अर्थ")
+    lines += [f"Sanskrit Detail: (San → Eng) synthetic entry {i}", "</INFO>", ""]
+    return "\n".join(lines) + "\n"
+
+
+def write_dhatu_file(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(dhatu_block(i))
+
+
+def write_shabda_file(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(shabda_block(i))
+
+
+def dhatu_forms(i):
+    root = stem(i, "ध")
+    return [root + ending for rows in LAKARA_ENDINGS.values() for row in rows for ending in row]
+
+
+def shabda_forms(i):
+    base = stem(i, "श")
+    return [base + ending for _, *endings in VIBHAKTI_ENDINGS for ending in endings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic dhātu and śabda lexicon files.")
+    parser.add_argument("--dhatus", type=int, default=2000, help="number of Heading: blocks")
+    parser.add_argument("--shabdas", type=int, default=2000, help="number of Sanskrit Header: blocks")
+    parser.add_argument("--out", default=".", help="output directory")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    write_dhatu_file(os.path.join(args.out, "dhatu_all_combined.txt"), args.dhatus)
+    write_shabda_file(os.path.join(args.out, "shabda_combined.txt"), args.shabdas)
+    print(f"✅ Wrote {args.dhatus} dhātus and {args.shabdas} śabdas to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import os
+
+import pandas as pd
+
+from analysis_columns import read_batches
+
+# Corpus statistics over analyses written by AnalysisWriter (batch_analyze.py
+# with a .parquet or .arrow output):
+#
+#     python corpus_stats.py kanda.parquet
+#     python corpus_stats.py kanda*.parquet --top 20 --csv-dir stats/
+#
+#     tables = corpus_stats(["kanda.parquet"])
+#     tables["vibhakti"]          # vibhakti, count, share
+#
+# Each table is a group-by over a few dictionary-encoded columns, which
+# pandas reads as categoricals: the counting runs over the integer codes, a
+# record batch at a time, and the per-batch counts are summed. Only the
+# columns a table needs are read, and memory does not grow with the corpus.
+
+NOUN = "नामपद (Noun)"
+VERB = "धातु (Verb)"
+
+# name -> (columns grouped by, token type counted or None for all)
+TABLES = {
+    "type": (("type",), None),
+    "vibhakti": (("vibhakti",), NOUN),
+    "vibhakti_vachana": (("vibhakti", "vachana"), NOUN),
+    "linga": (("linga",), NOUN),
+    "karaka": (("karaka",), NOUN),
+    "karaka_vibhakti": (("karaka", "vibhakti"), NOUN),
+    "lakara": (("lakaara",), VERB),
+    "purusha_vachana": (("purusha", "vachana"), VERB),
+    "dhatu": (("dhatu",), VERB),
+    "gana": (("ganah",), VERB),
+}
+
+
+def batch_counts(frame, by, token_type):
+    if token_type is not None:
+        frame = frame[frame["type"] == token_type]
+    counts = frame.groupby(list(by), observed=True).size()
+    # Plain labels in the index (only the groups are converted), so counts
+    # from batches with different dictionaries add up.
+    return counts.reset_index().astype({column: object for column in by}).set_index(list(by))[0]
+
+
+def finish(counts, by):
+    # Summed counts -> a table sorted by count, with each row's share
+    if counts is None or counts.empty:
+        return pd.DataFrame(columns=[*by, "count", "share"])
+    table = counts.sort_values(ascending=False, kind="stable").rename("count").reset_index()
+    table["count"] = table["count"].astype("int64")
+    table["share"] = table["count"] / table["count"].sum()
+    return table
+
+
+def corpus_stats(paths, tables=None):
+    # {table name: DataFrame} for the TABLES named in `tables` (default all)
+    tables = {name: TABLES[name] for name in (tables or TABLES)}
+    columns = sorted({"type"} | {column for by, _ in tables.values() for column in by})
+    totals = dict.fromkeys(tables)
+    for path in paths:
+        for batch in read_batches(path, columns):
+            frame = batch.to_pandas()
+            for name, (by, token_type) in tables.items():
+                counts = batch_counts(frame, by, token_type)
+                if totals[name] is None:
+                    totals[name] = counts
+                else:
+                    totals[name] = totals[name].add(counts, fill_value=0)
+    return {name: finish(totals[name], by) for name, (by, _) in tables.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frequency tables over an analyzed corpus.")
+    parser.add_argument("inputs", nargs="+", help=".parquet or .arrow files from batch_analyze.py")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), help="default: all")
+    parser.add_argument("--top", type=int, default=10, help="rows shown per table")
+    parser.add_argument("--csv-dir", help="also write each full table to <dir>/<table>.csv")
+    args = parser.parse_args()
+
+    results = corpus_stats(args.inputs, args.tables)
+    for name, table in results.items():
+        print(f"\n📊 {name} ({len(table)} rows)")
+        if table.empty:
+            print("   (none)")
+        else:
+            print(table.head(args.top).to_string(index=False, float_format=lambda share: f"{share:.2%}"))
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for name, table in results.items():
+            table.to_csv(os.path.join(args.csv_dir, f"{name}.csv"), index=False)
+        print(f"\n✅ Wrote {len(results)} tables to {args.csv_dir}")
+
+
+if __name__ == "__main__":
+    main()
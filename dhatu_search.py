@@ -1,4 +1,17 @@
+import os
 import re
+import sys
+import threading
+from array import array
+import metrics
+from lexicon_index import COMPILE_ERRORS, ensure_compiled, freeze_readings, pack_array, pack_map, unpack_cells
+from lexicon_stream import _decode, iter_blocks, marker_offsets
+from parallel_index import map_ranges, merge_form_indexes
+from transliterate import normalize
+
+# Resolve the data file next to this script, not the working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DHATU_FILE_PATH = os.path.join(BASE_DIR, "dhatu_all_combined.txt")
 
 # List of primary and additional upasargas
 UPASARGAS = [
@@ -6,17 +19,17 @@ UPASARGAS = [
     "वि", "आ", "नि", "अधि", "अति", "अपि", "उत", "अभि", "उप", "सु", "परि", "अन्तर्", "तिरस्", "प्रति"
 ]
 
-def load_dhatus(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
+DEVANAGARI_WORD_RE = re.compile(r'[ऀ-ॿ]+')
+HEADING_MARKER = b"Heading:"
+LAKARA_TABLE_RE = re.compile(r'कर्तरि\s+([^\n]+)\n((?:.+\n)+?)(?=\n\S|\Z)')
 
-    raw_blocks = content.split("Heading:")
+def load_dhatus(file_path):
     dhatus = []
 
-    for block in raw_blocks[1:]:
+    for _, _, block in iter_blocks(file_path, "Heading:"):
         heading_line = block.strip().split('\n')[0]
         full_block = "Heading:" + block.strip()
-        words = re.findall(r'[ऀ-ॿ]+', full_block)
+        words = DEVANAGARI_WORD_RE.findall(full_block)
 
         dhatus.append({
             "heading": heading_line,
@@ -26,6 +39,28 @@ def load_dhatus(file_path):
 
     return dhatus
 
+def iter_dhatu_entries(file_path, start=0, end=None):
+    # Streams the file (or its bytes [start, end)) one block at a time,
+    # yielding (start, end, block, tables): the block's byte span, its text
+    # as DhatuLexicon.block returns it, and its conjugation tables already
+    # split into rows of forms.
+    for block_start, block_end, text in iter_blocks(file_path, "Heading:", start=start, end=end):
+        block = "Heading:" + text.strip()
+        yield block_start, block_end, block, parse_lakara_tables(block)
+
+def index_entries(file_path, start=0, end=None, first=0):
+    # One streaming pass over the file (or its bytes [start, end)) collecting
+    # the block offsets and the form index, entries numbered from `first`:
+    # (block starts, end of the last block, form index, readings as lists)
+    starts = array('Q')
+    form_index = {}
+    readings = {}
+    size = 0
+    for block_start, size, _, tables in iter_dhatu_entries(file_path, start, end):
+        index_forms(form_index, readings, first + len(starts), tables)
+        starts.append(block_start)
+    return starts, size, form_index, readings
+
 def extract_metadata(heading_text):
     try:
         parts = heading_text.split(')')
@@ -66,13 +101,259 @@ def get_purusha_vachana(row, col):
     vachanas = ["एकवचन", "द्विवचन", "बहुवचन"]
     return purushas[row], vachanas[col]
 
+# Longest first, so that e.g. प्रति is stripped rather than प्र
+UPASARGAS_BY_LENGTH = tuple(sorted(UPASARGAS, key=len, reverse=True))
+
 def strip_upasarga(word):
-    for upa in sorted(UPASARGAS, key=len, reverse=True):
+    if not word.startswith(UPASARGAS_BY_LENGTH):
+        return word, None
+    for upa in UPASARGAS_BY_LENGTH:
         if word.startswith(upa):
             return word[len(upa):], upa
     return word, None
 
+def parse_lakara_tables(block):
+    # Blocks are stripped, and a table's last row must end in a newline,
+    # so one is put back for the block's last table.
+    if not block.endswith('\n'):
+        block += '\n'
+    tables = []
+    for lakaara_line, table in LAKARA_TABLE_RE.findall(block):
+        rows = [DEVANAGARI_WORD_RE.findall(row) for row in table.strip().split('\n')]
+        tables.append((lakaara_line.strip(), rows))
+    return tables
+
+class BlockOffsets:
+    """(start, end) byte offsets of the text following each "Heading:" marker.
+
+    Only the start of each block is stored; a block ends where the next
+    marker begins.
+    """
+
+    __slots__ = ("starts", "size")
+
+    def __init__(self, starts, size):
+        self.starts = starts
+        self.size = size
+
+    @classmethod
+    def scan(cls, file, size):
+        return cls(array('Q', marker_offsets(file, HEADING_MARKER.decode())), size)
+
+    def __getitem__(self, e_idx):
+        end = self.starts[e_idx + 1] - len(HEADING_MARKER) if e_idx + 1 < len(self.starts) else self.size
+        return self.starts[e_idx], end
+
+    def __len__(self):
+        return len(self.starts)
+
+def pack_cell(e_idx, l_idx, r_idx, c_idx):
+    # One int per form: entry << 24 | lakāra << 16 | row << 8 | col. The
+    # packing keeps the lexicographic order of the tuple.
+    return (e_idx << 24) | (l_idx << 16) | (r_idx << 8) | c_idx
+
+def unpack_cell(cell):
+    return cell >> 24, (cell >> 16) & 0xFF, (cell >> 8) & 0xFF, cell & 0xFF
+
+def index_forms(form_index, readings, e_idx, tables):
+    # Adds one entry's forms at their first occurrence, in the same order a
+    # linear scan of the tables would find them. Forms that occur more than
+    # once also get every cell, in that order, in `readings`. Forms are keyed
+    # as queries are normalized.
+    for l_idx, (_, rows) in enumerate(tables[:0x100]):
+        for r_idx, row in enumerate(rows[:0x100]):
+            for c_idx, word in enumerate(row[:0x100]):
+                word = normalize(word)
+                cell = pack_cell(e_idx, l_idx, r_idx, c_idx)
+                first = form_index.setdefault(word, cell)
+                if first != cell:
+                    readings.setdefault(word, [first]).append(cell)
+
+def build_form_index(lexicon):
+    # (form -> packed cell of the first occurrence,
+    #  form -> all its cells packed with pack_cells, for forms with more than one)
+    form_index = {}
+    readings = {}
+    for e_idx in range(len(lexicon)):
+        index_forms(form_index, readings, e_idx, parse_lakara_tables(lexicon.block(e_idx)))
+    return form_index, freeze_readings(readings)
+
+def index_file(file_path, workers=None):
+    # (block offsets, form index, readings) of the file, from one streaming
+    # pass, or one pass per byte range with several workers (see
+    # parallel_index)
+    starts = array('Q')
+    sizes = [0]
+
+    def parts():
+        for part_starts, size, form_index, readings in map_ranges(index_entries, file_path, "Heading:", workers):
+            starts.extend(part_starts)
+            sizes.append(size)
+            yield form_index, readings, None
+
+    form_index, readings = merge_form_indexes(parts())
+    return BlockOffsets(starts, max(sizes)), form_index, freeze_readings(readings)
+
+def compiled_tables(offsets, form_index, readings):
+    # The block starts are followed by the end of the last block.
+    return {
+        "starts": pack_array([*offsets.starts, offsets.size]),
+        **pack_map("forms", form_index.items()),
+        **pack_map("readings", readings.items(), blobs=True),
+    }
+
+def open_file(file_path):
+    # (the file opened for reading, its stat)
+    file = open(file_path, 'rb', buffering=0)
+    return file, os.fstat(file.fileno())
+
+def same_file(a, b):
+    return (a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns) == (b.st_dev, b.st_ino, b.st_size, b.st_mtime_ns)
+
+class DhatuLexicon:
+    """Dhātu form index over dhatu_all_combined.txt, kept open on disk.
+
+    Only the byte offsets of each block and the form index stay resident.
+    A block is read from the file with pread, and its heading metadata and
+    conjugation tables parsed, the first time a lookup lands on it, and
+    memoized from then on. Reads go through the page cache, so processes
+    share the file's pages. A file rewritten in place since it was indexed
+    makes the read of an unread block raise OSError rather than return other
+    text (see lexicon_reload); one replaced by rename is read as it was.
+    """
+
+    def __init__(self, file_path, offsets=None, form_index=None, readings=None, opened=None):
+        # `opened` is an open_file() of file_path the caller already indexed;
+        # otherwise the lexicon opens the file itself.
+        self.file_path = file_path
+        self.file, self.stat = opened or open_file(file_path)
+        self.offsets = BlockOffsets.scan(self.file, self.stat.st_size) if offsets is None else offsets
+        self._parsed = {}
+        if form_index is None:
+            form_index, readings = build_form_index(self)
+        self.form_index = form_index
+        self.readings = {} if readings is None else readings
+
+    @classmethod
+    def indexed(cls, file_path, index, attempts=3):
+        # Opens the file and indexes it with index(stat of the open file) ->
+        # (offsets, form index, readings). If the file was replaced in the
+        # meantime, that is retried, so the index describes the bytes opened.
+        for _ in range(attempts):
+            file, st = open_file(file_path)
+            try:
+                offsets, form_index, readings = index(st)
+                if same_file(st, os.stat(file_path)):
+                    return cls(file_path, offsets, form_index, readings, opened=(file, st))
+            except BaseException:
+                file.close()
+                raise
+            file.close()
+        raise OSError(f"{file_path} kept changing while it was being indexed")
+
+    @classmethod
+    def from_file(cls, file_path, workers=None):
+        return cls.indexed(file_path, lambda st: index_file(file_path, workers))
+
+    @classmethod
+    def open_compiled(cls, file_path):
+        def index(st):
+            index = ensure_compiled(file_path, "dhatu", lambda path: compiled_tables(*index_file(path)),
+                                    source=(file_path, st))
+            starts = index.array("starts")
+            return BlockOffsets(starts[:-1], starts[-1]), index.map("forms"), index.map("readings")
+
+        return cls.indexed(file_path, index)
+
+    @classmethod
+    def load(cls, file_path):
+        with metrics.stage("dhatu_load"):
+            try:
+                return cls.open_compiled(file_path)
+            except COMPILE_ERRORS as e:
+                print(f"⚠️ Compiled dhātu index unavailable ({e}); parsing the text file instead.")
+                return cls.from_file(file_path)
+
+    def compiled_tables(self):
+        return compiled_tables(self.offsets, self.form_index, self.readings)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        for e_idx in range(len(self)):
+            entry = self.entry(e_idx)
+            yield {"heading": entry["heading"], "block": entry["block"]}
+
+    def block(self, e_idx):
+        start, end = self.offsets[e_idx]
+        data = os.pread(self.file.fileno(), end - start, start)
+        if len(data) != end - start or not same_file(os.fstat(self.file.fileno()), self.stat):
+            raise OSError(f"{self.file_path} was rewritten in place since it was indexed")
+        # Newlines translated as iter_blocks does, so the block matches the
+        # text the form index was built from.
+        return HEADING_MARKER.decode() + _decode([data]).strip()
+
+    def entry(self, e_idx, memoize=True):
+        # memoize=False is for passes over every entry, which would otherwise
+        # leave the whole file parsed in memory.
+        parsed = self._parsed.get(e_idx)
+        if parsed is None:
+            block = self.block(e_idx)
+            heading = block[len(HEADING_MARKER):].split('\n')[0]
+            metadata = extract_metadata(heading)
+            parsed = {
+                "heading": heading,
+                "block": block,
+                "metadata": {key: sys.intern(value) for key, value in metadata.items()},
+                "tables": [(sys.intern(lakaara), rows) for lakaara, rows in parse_lakara_tables(block)],
+            }
+            # Racing readers may both parse the same block; either result is
+            # identical, so the last write winning is harmless.
+            if memoize:
+                self._parsed[e_idx] = parsed
+        return parsed
+
+    def cells(self, form):
+        # Every cell listing `form`, in scan order.
+        cells = self.readings.get(form)
+        if cells is not None:
+            return unpack_cells(cells)
+        cell = self.form_index.get(form)
+        return () if cell is None else (cell,)
+
+    def result(self, cell, form, upasarga):
+        e_idx, l_idx, r_idx, c_idx = unpack_cell(cell)
+        entry = self.entry(e_idx)
+        purusha, vachana = get_purusha_vachana(r_idx, c_idx)
+        return {
+            "metadata": dict(entry["metadata"]),
+            "lakaara": entry["tables"][l_idx][0],
+            "form": form,
+            "purusha": purusha,
+            "vachana": vachana,
+            "upasarga": upasarga,
+            "full_block": entry["block"]
+        }
+
+    def search_form(self, form):
+        stripped_form, upasarga = strip_upasarga(form)
+        hits = [hit for hit in (self.form_index.get(form), self.form_index.get(stripped_form)) if hit is not None]
+        if not hits:
+            return None
+        return self.result(min(hits), form, upasarga)
+
+    def search_form_all(self, form):
+        stripped_form, upasarga = strip_upasarga(form)
+        cells = set(self.cells(form))
+        if stripped_form != form:
+            cells.update(self.cells(stripped_form))
+        return [self.result(cell, form, upasarga) for cell in sorted(cells)]
+
 def search_form(dhatus, form):
+    if isinstance(dhatus, DhatuLexicon):
+        return dhatus.search_form(form)
+
     stripped_form, upasarga = strip_upasarga(form)
 
     for entry in dhatus:
@@ -81,16 +362,14 @@ def search_form(dhatus, form):
             continue
 
         metadata = extract_metadata(entry["heading"])
-        lakaras = re.findall(r'कर्तरि\s+([^\n]+)\n((?:.+\n)+?)(?=\n\S|\Z)', block)
-        for lakaara_line, table in lakaras:
-            rows = [re.findall(r'[ऀ-ॿ]+', row) for row in table.strip().split('\n')]
+        for lakaara, rows in parse_lakara_tables(block):
             for r_idx, row in enumerate(rows):
                 for c_idx, word in enumerate(row):
                     if word == form or word == stripped_form:
                         purusha, vachana = get_purusha_vachana(r_idx, c_idx)
                         return {
                             "metadata": metadata,
-                            "lakaara": lakaara_line.strip(),
+                            "lakaara": lakaara,
                             "form": form,
                             "purusha": purusha,
                             "vachana": vachana,
@@ -98,3 +377,76 @@ def search_form(dhatus, form):
                             "full_block": block
                         }
     return None
+
+def search_form_all(dhatus, form):
+    # Every reading of `form`, in the order search_form would reach them; the
+    # first is what search_form returns.
+    if isinstance(dhatus, DhatuLexicon):
+        return dhatus.search_form_all(form)
+
+    stripped_form, upasarga = strip_upasarga(form)
+    results = []
+
+    for entry in dhatus:
+        block = entry["block"]
+        if form not in entry["forms"] and stripped_form not in entry["forms"]:
+            continue
+
+        metadata = extract_metadata(entry["heading"])
+        for lakaara, rows in parse_lakara_tables(block):
+            for r_idx, row in enumerate(rows):
+                for c_idx, word in enumerate(row):
+                    if word == form or word == stripped_form:
+                        purusha, vachana = get_purusha_vachana(r_idx, c_idx)
+                        results.append({
+                            "metadata": metadata,
+                            "lakaara": lakaara,
+                            "form": form,
+                            "purusha": purusha,
+                            "vachana": vachana,
+                            "upasarga": upasarga,
+                            "full_block": block
+                        })
+    return results
+
+# Dhātus are loaded on first use and shared by every caller in the process
+_dhatus = None
+_dhatus_lock = threading.Lock()
+_generation = 0
+
+def _load_dhatus():
+    try:
+        print("🔄 Loading dhātus...")
+        dhatus = DhatuLexicon.load(DHATU_FILE_PATH)
+        print(f"✅ Loaded {len(dhatus)} dhātu entries.\n")
+        return dhatus
+    except Exception as e:
+        print(f"❌ Error loading dhātus: {e}")
+        return []
+
+def get_dhatus():
+    global _dhatus
+    dhatus = _dhatus
+    if dhatus is None:
+        with _dhatus_lock:
+            if _dhatus is None:
+                _dhatus = _load_dhatus()
+            dhatus = _dhatus
+    return dhatus
+
+def publish_dhatus(dhatus):
+    # Swaps in a fully built dhātu lexicon; lookups already running keep the
+    # one they started with.
+    global _dhatus, _generation
+    with _dhatus_lock:
+        _dhatus = dhatus
+        _generation += 1
+    return dhatus
+
+def reload_dhatus():
+    return publish_dhatus(_load_dhatus())
+
+def dhatu_generation():
+    # Bumped on every published lexicon, so caches built on lookups can tell
+    # when their results are stale.
+    return _generation
@@ -0,0 +1,30 @@
+import argparse
+
+from export_rows import add_output_arguments, export, messages_to_stderr, output_format
+
+# Bulk export of the śabda meaning table, for search indexes and other tools:
+#
+#     python export_meanings.py -o meanings.tsv
+#     python export_meanings.py -o meanings.jsonl
+#
+# One row per śabda entry, in file order: id, naamapada, linga, artha and
+# the Sanskrit (Bharati Kosha), Hindi and English meanings. Missing fields are
+# empty in TSV and null in JSONL. The meanings come straight from the lexicon,
+# which parsed them when it was built.
+
+FIELDS = ("id", "naamapada", "linga", "artha", "Sanskrit", "Hindi", "English")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the śabda meaning table.")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    with messages_to_stderr():
+        from shabda_vibhakti import get_lexicon
+        lexicon = get_lexicon()
+    export(lexicon.iter_meanings(), args.output, output_format(args), FIELDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+
+from export_rows import add_output_arguments, export, messages_to_stderr, output_format
+
+# Bulk export of every conjugation and declension table, for teaching tools
+# and drill generators:
+#
+#     python export_paradigms.py -o paradigms.tsv
+#     python export_paradigms.py -o paradigms.jsonl --kind dhatu
+#
+# TSV has one row per form: kind, id, stem, lakara, purusha, vibhakti,
+# vachana, form, with the columns that do not apply left empty. JSONL has one
+# object per entry: kind, id, stem and its whole table, nested as
+# paradigms.generate returns it. Entries are in lexicon order, dhātus first.
+
+FIELDS = ("kind", "id", "stem", "lakara", "purusha", "vibhakti", "vachana", "form")
+
+
+def form_rows(all_paradigms):
+    for paradigms in all_paradigms:
+        names = [name for name, _ in paradigms.axes]
+        for e_idx, labels, form in paradigms.iter_forms():
+            yield {"kind": paradigms.kind, "id": e_idx, "stem": paradigms.stems[e_idx], "form": form,
+                   **dict(zip(names, labels))}
+
+
+def table_rows(all_paradigms):
+    for paradigms in all_paradigms:
+        for e_idx, stem in enumerate(paradigms.stems):
+            yield {"kind": paradigms.kind, "id": e_idx, "stem": stem, "table": paradigms.table(e_idx)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every dhātu and śabda paradigm.")
+    add_output_arguments(parser)
+    parser.add_argument("--kind", choices=["dhatu", "shabda", "all"], default="all")
+    args = parser.parse_args()
+
+    fmt = output_format(args)
+    kinds = ("dhatu", "shabda") if args.kind == "all" else (args.kind,)
+
+    with messages_to_stderr():
+        from paradigms import get_paradigms
+        all_paradigms = [get_paradigms(kind) for kind in kinds]
+
+    if fmt == "jsonl":
+        export(table_rows(all_paradigms), args.output, fmt, FIELDS)
+    else:
+        export(form_rows(all_paradigms), args.output, fmt, FIELDS, unit="forms")
+
+
+if __name__ == "__main__":
+    main()
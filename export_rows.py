@@ -0,0 +1,64 @@
+import contextlib
+import csv
+import json
+import sys
+
+# Output handling shared by the bulk exporters (export_meanings.py,
+# export_paradigms.py): the -o/--format options, TSV or JSONL rows to a file
+# or stdout, and the lexicons' loading messages kept off stdout so that it
+# can carry the export.
+
+FORMATS = ("tsv", "jsonl")
+
+
+def add_output_arguments(parser):
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output file's extension, else tsv")
+
+
+def output_format(args):
+    return args.format or ("jsonl" if args.output and args.output.endswith(".jsonl") else "tsv")
+
+
+@contextlib.contextmanager
+def messages_to_stderr():
+    # print() goes to stderr inside the block, e.g. while the lexicons load
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+
+def write_tsv(rows, fields, out):
+    # A header of `fields`, then one line per row dict; missing or None
+    # fields are left empty.
+    writer = csv.writer(out, delimiter="\t", lineterminator="\n", quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if row.get(field) is None else row[field] for field in fields])
+        count += 1
+    return count
+
+
+def write_jsonl(rows, out):
+    count = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def export(rows, output, fmt, fields, unit="entries"):
+    # Writes `rows` to `output` (a path, or stdout if None) and reports the
+    # count on stderr.
+    out = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+    try:
+        count = write_jsonl(rows, out) if fmt == "jsonl" else write_tsv(rows, fields, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ Exported {count} {unit} ({fmt})", file=sys.stderr)
+    return count
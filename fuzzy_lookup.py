@@ -0,0 +1,108 @@
+from array import array
+from bisect import bisect_left
+
+# Approximate form lookup by symmetric deletion.
+#
+#     index = FuzzyIndex(forms, max_distance=1)
+#     index.lookup("रामा")      # [("रामाः", 1), ("रामः", 1), ...]
+#
+# Every form is indexed under itself and each string obtained by deleting up
+# to `max_distance` characters from it. A query generates its own deletions
+# the same way; any form sharing one of them is within reach, and only those
+# few candidates are checked with a real edit distance. This catches a
+# missing visarga or anusvāra (one deletion), a wrong vowel length or vowel
+# sign (one substitution) and a stray virāma (one insertion) at
+# max_distance=1.
+#
+# The deletions are not kept as strings: each is stored as a 40-bit hash next
+# to the 24-bit number of its form, in one sorted array of 64-bit ints, and
+# found by bisection. Hash collisions only add candidates, which the edit
+# distance check then rejects.
+
+HASH_BITS = 40
+ID_BITS = 24
+HASH_MASK = (1 << HASH_BITS) - 1
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def deletions(form, max_distance):
+    # `form` and every string reachable from it by deleting up to
+    # max_distance characters.
+    variants = {form}
+    frontier = {form}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a, b, limit):
+    # Optimal string alignment distance (insertions, deletions,
+    # substitutions and adjacent transpositions), or limit + 1 once it is
+    # certain to exceed `limit`.
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def match_rank(word, form, distance):
+    # Sort key for matches: nearest first; at equal distance prefer forms
+    # longer than the input (something was left out, the commonest slip),
+    # then the same length, then shorter.
+    length = len(form) - len(word)
+    return distance, 0 if length > 0 else 1 if length == 0 else 2, form
+
+
+class FuzzyIndex:
+    def __init__(self, forms, max_distance=1):
+        self.forms = list(forms)
+        self.max_distance = max_distance
+        if len(self.forms) > ID_MASK + 1:
+            raise ValueError(f"FuzzyIndex holds at most {ID_MASK + 1} forms")
+        keys = []
+        for form_id, form in enumerate(self.forms):
+            for variant in deletions(form, max_distance):
+                keys.append(((hash(variant) & HASH_MASK) << ID_BITS) | form_id)
+        keys.sort()
+        self.keys = array('Q', keys)
+
+    def __len__(self):
+        return len(self.forms)
+
+    def candidates(self, variant):
+        prefix = hash(variant) & HASH_MASK
+        pos = bisect_left(self.keys, prefix << ID_BITS)
+        while pos < len(self.keys) and self.keys[pos] >> ID_BITS == prefix:
+            yield self.keys[pos] & ID_MASK
+            pos += 1
+
+    def lookup(self, word, max_distance=None, limit=5):
+        # The nearest forms within max_distance, as (form, distance) pairs
+        # ordered by match_rank.
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        seen = set()
+        matches = []
+        for variant in deletions(word, max_distance):
+            for form_id in self.candidates(variant):
+                if form_id in seen:
+                    continue
+                seen.add(form_id)
+                form = self.forms[form_id]
+                distance = edit_distance(word, form, max_distance)
+                if distance <= max_distance:
+                    matches.append((form, distance))
+        matches.sort(key=lambda match: match_rank(word, *match))
+        return matches[:limit]
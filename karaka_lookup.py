@@ -1,71 +1,239 @@
-from dhatu_search import load_dhatus, search_form
-
-# Apādāna kāraka sūtras
-APADANA_SUTRAS = [
-    {
-        "sutra": "1.4.31 भुवः प्रभवः",
-        "meaning": "Source from which something originates.",
-        "verbs": ["भू", "प्रभव"]
-    },
-     {
-        "sutra": "1.4.24 ध्रुवमपायेऽपादानम्",
-        "meaning": "Fixed point from which departure happens.",
-        "verbs": ["गम्", "व्रज्", "अवरोह्", "पत्"]
-    },
-    {
-        "sutra": "1.4.25 भीत्रार्थानां भयहेतुः",
-        "meaning": "Cause/source of fear or danger.",
-        "verbs": ["बिभे", "उद्विज्", "त्रै", "रक्ष्"]
-    },
-    {
-        "sutra": "1.4.26 पराजेरसोढः",
-        "meaning": "Something that becomes unbearable.",
-        "verbs": ["पराजि"]
-    },
-    {
-        "sutra": "1.4.27 वारणार्थानामीप्सितः",
-        "meaning": "Desired object from which one is prevented.",
-        "verbs": ["वारय", "निवर्त", "निवार"]
-    },
-    {
-        "sutra": "1.4.28 अन्तर्द्धौ येनादर्शनमिच्छति",
-        "meaning": "The one from whom one hides (concealment).",
-        "verbs": ["अन्तर्धा", "निल", "दृश्"]
-    },
-    {
-        "sutra": "1.4.29 आख्यातोपयोगे",
-        "meaning": "In relation to learning from a teacher.",
-        "verbs": ["धी", "शिक्ष", "आगम"]
-    },
-    {
-        "sutra": "1.4.30 जनिकर्तुः प्रकृतिः",
-        "meaning": "Prime cause of something's origin.",
-        "verbs": ["जन्"]
-    },
-]
-
-def find_apadana_sutra(verb_root):
-    for sutra in APADANA_SUTRAS:
-        for dhatu in sutra["verbs"]:
-            if dhatu in verb_root:
-                return f"{sutra['sutra']} — {sutra['meaning']}"
-            
+import os
+import threading
+
+# Kāraka (1.4.23–1.4.55) and vibhakti (2.3) sūtras, read from
+# karaka_sutras.tsv and compiled into a SutraIndex:
+#
+#     index = get_sutra_index()
+#     index.match("गम्")                           # 1.4.24, 2.3.12, ...
+#     index.match("जि", "परा", karakas=["अपादान"])  # 1.4.26
+#
+# A rule is triggered by a verb either through its roots, looked up exactly in
+# a dict (as the root alone, and as upasarga+root), or through its patterns,
+# upasarga+root strings found anywhere in the verb by one Aho-Corasick pass.
+# Neither depends on the number of rules: a lookup is one dict probe plus a
+# walk over the few characters of the verb.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SUTRA_FILE_PATH = os.path.join(BASE_DIR, "karaka_sutras.tsv")
+COLUMNS = ("kind", "sutra", "karaka", "vibhakti", "roots", "patterns", "meaning")
+LIST_COLUMNS = {"karaka": "karakas", "vibhakti": "vibhaktis", "roots": "roots", "patterns": "patterns"}
+
+
+def load_sutras(file_path=SUTRA_FILE_PATH):
+    # Rules in file order, as dicts with "kind", "sutra", "meaning" and the
+    # lists "karakas", "vibhaktis", "roots", "patterns".
+    sutras = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if fields[0] == "kind":
+                continue
+            if len(fields) != len(COLUMNS):
+                raise ValueError(f"{file_path}:{line_no}: expected {len(COLUMNS)} columns, got {len(fields)}")
+            sutra = {}
+            for column, value in zip(COLUMNS, fields):
+                value = "" if value.strip() == "-" else value.strip()
+                if column in LIST_COLUMNS:
+                    sutra[LIST_COLUMNS[column]] = [item.strip() for item in value.split(",") if item.strip()]
+                else:
+                    sutra[column] = value
+            sutras.append(sutra)
+    return sutras
+
+
+class AhoCorasick:
+    """Every occurrence of a fixed set of patterns in one pass over a text."""
+
+    def __init__(self, patterns):
+        # Trie as parallel lists: goto[node] maps a character to the next
+        # node; out[node] holds the pattern ids ending there, including those
+        # reached through failure links.
+        self.goto = [{}]
+        self.out = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.out.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.out[node].append(pattern_id)
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def search(self, text):
+        # Ids of the patterns occurring in `text`, in order of their end.
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            yield from self.out[node]
+
+
+def applies(sutra, karakas=None, vibhakti=None, kind=None):
+    # Whether a rule is of `kind`, for one of `karakas` and for `vibhakti`;
+    # a filter left out passes every rule.
+    if kind and sutra["kind"] != kind:
+        return False
+    if karakas and not set(karakas) & set(sutra["karakas"]):
+        return False
+    return not vibhakti or vibhakti in sutra["vibhaktis"]
+
+
+class SutraIndex:
+    def __init__(self, sutras):
+        self.sutras = sutras
+        self.by_root = {}
+        patterns = []
+        self.pattern_rules = []
+        for rule_id, sutra in enumerate(sutras):
+            for root in sutra["roots"]:
+                self.by_root.setdefault(root, []).append(rule_id)
+            for pattern in sutra["patterns"]:
+                patterns.append(pattern)
+                self.pattern_rules.append(rule_id)
+        self.matcher = AhoCorasick(patterns)
+        self.glosses = {s["karakas"][0]: s["meaning"] for s in sutras if s["kind"] == "gloss"}
+        # vibhakti -> its assignment rules without triggers, in file order
+        self.by_vibhakti = {}
+        for sutra in sutras:
+            if sutra["kind"] == "vibhakti" and not sutra["roots"] and not sutra["patterns"]:
+                for vibhakti in sutra["vibhaktis"]:
+                    self.by_vibhakti.setdefault(vibhakti, []).append(sutra)
+        # kārakas and vibhaktis that some verb-triggered rule can assign
+        triggered = [sutra for sutra in sutras if sutra["roots"] or sutra["patterns"]]
+        self.triggered_karakas = {karaka for sutra in triggered for karaka in sutra["karakas"]}
+        self.triggered_vibhaktis = {vibhakti for sutra in triggered for vibhakti in sutra["vibhaktis"]}
+        # Per-vibhakti answers are fixed by the table, so they are worked out
+        # here once; those that depend on the verb are memoized as they come
+        # up, since a text has few distinct verbs.
+        self.karakas_of = {}
+        for vibhakti, vibhakti_sutras in self.by_vibhakti.items():
+            karakas = self.karakas_of[vibhakti] = []
+            for sutra in vibhakti_sutras:
+                karakas += [karaka for karaka in sutra["karakas"] if karaka not in karakas]
+        self.verb_dependent = self.triggered_vibhaktis | {
+            vibhakti for vibhakti, karakas in self.karakas_of.items() if not self.triggered_karakas.isdisjoint(karakas)}
+        self._verb_sutras = {}
+
+    def __len__(self):
+        return len(self.sutras)
+
+    def match(self, root, upasarga=None, karakas=None, vibhakti=None, kind=None):
+        # Rules triggered by the verb upasarga+root, in file order, optionally
+        # only those for one of `karakas`, for `vibhakti` or of one `kind`.
+        rule_ids = set(self.by_root.get(root, ()))
+        if upasarga:
+            rule_ids.update(self.by_root.get(f"{upasarga}+{root}", ()))
+        rule_ids.update(self.pattern_rules[i] for i in self.matcher.search((upasarga or "") + root))
+        rules = [self.sutras[rule_id] for rule_id in sorted(rule_ids)]
+        return [sutra for sutra in rules if applies(sutra, karakas, vibhakti, kind)]
+
+    def vibhakti_karakas(self, vibhakti):
+        # Kārakas a vibhakti expresses, the default first
+        return list(self.karakas_of.get(vibhakti, ()))
+
+    def depends_on_verb(self, vibhakti):
+        return vibhakti in self.verb_dependent
+
+    def verb_sutras(self, vibhakti, root, upasarga=None):
+        # The sūtras the verb upasarga+root gives a noun in `vibhakti`, as
+        # analysis fields: karaka_sutra, vibhakti_sutra and, where the
+        # vibhakti can express apādāna, apadana_sutra. With vibhakti None,
+        # karaka_sutra is the verb's first kāraka sūtra of any kāraka.
+        # Memoized; the caller must not modify the dict.
+        key = (vibhakti, root, upasarga)
+        sutras = self._verb_sutras.get(key)
+        if sutras is None:
+            karakas = self.karakas_of.get(vibhakti, [])
+            rules = self.match(root, upasarga)
+            sutras = {"karaka_sutra": first_rule(rules, "karaka", karakas=karakas)}
+            if "अपादान" in karakas:
+                sutras["apadana_sutra"] = first_rule(rules, "karaka", karakas=["अपादान"])
+            if vibhakti is not None:
+                sutras["vibhakti_sutra"] = (first_rule(rules, "vibhakti", vibhakti=vibhakti) or
+                                            describe(self.vibhakti_sutra(vibhakti)))
+            self._verb_sutras[key] = sutras
+        return sutras
+
+    def vibhakti_sutra(self, vibhakti):
+        sutras = self.by_vibhakti.get(vibhakti)
+        return sutras[0] if sutras else None
+
+
+def describe(sutra):
+    return f"{sutra['sutra']} — {sutra['meaning']}" if sutra else None
+
+
+def first_rule(rules, kind, karakas=None, vibhakti=None):
+    # describe() of the first of `rules` of `kind` for one of `karakas` or
+    # for `vibhakti`
+    for sutra in rules:
+        if applies(sutra, karakas, vibhakti, kind):
+            return describe(sutra)
     return None
 
-def get_karaka_sutra(dhatu_root):
-    return find_apadana_sutra(dhatu_root)
 
-# ------------------- VIBHAKTI to KARAKA Mapping -------------------
+_sutra_index = None
+_sutra_index_lock = threading.Lock()
+
+
+def get_sutra_index():
+    global _sutra_index
+    if _sutra_index is None:
+        with _sutra_index_lock:
+            if _sutra_index is None:
+                _sutra_index = SutraIndex(load_sutras())
+    return _sutra_index
+
 
-VIBHAKTI_KARAKA_MAP = {
-    "प्रथमा": ("कर्तृ", "The doer of the action."),
-    "द्वितीया": ("कर्म", "The object of the action."),
-    "तृतीया": ("करण", "Instrument or means."),
-    "चतुर्थी": ("सम्प्रदान", "Recipient."),
-    "पञ्चमी": ("अपादान", "Point of separation or origin."),
-    "षष्ठी": ("सम्बन्ध", "Relation or possession."),
-    "सप्तमी": ("अधिकरण", "Location or context.")
-}
+def find_karaka_sutra(verb_root, karakas, upasarga=None):
+    # The first sūtra the verb triggers for one of `karakas`
+    matches = get_sutra_index().match(verb_root, upasarga, karakas=karakas, kind="karaka")
+    return describe(matches[0]) if matches else None
+
+
+def find_apadana_sutra(verb_root, upasarga=None):
+    return find_karaka_sutra(verb_root, ["अपादान"], upasarga)
+
+
+def get_karaka_sutra(dhatu_root, upasarga=None):
+    # The first kāraka sūtra of any kāraka the verb triggers
+    return get_sutra_index().verb_sutras(None, dhatu_root, upasarga)["karaka_sutra"]
+
+# ------------------- VIBHAKTI to KARAKA Mapping -------------------
 
 def get_vibhakti_karaka(vibhakti):
-    return VIBHAKTI_KARAKA_MAP.get(vibhakti, ("❓", "❓"))
+    # (default kāraka, its gloss) of a vibhakti
+    index = get_sutra_index()
+    karakas = index.karakas_of.get(vibhakti)
+    if not karakas:
+        return ("❓", "❓")
+    return (karakas[0], index.glosses.get(karakas[0], "❓"))
+
+
+def get_vibhakti_sutra(vibhakti, verb_root=None, upasarga=None):
+    # The sūtra assigning `vibhakti`: one triggered by the sentence's verb if
+    # there is one (e.g. 2.3.12 for the goal of a verb of motion), else the
+    # general rule.
+    index = get_sutra_index()
+    if verb_root:
+        matches = index.match(verb_root, upasarga, vibhakti=vibhakti, kind="vibhakti")
+        if matches:
+            return describe(matches[0])
+    return describe(index.vibhakti_sutra(vibhakti))
@@ -0,0 +1,440 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+import metrics
+
+# Compiled lexicon indexes are files written next to the text file they were
+# built from (e.g. shabda_combined.txt -> shabda_combined.txt.index). They save
+# parsing the text file, and they are read in place: a lexicon opening one
+# maps the file read-only and serves every lookup from the map, so all the
+# processes that open the same index share one copy of it in the page cache
+# instead of each holding a parsed copy of their own.
+#
+# The file is a JSON header (the meta values and where each section starts)
+# followed by flat sections: arrays of 64-bit ints, string lists
+# (pack_strings) and hash maps from strings to ints or bytes (pack_map). A
+# map lookup hashes the key with crc32 and compares it with the few keys of
+# its bucket, without building anything per process. That costs ~1 µs per
+# lookup against ~0.3 µs for a dict (analyze_word ~40 -> ~50 µs at 10k
+# synthetic entries). LEXICON_INDEX_IN_MEMORY=1 reads the sections into
+# dicts and lists instead, one private copy per process:
+#
+#     entries (dhātu / śabda)    index file    per process, mapped    in memory
+#     2k / 5k                    15 MiB        ~2 MiB                 ~38 MiB
+#     5k / 50k                   129 MiB       ~4 MiB                 ~300 MiB
+#
+# so N mapped workers hold the index file once in the page cache, and N
+# in-memory ones N times the last column.
+#
+# Index files are only ever replaced by rename (replace_file), never
+# rewritten in place, so a map never sees its file change under it.
+INDEX_SUFFIX = ".index"
+INDEX_FORMAT = 8
+INDEX_MAGIC = b"LEXINDEX"
+INDEX_HEADER = struct.Struct("<8sQ")  # magic, length of the JSON header
+IN_MEMORY = os.environ.get("LEXICON_INDEX_IN_MEMORY", "") not in ("", "0")
+
+# Failures that mean "no usable compiled index here": a read-only or full
+# filesystem, no permission, a corrupt file. The loaders then parse the text
+# file instead, so a missing source file still fails there.
+COMPILE_ERRORS = (OSError, ValueError, KeyError)
+
+_build_lock = threading.Lock()
+
+# Index files get the mode open() would give a new file; mkstemp's is 0600.
+# Read once, at import, since reading the umask means setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def compiled_path(source_path):
+    return source_path + INDEX_SUFFIX
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def private_copy(source_path, attempts=3):
+    """Copy `source_path` to a new temporary file beside it; return (copy
+    path, stat).
+
+    The copy is what gets hashed and parsed afterwards, so the bytes read
+    twice are the same bytes. The stat is the source's, checked again after
+    copying, so it describes exactly the bytes copied. The caller removes
+    the copy.
+    """
+    directory = os.path.dirname(os.path.abspath(source_path))
+    for _ in range(attempts):
+        fd, copy_path = tempfile.mkstemp(prefix=".lexicon-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as copy, open(source_path, 'rb') as source:
+                before = os.fstat(source.fileno())
+                shutil.copyfileobj(source, copy, 1 << 20)
+            after = os.stat(source_path)
+        except BaseException:
+            os.remove(copy_path)
+            raise
+        if (before.st_ino, before.st_size, before.st_mtime_ns) == (after.st_ino, after.st_size, after.st_mtime_ns):
+            return copy_path, before
+        os.remove(copy_path)
+    raise OSError(f"{source_path} kept changing while it was being copied")
+
+
+def _aligned(n):
+    return (n + 7) & ~7
+
+
+def read_header(file):
+    # (meta, sections, offset of the first section) of an open index file
+    fixed = file.read(INDEX_HEADER.size)
+    if len(fixed) != INDEX_HEADER.size or fixed[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError(f"{file.name} is not a compiled lexicon index")
+    length = INDEX_HEADER.unpack(fixed)[1]
+    header = json.loads(file.read(length))
+    return header["meta"], header["sections"], _aligned(INDEX_HEADER.size + length)
+
+
+def read_meta(index_path):
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, 'rb') as file:
+            return read_header(file)[0]
+    except (ValueError, KeyError):
+        return None
+
+
+def write_header(file, meta, sections):
+    header = json.dumps({"meta": meta, "sections": sections}).encode('utf-8')
+    file.write(INDEX_HEADER.pack(INDEX_MAGIC, len(header)))
+    file.write(header)
+    file.write(b"\0" * (_aligned(INDEX_HEADER.size + len(header)) - INDEX_HEADER.size - len(header)))
+
+
+def replace_file(path, fill):
+    # Calls fill(temporary path) on a new file in the same directory, then
+    # renames it over `path`, so readers never see a partly written file.
+    # The file is readable by whoever could read one created with open().
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".lexicon-", suffix=".tmp", dir=directory)
+    try:
+        os.fchmod(fd, FILE_MODE)
+    finally:
+        os.close(fd)
+    try:
+        fill(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_index(index_path, kind, meta, sections):
+    """Write a compiled index atomically.
+
+    `sections` maps a section name to its bytes (see pack_array, pack_strings
+    and pack_map). The file is built under a temporary name and renamed into
+    place, so readers never see a partly written index.
+    """
+    meta = {k: str(v) for k, v in {**meta, "kind": kind, "format": INDEX_FORMAT, "byteorder": sys.byteorder}.items()}
+    offsets = {}
+    offset = 0
+    for name, data in sections.items():
+        offsets[name] = [offset, len(data)]
+        offset = _aligned(offset + len(data))
+
+    def fill(tmp_path):
+        with open(tmp_path, 'wb') as file:
+            write_header(file, meta, offsets)
+            for data in sections.values():
+                file.write(data)
+                file.write(b"\0" * (_aligned(len(data)) - len(data)))
+
+    replace_file(index_path, fill)
+
+
+def refresh_meta(index_path, meta):
+    # Rewrites some meta values of an existing index, on a copy renamed into
+    # place like write_index, never in the file readers may have mapped.
+    def fill(tmp_path):
+        with open(index_path, 'rb') as source, open(tmp_path, 'wb') as file:
+            old_meta, sections, start = read_header(source)
+            write_header(file, {**old_meta, **{k: str(v) for k, v in meta.items()}}, sections)
+            source.seek(start)
+            shutil.copyfileobj(source, file, 1 << 20)
+
+    replace_file(index_path, fill)
+
+
+def ensure_compiled(source_path, kind, build_tables, source=None):
+    """Return a CompiledIndex for `source_path`, rebuilding it only if stale.
+
+    The index is checked against, and if need be built from, one (path,
+    stat) of the source's bytes: `source`, if the caller vouches for a path
+    whose bytes that stat describes, else a private_copy taken here.
+    build_tables gets that path, so the recorded stat and hash describe
+    exactly the bytes it parses. A matching mtime and size are trusted
+    as-is; only then is no copy taken. Otherwise the bytes are hashed, and
+    an index whose hash still matches only has its recorded stat refreshed.
+    """
+    index_path = compiled_path(source_path)
+
+    with _build_lock:
+        meta = read_meta(index_path)
+        current = (bool(meta) and meta.get("kind") == kind and meta.get("format") == str(INDEX_FORMAT)
+                   and meta.get("byteorder") == sys.byteorder)
+        stat = source[1] if source else os.stat(source_path)
+        if current and meta.get("mtime_ns") == str(stat.st_mtime_ns) and meta.get("size") == str(stat.st_size):
+            return CompiledIndex(index_path)
+
+        own_copy = source is None
+        if own_copy:
+            source = private_copy(source_path)
+        try:
+            read_path, stat = source
+            recorded = {"sha256": file_sha256(read_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            if current and meta.get("sha256") == recorded["sha256"]:
+                refresh_meta(index_path, recorded)
+            else:
+                print(f"🔧 Compiling index for {os.path.basename(source_path)}...")
+                with metrics.stage(f"{kind}_index_build"):
+                    write_index(index_path, kind, recorded, build_tables(read_path))
+        finally:
+            if own_copy:
+                os.remove(source[0])
+        return CompiledIndex(index_path)
+
+
+def freeze_readings(readings):
+    # The readings maps are built with lists of cells; once complete, each
+    # list is packed in place (pack_cells), as the compiled index stores it.
+    for form, cells in readings.items():
+        readings[form] = pack_cells(cells)
+    return readings
+
+
+def pack_cells(cells):
+    return array('Q', cells).tobytes()
+
+
+def unpack_cells(blob):
+    cells = array('Q')
+    cells.frombytes(blob)
+    return tuple(cells)
+
+
+class LabelTable:
+    """Interns repeated grammatical labels and numbers them with small codes.
+
+    Index cells store the code; the label string exists once per table.
+    """
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self._codes = {}
+        for label in labels:
+            self.code(label)
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(sys.intern(label))
+        return code
+
+    def label(self, code):
+        return self.labels[code]
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def pack_array(values):
+    return array('Q', values).tobytes()
+
+
+def pack_strings(name, values):
+    # Sections of a list of strings (or None), read back with
+    # CompiledIndex.strings(name)
+    bounds = array('Q', [0])
+    nulls = bytearray()
+    data = bytearray()
+    for value in values:
+        nulls.append(value is None)
+        data += (value or "").encode('utf-8')
+        bounds.append(len(data))
+    return {f"{name}.bounds": bounds.tobytes(), f"{name}.nulls": bytes(nulls), f"{name}.data": bytes(data)}
+
+
+def pack_map(name, items, blobs=False):
+    # Sections of a hash map from strings to ints (or to bytes, with
+    # blobs=True), read back with CompiledIndex.map(name). The keys are
+    # grouped by the bucket their crc32 falls in, with a power of two of
+    # buckets at least as many as the keys.
+    records = [(key.encode('utf-8'), value) for key, value in items]
+    mask = (1 << max(len(records) - 1, 0).bit_length()) - 1
+    records.sort(key=lambda record: zlib.crc32(record[0]) & mask)
+    buckets = array('Q', [0] * (mask + 2))
+    for key, _ in records:
+        buckets[(zlib.crc32(key) & mask) + 1] += 1
+    for bucket in range(1, len(buckets)):
+        buckets[bucket] += buckets[bucket - 1]
+    sections = {f"{name}.buckets": buckets.tobytes()}
+    sections.update(_pack_bytes(f"{name}.keys", [key for key, _ in records]))
+    if blobs:
+        sections.update(_pack_bytes(f"{name}.values", [value for _, value in records]))
+    else:
+        sections[f"{name}.values"] = pack_array(value for _, value in records)
+    return sections
+
+
+def _pack_bytes(name, values):
+    bounds = array('Q', [0])
+    for value in values:
+        bounds.append(bounds[-1] + len(value))
+    return {f"{name}.bounds": bounds.tobytes(), f"{name}.data": b"".join(values)}
+
+
+class PackedStrings:
+    """Read-only sequence of strings (or None) over sections of an index.
+
+    `data` holds the strings' bytes from offset `base` on.
+    """
+
+    def __init__(self, bounds, nulls, data, base=0):
+        self._bounds = bounds
+        self._nulls = nulls
+        self._data = data
+        self._base = base
+
+    def __len__(self):
+        return len(self._nulls)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if self._nulls[i]:
+            return None
+        return self._data[self._base + self._bounds[i]:self._base + self._bounds[i + 1]].decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class PackedMap:
+    """Read-only mapping from strings to ints or bytes over sections of an
+    index (see pack_map); a lookup reads only the key's bucket.
+
+    `data` holds the keys' bytes from offset `keys_base` on, and those of
+    bytes values from `values_base` on.
+    """
+
+    def __init__(self, buckets, key_bounds, data, keys_base, values, value_bounds=None, values_base=0):
+        self._buckets = buckets
+        self._mask = len(buckets) - 2
+        self._key_bounds = key_bounds
+        self._data = data
+        self._keys_base = keys_base
+        self._values = values
+        self._value_bounds = value_bounds
+        self._values_base = values_base
+
+    def _value(self, i):
+        if self._value_bounds is None:
+            return self._values[i]
+        return self._data[self._values_base + self._value_bounds[i]:self._values_base + self._value_bounds[i + 1]]
+
+    def get(self, key, default=None):
+        probe = key.encode('utf-8')
+        bucket = zlib.crc32(probe) & self._mask
+        i, end = self._buckets[bucket], self._buckets[bucket + 1]
+        key_bounds, data, base = self._key_bounds, self._data, self._keys_base
+        while i < end:
+            if data[base + key_bounds[i]:base + key_bounds[i + 1]] == probe:
+                return self._value(i)
+            i += 1
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._key_bounds) - 1
+
+    def keys(self):
+        key_bounds, data, base = self._key_bounds, self._data, self._keys_base
+        for i in range(len(self)):
+            yield data[base + key_bounds[i]:base + key_bounds[i + 1]].decode('utf-8')
+
+    __iter__ = keys
+
+    def items(self):
+        for i, key in enumerate(self.keys()):
+            yield key, self._value(i)
+
+
+class CompiledIndex:
+    """Read-only handle on a compiled index, mapped whole.
+
+    Sections are served from the map, shared by every process that opens
+    the index; with in_memory (LEXICON_INDEX_IN_MEMORY) they are copied into
+    plain dicts, lists and arrays owned by this process instead (see the top
+    of this module).
+    """
+
+    def __init__(self, path, in_memory=None):
+        self.path = path
+        self.in_memory = IN_MEMORY if in_memory is None else in_memory
+        with open(path, 'rb') as file:
+            self.meta, self._sections, self._start = read_header(file)
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def offset(self, name):
+        # Where the section starts in the map
+        return self._start + self._sections[name][0]
+
+    def section(self, name, format='B'):
+        offset = self.offset(name)
+        return memoryview(self._map)[offset:offset + self._sections[name][1]].cast(format)
+
+    def array(self, name):
+        values = self.section(name, 'Q')
+        return array('Q', values) if self.in_memory else values
+
+    def strings(self, name):
+        strings = PackedStrings(self.section(f"{name}.bounds", 'Q'), self.section(f"{name}.nulls"),
+                                self._map, self.offset(f"{name}.data"))
+        return list(strings) if self.in_memory else strings
+
+    def map(self, name):
+        buckets = self.section(f"{name}.buckets", 'Q')
+        key_bounds = self.section(f"{name}.keys.bounds", 'Q')
+        keys_base = self.offset(f"{name}.keys.data")
+        if f"{name}.values.bounds" in self._sections:
+            packed = PackedMap(buckets, key_bounds, self._map, keys_base, None,
+                               self.section(f"{name}.values.bounds", 'Q'), self.offset(f"{name}.values.data"))
+        else:
+            packed = PackedMap(buckets, key_bounds, self._map, keys_base, self.section(f"{name}.values", 'Q'))
+        return dict(packed.items()) if self.in_memory else packed
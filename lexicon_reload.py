@@ -0,0 +1,367 @@
+import os
+import threading
+from array import array
+
+import metrics
+import dhatu_search
+import shabda_vibhakti
+from dhatu_search import DhatuLexicon, index_forms as index_dhatu_forms, parse_lakara_tables
+from lexicon_index import pack_cells
+from lexicon_stream import iter_blocks
+from shabda_vibhakti import SHABDA_MARKER, ShabdaEntry, ShabdaLexicon, index_forms as index_shabda_forms, table_rows
+
+# Hot reload of the lexicon files while the analyzer keeps serving.
+#
+#     watcher = LexiconWatcher([shabda_source(...), dhatu_source(...)])
+#     watcher.start()
+#
+# A watcher thread polls each file's size, mtime and inode. Once a change has
+# held still for one poll (so a file being written is not read half-way), the
+# file is split into blocks and each block is compared with the live lexicon
+# by its hash. Only blocks that differ are parsed. Only the forms of those
+# entries are recomputed, and they go into a small overlay over the live
+# form index rather than a copy of it. The new lexicon is complete before it
+# is published with one assignment, so a lookup already running finishes on
+# the lexicon it started with and a new one sees the new lexicon whole.
+#
+# Entries are numbered by position. A block inserted or removed mid-file
+# therefore counts every later block as changed, and when more than
+# FULL_RELOAD_FRACTION of the entries have changed the file is simply loaded
+# afresh (still off the request path).
+#
+# The dhātu lexicon reads its blocks from the file it was indexed from, as
+# they are needed. Replacing the file (write a new one and rename it over the
+# old) leaves the live lexicon reading the old one until the new lexicon is
+# published. A file rewritten in place instead cannot be diffed against: the
+# live lexicon refuses to read its blocks (OSError) rather than return text
+# it was not indexed from, so lookups landing on a block it had not read yet
+# fail until the full reload that such a file gets is published.
+
+FULL_RELOAD_FRACTION = 0.5
+
+
+class Overlay:
+    """Read-only view of a mapping with some keys replaced; a value of None
+    removes the key. Overlays of overlays are flattened to one level."""
+
+    def __init__(self, base, changes):
+        if isinstance(base, Overlay):
+            changes = {**base.changes, **changes}
+            base = base.base
+        self.base = base
+        self.changes = changes
+        self._len = len(base)
+        for key, value in changes.items():
+            in_base = base.get(key) is not None
+            self._len += (value is not None) - in_base
+
+    def get(self, key, default=None):
+        if key in self.changes:
+            value = self.changes[key]
+            return default if value is None else value
+        return self.base.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._len
+
+    def keys(self):
+        for key in self.base.keys():
+            if key not in self.changes:
+                yield key
+        for key, value in self.changes.items():
+            if value is not None:
+                yield key
+
+    __iter__ = keys
+
+    def items(self):
+        for key in self.keys():
+            yield key, self.get(key)
+
+
+class OverlayList:
+    """Read-only view of a sequence with some positions replaced, cut or
+    extended to `length`."""
+
+    def __init__(self, base, changes, length):
+        if isinstance(base, OverlayList):
+            changes = {**base.changes, **changes}
+            base = base.base
+        self.base = base
+        self.changes = {i: value for i, value in changes.items() if i < length}
+        self.length = length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        value = self.changes.get(i)
+        return self.base[i] if value is None else value
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+
+def changed_positions(old_keys, new_keys):
+    # Entry positions whose block differs, including those only one side has
+    common = min(len(old_keys), len(new_keys))
+    changed = [i for i in range(common) if old_keys[i] != new_keys[i]]
+    return changed + list(range(common, max(len(old_keys), len(new_keys))))
+
+
+def entry_cells(index_forms, e_idx, *args):
+    # form -> the entry's cells for it, in order, as index_forms sees them
+    form_index = {}
+    readings = {}
+    index_forms(form_index, readings, e_idx, *args)
+    return {form: readings.get(form) or [cell] for form, cell in form_index.items()}
+
+
+def merge_forms(lexicon, changed, old_forms, new_cells, entry_of):
+    # Form index and readings changes for the forms of the changed entries:
+    # each keeps its cells from unchanged entries and gains those of the new
+    # ones, in entry order, exactly as a full build would list them.
+    changed = set(changed)
+    forms = set(old_forms)
+    for cells in new_cells.values():
+        forms.update(cells)
+    index_changes = {}
+    readings_changes = {}
+    for form in forms:
+        cells = [cell for cell in lexicon.cells(form) if entry_of(cell) not in changed]
+        for e_idx in sorted(new_cells):
+            cells.extend(new_cells[e_idx].get(form, ()))
+        cells.sort(key=entry_of)
+        index_changes[form] = cells[0] if cells else None
+        if len(cells) > 1 or lexicon.readings.get(form) is not None:
+            readings_changes[form] = pack_cells(cells) if len(cells) > 1 else None
+    return index_changes, readings_changes
+
+
+class ReloadAborted(Exception):
+    """The file changed again while it was being read; retry on the next poll."""
+
+
+# ------------------- śabda -------------------
+
+def shabda_keys(lexicon):
+    return array('q', (hash(entry.full_block) for entry in lexicon.shabdas))
+
+
+def update_shabda(lexicon, keys, file_path):
+    # (new lexicon, its block keys, number of changed entries)
+    new_keys = array('q', (hash(text.strip()) for _, _, text in iter_blocks(file_path, SHABDA_MARKER)))
+    changed = changed_positions(keys, new_keys)
+    if not changed:
+        return lexicon, keys, 0
+    if len(changed) > FULL_RELOAD_FRACTION * max(len(keys), 1):
+        fresh = ShabdaLexicon.from_file(file_path)
+        return fresh, shabda_keys(fresh), len(changed)
+
+    wanted = set(changed)
+    entries = {}
+    for e_idx, (_, _, text) in enumerate(iter_blocks(file_path, SHABDA_MARKER)):
+        if e_idx in wanted:
+            if e_idx >= len(new_keys) or hash(text.strip()) != new_keys[e_idx]:
+                raise ReloadAborted(file_path)
+            entries[e_idx] = ShabdaEntry.parse(text)
+    if len(entries) != len([i for i in changed if i < len(new_keys)]):
+        raise ReloadAborted(file_path)
+
+    old_forms = set()
+    for e_idx in changed:
+        if e_idx < len(keys):
+            old_forms.update(entry_cells(index_shabda_forms, e_idx, table_rows(lexicon.shabdas[e_idx].table),
+                                         lexicon.vibhaktis))
+    # The label table only ever grows, so the live lexicon can share it.
+    new_cells = {e_idx: entry_cells(index_shabda_forms, e_idx, table_rows(entry.table), lexicon.vibhaktis)
+                 for e_idx, entry in entries.items()}
+    index_changes, readings_changes = merge_forms(lexicon, changed, old_forms, new_cells,
+                                                   lambda cell: shabda_vibhakti.unpack_cell(cell)[0])
+    updated = ShabdaLexicon(
+        OverlayList(lexicon.shabdas, entries, len(new_keys)),
+        form_index=Overlay(lexicon.form_index, index_changes),
+        vibhaktis=lexicon.vibhaktis,
+        readings=Overlay(lexicon.readings, readings_changes),
+    )
+    return updated, new_keys, len(changed)
+
+
+# ------------------- dhātu -------------------
+
+def dhatu_keys(lexicon):
+    # None if the lexicon's file was rewritten in place since it was loaded
+    try:
+        return array('q', (hash(lexicon.block(e_idx)) for e_idx in range(len(lexicon))))
+    except OSError:
+        return None
+
+
+def reload_dhatu(file_path, changed):
+    fresh = DhatuLexicon.from_file(file_path)
+    return fresh, dhatu_keys(fresh), changed
+
+
+def update_dhatu(lexicon, keys, file_path):
+    # The new lexicon opens the file as it is now; its blocks are diffed
+    # against the keys of the live one.
+    updated = DhatuLexicon(file_path, form_index={}, readings={})
+    new_keys = dhatu_keys(updated)
+    if new_keys is None:
+        raise ReloadAborted(file_path)
+    if keys is None:
+        return reload_dhatu(file_path, len(new_keys))
+    changed = changed_positions(keys, new_keys)
+    if not changed:
+        return lexicon, keys, 0
+    in_place = (updated.stat.st_dev, updated.stat.st_ino) == (lexicon.stat.st_dev, lexicon.stat.st_ino)
+    if in_place or len(changed) > FULL_RELOAD_FRACTION * max(len(keys), 1):
+        # Rewritten in place: the live lexicon cannot read its old blocks.
+        return reload_dhatu(file_path, len(changed))
+
+    old_forms = set()
+    try:
+        for e_idx in changed:
+            if e_idx < len(keys):
+                old_forms.update(entry_cells(index_dhatu_forms, e_idx, parse_lakara_tables(lexicon.block(e_idx))))
+    except OSError:
+        # The live lexicon's own file was rewritten in place after all
+        return reload_dhatu(file_path, len(changed))
+    new_cells = {e_idx: entry_cells(index_dhatu_forms, e_idx, parse_lakara_tables(updated.block(e_idx)))
+                 for e_idx in changed if e_idx < len(new_keys)}
+    index_changes, readings_changes = merge_forms(lexicon, changed, old_forms, new_cells,
+                                                   lambda cell: dhatu_search.unpack_cell(cell)[0])
+    updated.form_index = Overlay(lexicon.form_index, index_changes)
+    updated.readings = Overlay(lexicon.readings, readings_changes)
+    kept = set(changed)
+    updated._parsed.update((e_idx, parsed) for e_idx, parsed in list(lexicon._parsed.items())
+                           if e_idx not in kept and e_idx < len(new_keys))
+    return updated, new_keys, len(changed)
+
+
+# ------------------- watcher -------------------
+
+class WatchedLexicon:
+    """One lexicon file: how to read the live lexicon, how to publish a new
+    one, and how to diff and update it."""
+
+    def __init__(self, kind, file_path, current, publish, keys, update):
+        self.kind = kind
+        self.file_path = file_path
+        self.current = current
+        self.publish = publish
+        self.keys_of = keys
+        self.update = update
+        self.lexicon = None
+        self.keys = None
+        self.signature = None
+        self.pending = None
+
+    def stat(self):
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def loaded_signature(self, lexicon, default):
+        # The signature of the file as `lexicon` read it, where it kept the
+        # stat of the file it reads (the dhātu lexicon); else `default`.
+        st = getattr(lexicon, "stat", None)
+        return default if st is None else (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def baseline(self):
+        # Block keys of the live lexicon, recomputed if it was replaced by
+        # something other than this watcher (e.g. reload_lexicon()). The
+        # dhātu keys are read from the file the lexicon reads.
+        current = self.current()
+        if current is not self.lexicon:
+            self.signature = self.loaded_signature(current, self.stat())
+            self.lexicon = current
+            self.keys = self.keys_of(current)
+
+    def poll(self):
+        # True if a new lexicon was published.
+        if self.lexicon is None:
+            self.baseline()
+            return False
+        signature = self.stat()
+        if signature is None or signature == self.signature:
+            self.pending = None
+            return False
+        if signature != self.pending:
+            self.pending = signature
+            return False
+        self.baseline()
+        try:
+            with metrics.stage(f"{self.kind}_reload"):
+                lexicon, keys, changed = self.update(self.lexicon, self.keys, self.file_path)
+        except ReloadAborted:
+            self.pending = None
+            return False
+        self.signature = signature if lexicon is self.lexicon else self.loaded_signature(lexicon, signature)
+        self.pending = None
+        if lexicon is self.lexicon:
+            return False
+        self.publish(lexicon)
+        self.lexicon, self.keys = lexicon, keys
+        metrics.increment(f"{self.kind}_reloads")
+        print(f"♻️ Reloaded {os.path.basename(self.file_path)}: {changed} entr{'y' if changed == 1 else 'ies'} changed.")
+        return True
+
+
+def shabda_source(file_path, current, publish):
+    return WatchedLexicon("shabda", file_path, current, publish, shabda_keys, update_shabda)
+
+
+def dhatu_source(file_path, current, publish):
+    return WatchedLexicon("dhatu", file_path, current, publish, dhatu_keys, update_dhatu)
+
+
+class LexiconWatcher:
+    def __init__(self, sources, interval=2.0):
+        self.sources = sources
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        # One poll of every file; also what the thread runs each interval.
+        published = False
+        for source in self.sources:
+            try:
+                published = source.poll() or published
+            except Exception as e:
+                print(f"⚠️ Reload of {source.file_path} failed: {e}")
+        return published
+
+    def run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="lexicon-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
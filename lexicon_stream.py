@@ -0,0 +1,132 @@
+import os
+
+# Streaming reader for the lexicon text files. Both formats are a run of
+# blocks, each introduced by a marker ("Heading:" for dhātus, "Sanskrit
+# Header:" for śabdas). iter_blocks reads the file in fixed-size chunks and
+# yields one block at a time, so only the current block and one chunk are ever
+# held in memory.
+#
+#     for start, end, text in iter_blocks(path, "Heading:"):
+#         ...
+#
+# start/end are byte offsets into the file: start is just past the marker,
+# end is where the next marker (or the file) begins, i.e. the same spans
+# content.split(marker)[1:] would produce. Text before the first marker is
+# skipped, as split()[0] was. Newlines are translated the way open(path, 'r')
+# does, so the text matches what the whole-file loaders used to see.
+#
+# A byte range from split_ranges can be read on its own with start/end; the
+# ranges together yield exactly the blocks of the whole file, which is how
+# the indexes are built in parallel (see parallel_index.py).
+
+CHUNK_SIZE = 1 << 20
+
+
+def _decode(chunks):
+    text = b"".join(chunks).decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def iter_blocks(file_path, marker, chunk_size=CHUNK_SIZE, start=0, end=None):
+    # Blocks of the whole file, or of the bytes [start, end)
+    marker = marker.encode('utf-8')
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start if end is not None else None
+        carry = b""
+        offset = start  # file offset of data[0]
+        start = None
+        pieces = []
+        while True:
+            if remaining is None:
+                chunk = file.read(chunk_size)
+            else:
+                chunk = file.read(min(chunk_size, remaining))
+                remaining -= len(chunk)
+            data = carry + chunk
+            pos = 0
+            hit = data.find(marker)
+            while hit >= 0:
+                if start is not None:
+                    pieces.append(data[pos:hit])
+                    yield start, offset + hit, _decode(pieces)
+                pieces = []
+                pos = hit + len(marker)
+                start = offset + pos
+                hit = data.find(marker, pos)
+            if not chunk:
+                if start is not None:
+                    pieces.append(data[pos:])
+                    yield start, offset + len(data), _decode(pieces)
+                return
+            # The tail may hold the start of a marker that the next chunk
+            # completes, so it is carried over rather than consumed.
+            keep = max(pos, len(data) - len(marker) + 1)
+            if start is not None:
+                pieces.append(data[pos:keep])
+            carry = data[keep:]
+            offset += keep
+
+
+def marker_offsets(file, marker, chunk_size=CHUNK_SIZE):
+    # Offset just past each `marker` in an open binary file, read from the
+    # start in chunks: the block starts iter_blocks would yield.
+    marker = marker.encode('utf-8')
+    file.seek(0)
+    carry = b""
+    offset = 0  # file offset of data[0]
+    while True:
+        chunk = file.read(chunk_size)
+        data = carry + chunk
+        pos = 0
+        hit = data.find(marker)
+        while hit >= 0:
+            pos = hit + len(marker)
+            yield offset + pos
+            hit = data.find(marker, pos)
+        if not chunk:
+            return
+        keep = max(pos, len(data) - len(marker) + 1)
+        carry = data[keep:]
+        offset += keep
+
+
+def split_ranges(file_path, marker, parts):
+    # Up to `parts` byte ranges (start, end) covering the file, each but the
+    # first beginning at a marker, so that no block is cut in two.
+    marker = marker.encode('utf-8')
+    size = os.path.getsize(file_path)
+    bounds = [0]
+    with open(file_path, 'rb') as file:
+        for k in range(1, parts):
+            pos = max(size * k // parts, bounds[-1] + 1)
+            file.seek(pos)
+            data = b""
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                data += chunk
+                hit = data.find(marker)
+                if hit >= 0 or not chunk:
+                    break
+                # keep a partial marker that the next read may complete
+                keep = max(0, len(data) - len(marker) + 1)
+                pos += keep
+                data = data[keep:]
+            if hit < 0:
+                break
+            bounds.append(pos + hit)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def count_blocks(file_path, marker, ranges):
+    # Number of blocks starting in each of `ranges` (as from split_ranges)
+    marker = marker.encode('utf-8')
+    counts = []
+    with open(file_path, 'rb') as file:
+        for start, end in ranges:
+            file.seek(start)
+            counts.append(file.read(end - start).count(marker))
+    return counts
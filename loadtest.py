@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+# Load test for server.py. Start the server, then e.g.:
+#
+#     python loadtest.py --requests 5000 --concurrency 50
+#     python loadtest.py --endpoint sentence --words "रामः वनम् गच्छति"
+#
+# Reports p50/p99 latency and requests per second.
+
+DEFAULT_WORDS = ["रामः", "वनम्", "गच्छति", "रामाय", "वनात्", "भवति", "रामस्य", "वने"]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(base_url, endpoint, words, total, concurrency, seed):
+    client = AsyncHTTPClient(max_clients=concurrency)
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    def next_request():
+        if endpoint == "word":
+            return f"{base_url}/analyze/word?word={quote(rng.choice(words))}", {}
+        sentence = " ".join(rng.sample(words, k=min(len(words), rng.randint(2, 6))))
+        return f"{base_url}/analyze/sentence", {
+            "method": "POST", "body": json.dumps({"sentence": sentence}, ensure_ascii=False)
+        }
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            url, options = next_request()
+            started = time.perf_counter()
+            try:
+                await client.fetch(url, **options)
+            except (HTTPClientError, OSError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    client.close()
+    return sorted(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the analysis server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--endpoint", choices=["word", "sentence"], default="word")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--words", help="space-separated Devanagari words to draw requests from")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    words = args.words.split() if args.words else DEFAULT_WORDS
+    latencies, errors, elapsed = asyncio.run(
+        run(args.url.rstrip("/"), args.endpoint, words, args.requests, args.concurrency, args.seed)
+    )
+
+    print(f"📊 {len(latencies)} ok, {errors} failed in {elapsed:.2f}s "
+          f"(concurrency {args.concurrency}, /analyze/{args.endpoint})")
+    print(f"   requests/s: {len(latencies) / elapsed:.1f}")
+    print(f"   p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"   p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
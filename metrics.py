@@ -0,0 +1,202 @@
+import contextvars
+import json
+import os
+import threading
+import time
+
+# Per-stage timing for the analysis pipeline and the lexicon loaders.
+#
+# Metrics are off unless ANALYZER_METRICS=1 is set or enable() is called; while
+# off, stage() hands back a shared no-op context manager, so instrumented code
+# pays for one flag test and one context-variable read. trace() turns on timing
+# for the current context only, to get the breakdown of a single request.
+
+PREFIX = "sanskrit_analyzer"
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_enabled = os.environ.get("ANALYZER_METRICS", "") not in ("", "0")
+_trace = contextvars.ContextVar("analysis_trace", default=None)
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauge_sources = []
+
+
+class Histogram:
+    __slots__ = ("bucket_counts", "total", "count")
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def stage(name):
+    if not _enabled and _trace.get() is None:
+        return NULL_STAGE
+    return _Stage(name)
+
+
+def observe(name, seconds):
+    if _enabled:
+        with _lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.observe(seconds)
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def increment(name, amount=1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((name, None))
+
+
+def register_gauges(source):
+    # `source` is called at export time and returns {name: number}.
+    _gauge_sources.append(source)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class trace:
+    """Collects every stage and counter event in the current context.
+
+        with metrics.trace() as t:
+            analyze_sentence(words)
+        print(t.breakdown())
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _trace.set(self.spans)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._started
+        _trace.reset(self._token)
+        return False
+
+    def breakdown(self):
+        stages = {}
+        events = {}
+        for name, seconds in self.spans:
+            if seconds is None:
+                events[name] = events.get(name, 0) + 1
+                continue
+            entry = stages.setdefault(name, {"calls": 0, "total_ms": 0.0})
+            entry["calls"] += 1
+            entry["total_ms"] += seconds * 1000
+        return {"total_ms": self.elapsed * 1000, "stages": stages, "events": events}
+
+
+def _gauges():
+    gauges = {}
+    for source in _gauge_sources:
+        gauges.update(source())
+    return gauges
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {
+            name: {
+                "count": h.count,
+                "sum_seconds": h.total,
+                "buckets": dict(zip([str(b) for b in BUCKETS], h.bucket_counts)),
+            }
+            for name, h in _histograms.items()
+        }
+    return {"enabled": _enabled, "counters": counters, "stages": histograms, "gauges": _gauges()}
+
+
+def snapshot_json():
+    return json.dumps(snapshot(), ensure_ascii=False, indent=2)
+
+
+def prometheus_text():
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total {value}"]
+    for name, value in sorted(data["gauges"].items()):
+        lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value}"]
+
+    metric = f"{PREFIX}_stage_seconds"
+    if data["stages"]:
+        lines.append(f"# TYPE {metric} histogram")
+    for name, h in sorted(data["stages"].items()):
+        cumulative = 0
+        for bound, count in h["buckets"].items():
+            cumulative += count
+            lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {h["count"]}')
+        lines.append(f'{metric}_sum{{stage="{name}"}} {h["sum_seconds"]}')
+        lines.append(f'{metric}_count{{stage="{name}"}} {h["count"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,234 @@
+import threading
+from array import array
+from itertools import accumulate
+
+import metrics
+from dhatu_search import DhatuLexicon, extract_metadata, get_dhatus, parse_lakara_tables
+from lexicon_index import LabelTable
+from shabda_vibhakti import VACHANAS, extract_header_details, get_lexicon, table_rows
+from transliterate import SCHEMES, normalize, to_devanagari
+
+# Forward generation, from a stem to its forms: the reverse of analysis.
+#
+#     generate("गम्", "लट्", "प्रथम पुरुष", "एकवचन")   # ("गच्छति",)
+#     generate("गम्", "लट्")            # {"प्रथम पुरुष": {"एकवचन": ("गच्छति",), ...}, ...}
+#     generate("राम", vibhakti="तृतीया")  # {"एकवचन": ("रामेण",), "द्विवचन": ..., ...}
+#     generate("राम")                    # the whole vibhakti × vacana table
+#
+# Labels may also be given as numbers (vachana=0) or romanized ("laT"), as
+# may the stem. A romanized label is read in the detected scheme, else in
+# whichever scheme spells a label of its axis ("laN" is लण् in HK, लङ् in
+# SLP1); scheme="slp1" etc. fixes the scheme of the stem and labels alike.
+# A cell is a tuple of its forms, usually one; a table is a dict per free
+# coordinate, label -> sub-table, without the empty cells. A stem several
+# entries share (homonyms, a root in more than one gaṇa) generates from the
+# first; generate_all returns each entry's.
+#
+# Every table of a lexicon is laid out once in flat arrays. Each entry owns a
+# fixed block of slots, one per (lakāra, puruṣa, vacana) for dhātus and per
+# (vibhakti, vacana) for śabdas, so a slot's number follows from its
+# coordinates. slot_starts[s]:slot_starts[s + 1] are slot s's forms, and
+# form k is text[form_bounds[k]:form_bounds[k + 1]]. A form is one dict
+# lookup for the stem and a few array reads away, and the tables cost a few
+# bytes per form beyond the text itself. They are built from the loaded
+# lexicon on first use, and again once it has been reloaded.
+
+PURUSHAS = ("प्रथम पुरुष", "मध्यम पुरुष", "उत्तम पुरुष")
+KINDS = ("dhatu", "shabda")
+
+
+class Paradigms:
+    """The tables of one lexicon in flat arrays; see the module comment."""
+
+    def __init__(self, kind, axes, stems, cells):
+        # axes: (name, labels) per coordinate of a cell within an entry;
+        # stems: the stem of each entry; cells: (entry, code per axis,
+        # forms) for every non-empty cell, in any order.
+        self.kind = kind
+        self.axes = [(name, tuple(labels)) for name, labels in axes]
+        self.codes = [{label: code for code, label in enumerate(labels)} for _, labels in self.axes]
+        self.stems = stems
+        self.by_stem = {}
+        for e_idx, stem in enumerate(stems):
+            self.by_stem.setdefault(stem, []).append(e_idx)
+        self.by_stem = {stem: tuple(entries) for stem, entries in self.by_stem.items()}
+
+        slots = sorted((self.slot(e_idx, codes), forms) for e_idx, codes, forms in cells)
+        counts = array('I', bytes(4 * (len(stems) * self.entry_size() + 1)))
+        for slot, forms in slots:
+            counts[slot + 1] = len(forms)
+        self.slot_starts = array('I', accumulate(counts))
+        flat = [form for _, forms in slots for form in forms]
+        self.form_bounds = array('I', accumulate(map(len, flat), initial=0))
+        self.text = "".join(flat)
+
+    def __len__(self):
+        return len(self.stems)
+
+    def entry_size(self):
+        size = 1
+        for _, labels in self.axes:
+            size *= len(labels)
+        return size
+
+    def slot(self, e_idx, codes):
+        slot = e_idx
+        for (_, labels), code in zip(self.axes, codes):
+            slot = slot * len(labels) + code
+        return slot
+
+    def forms(self, slot):
+        bounds = self.form_bounds
+        return tuple(self.text[bounds[k]:bounds[k + 1]]
+                     for k in range(self.slot_starts[slot], self.slot_starts[slot + 1]))
+
+    def entries(self, stem):
+        return self.by_stem.get(stem, ())
+
+    def code(self, axis, label, scheme=None):
+        # The code of `label` on one axis: a label, romanized or not, or
+        # its number.
+        name, labels = self.axes[axis]
+        if isinstance(label, int):
+            if 0 <= label < len(labels):
+                return label
+        else:
+            for label_scheme in (scheme,) if scheme else (None, *SCHEMES):
+                code = self.codes[axis].get(to_devanagari(label, label_scheme).strip())
+                if code is not None:
+                    return code
+        raise ValueError(f"Unknown {name} {label!r}; expected one of {', '.join(labels)}")
+
+    def table(self, e_idx, fixed=None):
+        # Entry e_idx's forms with the axes in `fixed` (axis -> code) held:
+        # a tuple of forms if every axis is, else nested dicts.
+        return self._subtable(e_idx, 0, fixed or {})
+
+    def _subtable(self, slot, axis, fixed):
+        if axis == len(self.axes):
+            return self.forms(slot)
+        labels = self.axes[axis][1]
+        if axis in fixed:
+            return self._subtable(slot * len(labels) + fixed[axis], axis + 1, fixed)
+        table = {}
+        for code, label in enumerate(labels):
+            sub = self._subtable(slot * len(labels) + code, axis + 1, fixed)
+            if sub:
+                table[label] = sub
+        return table
+
+    def iter_forms(self):
+        # (entry, label per axis, form) for every form, entry by entry in
+        # table order
+        sizes = [len(labels) for _, labels in self.axes]
+        bounds = self.form_bounds
+        starts = self.slot_starts
+        for slot in range(len(starts) - 1):
+            if starts[slot] == starts[slot + 1]:
+                continue
+            rest = slot
+            labels = []
+            for (_, axis_labels), size in zip(reversed(self.axes), reversed(sizes)):
+                rest, code = divmod(rest, size)
+                labels.append(axis_labels[code])
+            labels.reverse()
+            for k in range(starts[slot], starts[slot + 1]):
+                yield rest, labels, self.text[bounds[k]:bounds[k + 1]]
+
+
+def dhatu_paradigms(dhatus):
+    # Paradigms of a DhatuLexicon, from the entries it parses for lookups
+    # (or of the list of dicts load_dhatus returns)
+    lakaras = LabelTable()
+    stems = []
+    cells = []
+    if isinstance(dhatus, DhatuLexicon):
+        entries = (dhatus.entry(e_idx, memoize=False) for e_idx in range(len(dhatus)))
+    else:
+        entries = ({"metadata": extract_metadata(dhatu["heading"]), "tables": parse_lakara_tables(dhatu["block"])}
+                   for dhatu in dhatus)
+    for e_idx, entry in enumerate(entries):
+        stems.append(normalize(entry["metadata"]["dhatu"]))
+        seen = set()
+        for lakaara, rows in entry["tables"]:
+            l_code = lakaras.code(normalize(lakaara.strip()))
+            if l_code in seen:
+                continue
+            seen.add(l_code)
+            for r_idx, row in enumerate(rows[:len(PURUSHAS)]):
+                for c_idx, form in enumerate(row[:len(VACHANAS)]):
+                    cells.append((e_idx, (l_code, r_idx, c_idx), (normalize(form),)))
+    axes = (("lakara", lakaras.labels), ("purusha", PURUSHAS), ("vachana", VACHANAS))
+    return Paradigms("dhatu", axes, stems, cells)
+
+
+def shabda_paradigms(lexicon):
+    # Paradigms of a ShabdaLexicon; a vibhakti listed twice keeps its first row
+    vibhaktis = LabelTable()
+    stems = []
+    cells = []
+    for e_idx, entry in enumerate(lexicon.shabdas):
+        stems.append(normalize(extract_header_details(entry.header)["naamapada"]))
+        seen = set()
+        for vibhakti, _, columns in table_rows(entry.table):
+            v_code = vibhaktis.code(normalize(vibhakti))
+            if v_code in seen:
+                continue
+            seen.add(v_code)
+            for c_idx, forms in enumerate(columns):
+                if forms:
+                    cells.append((e_idx, (v_code, c_idx), tuple(normalize(form) for form in forms)))
+    return Paradigms("shabda", (("vibhakti", vibhaktis.labels), ("vachana", VACHANAS)), stems, cells)
+
+
+_paradigms = {}  # kind -> (the lexicon they were built from, Paradigms)
+_paradigms_lock = threading.Lock()
+
+
+def get_paradigms(kind):
+    lexicon = get_dhatus() if kind == "dhatu" else get_lexicon()
+    built = _paradigms.get(kind)
+    if built is None or built[0] is not lexicon:
+        with _paradigms_lock:
+            built = _paradigms.get(kind)
+            if built is None or built[0] is not lexicon:
+                with metrics.stage(f"{kind}_paradigm_build"):
+                    build = dhatu_paradigms if kind == "dhatu" else shabda_paradigms
+                    built = _paradigms[kind] = (lexicon, build(lexicon))
+    return built[1]
+
+
+def _resolve(stem, lakara, purusha, vachana, vibhakti, kind, scheme):
+    # (Paradigms, entries of the stem, fixed axis -> code)
+    stem = to_devanagari(stem, scheme).strip()
+    if kind is None:
+        if lakara is not None or purusha is not None:
+            kind = "dhatu"
+        elif vibhakti is not None:
+            kind = "shabda"
+        else:
+            kind = "dhatu" if get_paradigms("dhatu").entries(stem) else "shabda"
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {', '.join(KINDS)}")
+    if kind == "dhatu" and vibhakti is not None or kind == "shabda" and (lakara, purusha) != (None, None):
+        raise ValueError("vibhakti applies to śabdas, lakara and purusha to dhātus")
+    paradigms = get_paradigms(kind)
+    coordinates = (lakara, purusha, vachana) if kind == "dhatu" else (vibhakti, vachana)
+    fixed = {axis: paradigms.code(axis, label, scheme)
+             for axis, label in enumerate(coordinates) if label is not None}
+    return paradigms, paradigms.entries(stem), fixed
+
+
+def generate(stem, lakara=None, purusha=None, vachana=None, vibhakti=None, kind=None, scheme=None):
+    # The forms of `stem` at the given coordinates, from its first entry:
+    # a tuple of forms if all are given, else a table of the rest. None if
+    # no entry has that stem. kind ("dhatu" or "shabda") is only needed
+    # when a stem is both and no coordinate tells them apart.
+    paradigms, entries, fixed = _resolve(stem, lakara, purusha, vachana, vibhakti, kind, scheme)
+    return paradigms.table(entries[0], fixed) if entries else None
+
+
+def generate_all(stem, lakara=None, purusha=None, vachana=None, vibhakti=None, kind=None, scheme=None):
+    # As generate, for every entry of the stem, in lexicon order
+    paradigms, entries, fixed = _resolve(stem, lakara, purusha, vachana, vibhakti, kind, scheme)
+    return [paradigms.table(e_idx, fixed) for e_idx in entries]
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lexicon_stream import count_blocks, split_ranges
+
+# Parallel build of the lexicon form indexes.
+#
+#     ShabdaLexicon.from_file(path, workers=4)
+#     DhatuLexicon.from_file(path, workers=4)
+#
+# The file is cut into byte ranges on block boundaries (split_ranges), a few
+# per worker so that an uneven range does not hold up the rest. The blocks
+# in each range are counted first, so every range knows the number of its
+# first entry, and each range is then parsed and indexed in a process pool
+# exactly as the sequential loaders do it. The partial indexes are merged in
+# file order: forms new to the lexicon are added with dict.update, and only
+# forms that an earlier range also lists have their cells concatenated one
+# by one. Where a range numbered its labels differently (śabda vibhaktis),
+# its cells are first mapped to the lexicon's codes. The result is the same
+# as a sequential build's, whatever the number of workers.
+#
+# The number of workers defaults to LEXICON_BUILD_WORKERS (1, i.e. build in
+# this process). Files too small to be worth splitting are always built in
+# this process.
+
+BUILD_WORKERS = int(os.environ.get("LEXICON_BUILD_WORKERS", "1"))
+RANGES_PER_WORKER = 4
+MIN_RANGE_BYTES = 1 << 20
+
+
+def map_ranges(index_range, file_path, marker, workers=None):
+    # index_range(file_path, start, end, first entry number) for each range
+    # of the file, in file order; index_range must be a module-level function.
+    workers = BUILD_WORKERS if workers is None else workers
+    parts = min(workers * RANGES_PER_WORKER, os.path.getsize(file_path) // MIN_RANGE_BYTES)
+    if workers <= 1 or parts <= 1:
+        yield index_range(file_path, 0, None, 0)
+        return
+    ranges = split_ranges(file_path, marker, parts)
+    firsts = [0]
+    for count in count_blocks(file_path, marker, ranges)[:-1]:
+        firsts.append(firsts[-1] + count)
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(min(workers, len(ranges))) as pool:
+        # Ranges are merged as they come back, while later ones are parsed.
+        yield from pool.map(index_range, [file_path] * len(ranges), starts, ends, firsts)
+
+
+def merge_form_indexes(parts):
+    # One (form index, readings) from the (form index, readings, remap) of
+    # each range, in file order. remap maps a cell of the range to its cell
+    # in the whole lexicon, or is None where the two are the same. The
+    # readings are left as lists.
+    form_index = readings = None
+    for part_index, part_readings, remap in parts:
+        if remap is not None:
+            part_index = {form: remap(cell) for form, cell in part_index.items()}
+            part_readings = {form: [remap(cell) for cell in cells] for form, cells in part_readings.items()}
+        if form_index is None:
+            form_index, readings = part_index, part_readings
+            continue
+        # Forms an earlier range also lists keep its first cell, and gain
+        # this range's cells after the earlier ones.
+        common = form_index.keys() & part_index.keys()
+        firsts = {form: form_index[form] for form in common}
+        merged = {form: (readings.get(form) or [firsts[form]]) + list(part_readings.get(form) or (part_index[form],))
+                  for form in common}
+        form_index.update(part_index)
+        form_index.update(firsts)
+        readings.update(part_readings)
+        readings.update(merged)
+    if form_index is None:
+        return {}, {}
+    return form_index, readings
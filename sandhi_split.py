@@ -0,0 +1,187 @@
+from bisect import bisect_left
+
+from dhatu_search import UPASARGAS, strip_upasarga
+
+# Sandhi and compound segmentation over the known forms of both lexicons.
+#
+#     segmenter = Segmenter(shabda_forms, dhatu_forms)
+#     segmenter.segment("रामोऽपि")        # ["रामः", "अपि"]
+#     segmenter.segment("वनंगच्छति")      # ["वनम्", "गच्छति"]
+#
+# A token is split into known forms, allowing at each junction either a plain
+# break or one of the sandhi reversals in SANDHI_RULES: a surface spelling at
+# the junction is undone into the end of the left word and the start of the
+# right one (e.g. "ोऽ" -> "ः" + "अ"). The search is a memoized DP over
+# (position, carried start of the next word), preferring the fewest words and
+# then the fewest reversals, and each position only walks prefixes that some
+# known form starts with, so a long token costs roughly its length times the
+# longest form.
+
+VIRAMA = "्"
+CONSONANTS = [chr(c) for c in range(ord("क"), ord("ह") + 1)]
+# Dependent vowel sign -> the independent vowel it stands for; "" is the
+# inherent अ.
+MATRA_VOWELS = {
+    "": "अ", "ा": "आ", "ि": "इ", "ी": "ई", "ु": "उ", "ू": "ऊ",
+    "ृ": "ऋ", "े": "ए", "ै": "ऐ", "ो": "ओ", "ौ": "औ",
+}
+# Signs that can only follow a consonant or vowel, so no word starts with them
+COMBINING = set(MATRA_VOWELS) - {""} | {VIRAMA, "़"}
+FINAL_SIGNS = {"ं", "ः", "ँ"}
+
+# Common indeclinables (avyayas), which neither lexicon lists
+AVYAYAS = (
+    "च", "वा", "अपि", "एव", "इति", "न", "तु", "हि", "इव", "किल", "खलु", "ननु",
+    "तथा", "यथा", "तदा", "यदा", "कदा", "सदा", "सर्वदा", "अत्र", "तत्र", "यत्र", "कुत्र",
+    "सर्वत्र", "इह", "अद्य", "श्वः", "ह्यः", "पुनः", "अथ", "सह", "विना", "इतः", "ततः",
+    "यतः", "कुतः", "अधुना", "इदानीम्", "शनैः", "उच्चैः", "नीचैः", "बहिः", "अन्तः",
+)
+
+
+def _vowel_rules():
+    rules = [
+        # visarga
+        ("ोऽ", "ः", "अ"),   # रामोऽपि = रामः + अपि
+        ("ो", "ः", ""),     # रामो गच्छति = रामः + गच्छति
+        ("र्", "ः", ""),    # हरिर्गच्छति = हरिः + गच्छति
+        ("श्", "ः", ""),    # रामश्च = रामः + च
+        ("स्", "ः", ""),    # रामस्तत्र = रामः + तत्र
+        ("ष्", "ः", ""),    # हरिष्टीकते = हरिः + टीकते
+        # final म्
+        ("ं", "म्", ""),    # वनं गच्छति = वनम् + गच्छति
+        # pūrvarūpa
+        ("ेऽ", "े", "अ"),   # वनेऽपि = वने + अपि
+        # guṇa
+        ("र्", "", "ऋ"), ("र्", "ा", "ऋ"),   # महर्षिः = महा + ऋषिः
+    ]
+    for left in ("", "ा"):
+        for surface, rights in (("ा", "अआ"), ("े", "इई"), ("ो", "उऊ"), ("ै", "एऐ"), ("ौ", "ओऔ")):
+            rules += [(surface, left, right) for right in rights]   # देवालयः, गणेशः, सूर्योदयः
+    for surface, lefts, rights in (("ी", "िी", "इई"), ("ू", "ुू", "उऊ")):
+        rules += [(surface, left, right) for left in lefts for right in rights]
+    for matra, vowel in MATRA_VOWELS.items():
+        # yaṇ: इत्यादि = इति + आदि, स्वागतम् = सु + आगतम्
+        if vowel not in "इई":
+            rules += [("्य" + matra, left, vowel) for left in "िी"]
+        if vowel not in "उऊ":
+            rules += [("्व" + matra, left, vowel) for left in "ुू"]
+        # ayādi: नयनम् = ने + अनम्, पवनः = पो + अनः
+        rules += [("य" + matra, "े", vowel), ("व" + matra, "ो", vowel),
+                  ("ाय" + matra, "ै", vowel), ("ाव" + matra, "ौ", vowel)]
+    return rules
+
+
+def _consonant_rules():
+    rules = []
+    for consonant in CONSONANTS:
+        for matra, vowel in MATRA_VOWELS.items():
+            # A final consonant takes the next word's initial vowel:
+            # वनमत्र = वनम् + अत्र
+            rules.append((consonant + matra, consonant + VIRAMA, vowel))
+    for voiceless, voiced in (("क", "ग"), ("च", "ज"), ("ट", "ड"), ("त", "द"), ("प", "ब")):
+        # jaśtva: सद्गुणः = सत् + गुणः, जगदीशः = जगत् + ईशः
+        rules.append((voiced + VIRAMA, voiceless + VIRAMA, ""))
+        rules += [(voiced + matra, voiceless + VIRAMA, vowel) for matra, vowel in MATRA_VOWELS.items()]
+    return rules
+
+
+# (surface at the junction, end of the left word, start of the right word)
+SANDHI_RULES = tuple(_vowel_rules() + _consonant_rules())
+MAX_TOKEN_LENGTH = 200
+
+
+class FormTrie:
+    """Prefix index over a set of forms, kept as one sorted list.
+
+    Sorted strings sharing a prefix are contiguous, so "does any form start
+    with p" and "is p a form" are each one bisect; it answers what a
+    character trie would without a node per character.
+    """
+
+    def __init__(self, forms):
+        self.forms = sorted(set(forms))
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __contains__(self, form):
+        pos = bisect_left(self.forms, form)
+        return pos < len(self.forms) and self.forms[pos] == form
+
+    def has_prefix(self, prefix):
+        pos = bisect_left(self.forms, prefix)
+        return pos < len(self.forms) and self.forms[pos].startswith(prefix)
+
+
+class Segmenter:
+    def __init__(self, shabda_forms, dhatu_forms, avyayas=AVYAYAS):
+        self.verbs = FormTrie(dhatu_forms)
+        self.trie = FormTrie([*shabda_forms, *self.verbs.forms, *avyayas])
+        self.rules_by_initial = {}
+        for rule in SANDHI_RULES:
+            self.rules_by_initial.setdefault(rule[0][0], []).append(rule)
+
+    def is_known(self, form):
+        if form in self.trie:
+            return True
+        stripped, upasarga = strip_upasarga(form)
+        return upasarga is not None and stripped in self.verbs
+
+    def has_prefix(self, prefix):
+        # Verbs may carry an upasarga that the form index does not list.
+        if self.trie.has_prefix(prefix):
+            return True
+        for upasarga in UPASARGAS:
+            if upasarga.startswith(prefix):
+                return True
+            if prefix.startswith(upasarga) and self.verbs.has_prefix(prefix[len(upasarga):]):
+                return True
+        return False
+
+    def segment(self, token):
+        # The known forms `token` splits into, or None when it is itself a
+        # known form or cannot be split.
+        if not token or len(token) > MAX_TOKEN_LENGTH or self.is_known(token):
+            return None
+        best = self._best(token, 0, "", {})
+        return list(best[1]) if best else None
+
+    def _best(self, token, pos, carry, memo):
+        # Best split of carry + token[pos:], as (cost, words); cost is
+        # (number of words, number of reversals).
+        key = (pos, carry)
+        if key in memo:
+            return memo[key]
+        memo[key] = None
+        text = carry + token[pos:]
+        best = None
+        for end in range(1, len(text) + 1):
+            prefix = text[:end]
+            if not self.has_prefix(prefix):
+                break
+            rules = self.rules_by_initial.get(text[end], ()) if end < len(text) else ()
+            for surface, left_end, right_start in (("", "", ""), *rules):
+                if not text.startswith(surface, end):
+                    continue
+                rest = end + len(surface)
+                if rest < len(carry):
+                    continue
+                following = text[rest:rest + 1]
+                if following in COMBINING or (not right_start and following in FINAL_SIGNS):
+                    continue
+                word = prefix + left_end
+                if not self.is_known(word):
+                    continue
+                reversals = 1 if surface else 0
+                if rest == len(text) and not right_start:
+                    candidate = ((1, reversals), (word,))
+                else:
+                    tail = self._best(token, pos + rest - len(carry), right_start, memo)
+                    if tail is None:
+                        continue
+                    (words, tail_reversals), tail_words = tail
+                    candidate = ((words + 1, reversals + tail_reversals), (word, *tail_words))
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+        memo[key] = best
+        return best
@@ -1,95 +1,266 @@
+import os
 import re
-from shabda_vibhakti import get_vibhakti_details, get_raw_entry_for_word
-from dhatu_search import load_dhatus, search_form
-from karaka_lookup import find_apadana_sutra, get_karaka_sutra, get_vibhakti_karaka  # ✅ New import
-
-# Load dhatus at start
-DHATU_FILE_PATH = "dhatu_all_combined.txt"
-try:
-    print("🔄 Loading dhātus...")
-    dhatu_data = load_dhatus(DHATU_FILE_PATH)
-    print(f"✅ Loaded {len(dhatu_data)} dhātu entries.\n")
-except Exception as e:
-    print(f"❌ Error loading dhātus: {e}")
-    dhatu_data = []
+import threading
+import dhatu_search
+import metrics
+import shabda_vibhakti
+from analysis_cache import LRUCache
+from shabda_vibhakti import ShabdaEntry, lookup_shabda_all
+from dhatu_search import (DhatuLexicon, get_dhatus, publish_dhatus, search_form, search_form_all,
+                          strip_upasarga)
+from sandhi_split import AVYAYAS, Segmenter
+from fuzzy_lookup import FuzzyIndex, match_rank
+from lexicon_reload import LexiconWatcher, dhatu_source, shabda_source
+from transliterate import to_devanagari
+from karaka_lookup import (get_karaka_sutra, get_sutra_index,
+                           get_vibhakti_karaka, get_vibhakti_sutra)
+
+def lexicon_generations():
+    # Changes whenever either lexicon is reloaded; used to key caches.
+    return shabda_vibhakti.lexicon_generation(), dhatu_search.dhatu_generation()
+
+# Analyses of recurring forms are memoized; the cache empties itself whenever
+# either lexicon is reloaded.
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "4096"))
+analysis_cache = LRUCache(
+    ANALYSIS_CACHE_SIZE,
+    generation=lambda: analysis_generation(),
+)
+
+# Seconds between checks of the lexicon files for edits (0 disables); see
+# start_watcher().
+LEXICON_WATCH_INTERVAL = float(os.environ.get("LEXICON_WATCH_INTERVAL", "2"))
+_watcher = None
+_watcher_lock = threading.Lock()
+
+def _forget_watcher():
+    # A forked child has no watcher thread, only the parent's object (and
+    # perhaps its lock, held); let the child start its own.
+    global _watcher, _watcher_lock
+    _watcher = None
+    _watcher_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_watcher)
+
+def start_watcher(interval=None):
+    # Starts (once per process) the thread that picks up edits to the lexicon
+    # files and publishes updated lexicons; see lexicon_reload.
+    global _watcher
+    interval = LEXICON_WATCH_INTERVAL if interval is None else interval
+    with _watcher_lock:
+        if _watcher is None and interval > 0:
+            _watcher = LexiconWatcher([
+                shabda_source(shabda_vibhakti.SHABDA_FILE_PATH, shabda_vibhakti.get_lexicon,
+                              shabda_vibhakti.publish_lexicon),
+                dhatu_source(dhatu_search.DHATU_FILE_PATH, get_dhatus, publish_dhatus),
+            ], interval).start()
+    return _watcher
+
+# Largest edit distance the fuzzy fallback will bridge; every extra step
+# multiplies the size of the index.
+FUZZY_MAX_DISTANCE = int(os.environ.get("FUZZY_MAX_DISTANCE", "1"))
 
 def extract_basic_artha(raw_entry):
-    info_section = re.search(r"<<INFO>>(.*?)</INFO>", raw_entry, re.DOTALL)
-    if not info_section:
-        return None
-    content = info_section.group(1)
-    match = re.search(r"अर्थः[^\s:：\-–—]*[：:–—\-]?\s*([^\s]+)", content)
-    return match.group(1) if match else None
+    # The lexicon parses meanings when it is built, and lookups return them;
+    # these two remain for callers holding only the raw block.
+    return ShabdaEntry.parse(raw_entry).artha
 
 def extract_meanings(raw_entry):
-    info = re.search(r"<<INFO>>(.*?)</INFO>", raw_entry, re.DOTALL)
-    if not info:
-        return {}
+    return ShabdaEntry.parse(raw_entry).meanings
 
-    info_text = info.group(1)
-    meanings = {}
+class Derived:
+    """A structure built from both lexicons (the sandhi segmenter, the fuzzy
+    index). The first build runs on the caller's thread. After a reload the
+    previous build keeps answering while its replacement is built in the
+    background, so no request waits for it."""
 
-    if "Bharati Kosha" in info_text:
-        bk_match = re.search(r"Sanskrit Detail:(.*?)(?=Sanskrit Detail:)", info_text, re.DOTALL)
-        if bk_match:
-            meanings["Sanskrit"] = bk_match.group(1).strip()
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+        self.current = None  # (lexicon_generations() it was built from, value)
+        self._build_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
 
-    if "(San → Hin)" in info_text:
-        pattern = r"Sanskrit Detail:(.*?)(?=Sanskrit Detail:|$)"
-        matches = list(re.finditer(pattern, info_text, re.DOTALL))
-        if matches:
-            if "Sanskrit" in meanings and len(matches) > 1:
-                meanings["Hindi"] = matches[1].group(1).strip()
-            elif "Sanskrit" not in meanings:
-                meanings["Hindi"] = matches[0].group(1).strip()
+    def stale(self, generations=None):
+        current = self.current
+        if generations is None:
+            generations = lexicon_generations()
+        return current is not None and current[0] != generations
+
+    def fresh(self):
+        # Built for the current lexicons, on this thread if need be
+        with self._build_lock:
+            generation = lexicon_generations()
+            current = self.current
+            if current is None or current[0] != generation:
+                with metrics.stage(f"{self.name}_build"):
+                    current = self.current = (generation, self.build())
+            return current[1]
+
+    def get(self):
+        current = self.current
+        if current is None:
+            return self.fresh()
+        if current[0] != lexicon_generations():
+            self._refresh()
+        return current[1]
+
+    def _refresh(self):
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._run_refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def _run_refresh(self):
+        try:
+            self.fresh()
+        except Exception as e:
+            print(f"⚠️ Rebuilding {self.name} failed: {e}")
+        finally:
+            self._refreshing = False
+
+# Sandhi segmentation works over the forms of both lexicons.
+def _build_segmenter():
+    dhatus = get_dhatus()
+    return Segmenter(
+        shabda_vibhakti.get_lexicon().form_index.keys(),
+        dhatus.form_index.keys() if isinstance(dhatus, DhatuLexicon) else (),
+    )
+
+_segmenter = Derived("segmenter", _build_segmenter)
+
+def get_segmenter():
+    return _segmenter.get()
 
-    if "(San → Eng)" in info_text:
-        eng_match = re.search(r"Sanskrit Detail:.*?Sanskrit Detail:(.*?)(?=$)", info_text, re.DOTALL)
-        if not eng_match:
-            eng_match = re.search(r"Sanskrit Detail:(.*?)(?=$)", info_text, re.DOTALL)
-        if eng_match:
-            meanings["English"] = eng_match.group(1).strip()
+# The fuzzy index is built from the segmenter's form list on the first miss.
+_fuzzy_index = Derived("fuzzy_index", lambda: FuzzyIndex(_segmenter.fresh().trie.forms, FUZZY_MAX_DISTANCE))
 
-    return meanings
+def get_fuzzy_index():
+    return _fuzzy_index.get()
+
+def analysis_generation():
+    # Analyses are also redone once a stale segmenter or fuzzy index has
+    # been rebuilt after a reload.
+    generations = lexicon_generations()
+    return generations, _segmenter.stale(generations), _fuzzy_index.stale(generations)
+
+def fuzzy_lookup(word, max_distance=None, limit=5):
+    # The nearest lexicon forms to `word`, as (form, edit distance) pairs.
+    # Verb forms are indexed without upasargas, so a prefixed word is also
+    # matched with its upasarga set aside.
+    word = normalize_form(word)
+    index = get_fuzzy_index()
+    matches = index.lookup(word, max_distance, limit)
+    stripped, upasarga = strip_upasarga(word)
+    if upasarga:
+        verb_forms = get_segmenter().verbs
+        matches += [(upasarga + form, distance) for form, distance in index.lookup(stripped, max_distance, limit)
+                    if form in verb_forms]
+        matches.sort(key=lambda match: match_rank(word, *match))
+    return matches[:limit]
+
+def resolve_verbs(words, analyses=None):
+    # Look every distinct word of the sentence up in the dhātu index once; the
+    # result (in sentence order) is shared by all kāraka/sūtra decisions.
+    # Words joined by sandhi contribute the verbs among their segments.
+    # `analyses` holds analyze_form() results the caller already has, by word.
+    verbs = {}
+    analyses = analyses or {}
+    with metrics.stage("verb_resolution"):
+        for word in words:
+            if word in verbs:
+                continue
+            try:
+                form = normalize_form(word)
+                verbs[word] = search_form(get_dhatus(), form)
+                if verbs[word] is None:
+                    analysis = analyses.get(word) or analysis_cache.get_or_compute(form, analyze_form)
+                    if analysis.get("fuzzy_match"):
+                        verbs[word] = search_form(get_dhatus(), analysis["fuzzy_match"])
+                    for segment in analysis.get("split", ()):
+                        if segment not in verbs:
+                            verbs[segment] = search_form(get_dhatus(), segment)
+            except Exception as e:
+                print(f"⚠️ Error resolving verb '{word}': {e}")
+                verbs[word] = None
+    return verbs
+
+def sentence_verb_info(verbs):
+    # search_form() result of the sentence's first verb
+    for dhatu_info in verbs.values():
+        if dhatu_info:
+            return dhatu_info
+    return None
+
+def sentence_verb(verbs):
+    # (root, upasarga) of the sentence's first verb
+    dhatu_info = sentence_verb_info(verbs)
+    return (dhatu_info["metadata"]["dhatu"], dhatu_info["upasarga"]) if dhatu_info else None
+
+def sentence_verb_root(verbs):
+    verb = sentence_verb(verbs)
+    return verb[0] if verb else None
+
+def normalize_form(word):
+    # The lexicon's spelling of `word`: normalized, and in Devanagari if it
+    # was typed in IAST, Harvard-Kyoto or SLP1.
+    return shabda_vibhakti.lexicon_form(word)
+
+def noun_candidate(shabda_info):
+    karaka, karaka_meaning = get_vibhakti_karaka(shabda_info["vibhakti"])
+    return {
+        "type": "नामपद (Noun)",
+        "naamapada": shabda_info["naamapada"],
+        "linga": shabda_info["linga"],
+        "vibhakti": shabda_info["vibhakti"],
+        "vachana": shabda_info["vachana"],
+        "karaka": f"{karaka} - {karaka_meaning}",
+        "vibhakti_sutra": get_vibhakti_sutra(shabda_info["vibhakti"])
+    }
+
+def verb_candidate(dhatu_info):
+    meta = dhatu_info["metadata"]
+    return {
+        "type": "धातु (Verb)",
+        "dhatu": meta["dhatu"],
+        "arthah": meta["arthah"],
+        "lakaara": dhatu_info["lakaara"],
+        "purusha": dhatu_info["purusha"],
+        "vachana": dhatu_info["vachana"],
+        "ganah": meta["ganah"],
+        "upasarga": dhatu_info["upasarga"]
+    }
 
-def analyze_word(word):
+def analyze_form(word):
+    # The context-free part of a word's analysis; everything here depends only
+    # on the form, so it is what analysis_cache stores. The top-level fields
+    # describe the preferred reading (a noun reading wins over a verb one);
+    # "candidates" lists every reading the lexicons have for the form, nouns
+    # first, for callers that need to choose between them.
+    metrics.increment("forms_analyzed")
     try:
-        shabda_info = get_vibhakti_details(word)
-        if shabda_info:
-            raw_entry = get_raw_entry_for_word(word)
-
-            artha = extract_basic_artha(raw_entry) if raw_entry else None
-            meanings = extract_meanings(raw_entry) if raw_entry else {}
-
-            vibhakti = shabda_info["vibhakti"]
-            karaka, karaka_meaning = get_vibhakti_karaka(vibhakti)
-
-            # Detect sutra only if it's apādāna
-            apadana_sutra = None
-            if karaka == "अपादान":
-                # Find verb root in sentence (if any)
-                for w in sentence_words:
-                    dhatu_info = search_form(dhatu_data, w)
-                    if dhatu_info:
-                        root = dhatu_info["metadata"]["dhatu"]
-                        apadana_sutra = find_apadana_sutra(root)
-                        break
+        noun_readings = lookup_shabda_all(word)
+        with metrics.stage("dhatu_lookup"):
+            verb_readings = search_form_all(get_dhatus(), word)
+        candidates = ([noun_candidate(info) for info in noun_readings] +
+                      [verb_candidate(info) for info in verb_readings])
 
+        if noun_readings:
+            shabda_info = noun_readings[0]
             return {
                 "word": word,
-                "type": "नामपद (Noun)",
-                "naamapada": shabda_info["naamapada"],
-                "linga": shabda_info["linga"],
-                "vibhakti": vibhakti,
-                "vachana": shabda_info["vachana"],
-                "karaka": f"{karaka} - {karaka_meaning}",
-                "artha": artha,
-                "meanings": meanings,
-                "apadana_sutra": apadana_sutra
+                **candidates[0],
+                "artha": shabda_info["artha"],
+                "meanings": shabda_info["meanings"],
+                "apadana_sutra": None,
+                "karaka_sutra": None,
+                "candidates": candidates
             }
 
-        dhatu_info = search_form(dhatu_data, word)
-        if dhatu_info:
+        if verb_readings:
+            dhatu_info = verb_readings[0]
             meta = dhatu_info["metadata"]
             return {
                 "word": word,
@@ -100,24 +271,192 @@ def analyze_word(word):
                 "purusha": dhatu_info["purusha"],
                 "vachana": dhatu_info["vachana"],
                 "ganah": meta["ganah"],
-                "karaka_sutra": get_karaka_sutra(meta["dhatu"])
+                "karaka_sutra": get_karaka_sutra(meta["dhatu"], dhatu_info["upasarga"]),
+                "candidates": candidates
+            }
+
+        if word in AVYAYAS:
+            return {
+                "word": word,
+                "type": "अव्यय (Indeclinable)"
+            }
+
+        # Not a form in either lexicon: try undoing sandhi / splitting a
+        # compound into known forms.
+        with metrics.stage("segmentation"):
+            split = get_segmenter().segment(word)
+        if split:
+            return {
+                "word": word,
+                "type": "सन्धि (Sandhi)",
+                "split": split
             }
 
+        # Last resort: the nearest known form, for typos such as a missing
+        # visarga or a wrong vowel length.
+        with metrics.stage("fuzzy_lookup"):
+            matches = fuzzy_lookup(word)
+        if matches:
+            form, distance = matches[0]
+            analysis = analysis_cache.get_or_compute(form, analyze_form)
+            if analysis["type"] != "❓ Unknown":
+                metrics.increment("fuzzy_matches")
+                return {
+                    **analysis,
+                    "word": word,
+                    "fuzzy_match": form,
+                    "edit_distance": distance,
+                    "suggestions": [match for match, _ in matches]
+                }
+
     except Exception as e:
+        metrics.increment("analysis_errors")
         print(f"⚠️ Error analyzing '{word}': {e}")
 
+    metrics.increment("unknown_forms")
     return {
         "word": word,
         "type": "❓ Unknown"
     }
 
-def clean_and_split(sentence):
-    return re.findall(r'[ऀ-ॿ]+', sentence)
+def contextualize(analysis, word, verbs):
+    # Completes a cached analyze_form() result for one occurrence of `word`;
+    # `verbs` is its sentence's resolve_verbs() map, or empty for a lone word.
+    result = dict(analysis)
+    result["word"] = word
+
+    # Sandhi-joined words are analyzed segment by segment, in the same context
+    if result["type"] == "सन्धि (Sandhi)":
+        verbs = verbs or resolve_verbs([word], {word: analysis})
+        result["segments"] = [
+            contextualize(analysis_cache.get_or_compute(segment, analyze_form), segment, verbs)
+            for segment in result["split"]
+        ]
+        return result
+
+    # Readings of an ambiguous noun are chosen between by the sentence's verb
+    # (see choose_reading). Then the sūtras that depend on the verb: the one
+    # making the noun's kāraka (e.g. apādāna with a verb of departure), and a
+    # vibhakti rule the verb triggers. Skipped for vibhaktis no verb can affect.
+    if result["type"] == "नामपद (Noun)":
+        index = get_sutra_index()
+        readings = stem_readings(result)
+        if len(readings) > 1 or index.depends_on_verb(result["vibhakti"]):
+            verb = sentence_verb_info(verbs or resolve_verbs([word], {word: analysis}))
+            if verb:
+                root, upasarga = verb["metadata"]["dhatu"], verb["upasarga"]
+                with metrics.stage("sutra_matching"):
+                    if len(readings) > 1:
+                        result.update(choose_reading(readings, verb, index))
+                    if index.depends_on_verb(result["vibhakti"]):
+                        result.update(index.verb_sutras(result["vibhakti"], root, upasarga))
+    return result
+
+def stem_readings(analysis):
+    # The noun candidates that are other cases/numbers of the preferred
+    # reading's stem (e.g. रामाभ्याम्: तृतीया, चतुर्थी, पञ्चमी द्विवचन); the
+    # artha and meanings of the analysis hold for all of them.
+    return [candidate for candidate in analysis.get("candidates", ())
+            if candidate["type"] == analysis["type"] and candidate["naamapada"] == analysis["naamapada"]
+            and candidate["linga"] == analysis["linga"]]
+
+def choose_reading(readings, verb, index):
+    # The reading the verb selects: the first whose kāraka the verb gives a
+    # sūtra (पञ्चमी with a verb of departure), else the first whose vibhakti
+    # a rule of the verb assigns (द्वितीया with a verb of motion), else a
+    # प्रथमा agreeing with the verb in number (its kartṛ), else the
+    # preferred reading.
+    root, upasarga = verb["metadata"]["dhatu"], verb["upasarga"]
+    for reading in readings:
+        if (index.vibhakti_karakas(reading["vibhakti"]) and
+                index.verb_sutras(reading["vibhakti"], root, upasarga)["karaka_sutra"]):
+            return reading
+    for reading in readings:
+        if index.match(root, upasarga, vibhakti=reading["vibhakti"], kind="vibhakti"):
+            return reading
+    for reading in readings:
+        if reading["vibhakti"] == "प्रथमा" and reading["vachana"] == verb["vachana"]:
+            return reading
+    return readings[0]
+
+def analyze_word(word, verbs=None):
+    # `verbs` is the sentence's resolve_verbs() map; without it the word is
+    # treated as a one-word sentence.
+    metrics.increment("words_analyzed")
+    return contextualize(analysis_cache.get_or_compute(normalize_form(word), analyze_form), word, verbs)
+
+def cache_stats():
+    return analysis_cache.stats()
+
+metrics.register_gauges(lambda: {
+    f"analysis_cache_{key}": value for key, value in cache_stats().items()
+})
+
+def trace_sentence(words):
+    # Analyzes one sentence with per-stage timing for just this call.
+    with metrics.trace() as trace:
+        results = analyze_sentence(words)
+    return results, trace.breakdown()
+
+def iter_analyze_sentence(words):
+    # Yields each word's analysis as soon as it is ready, for progressive display.
+    verbs = resolve_verbs(words)
+    for word in words:
+        yield analyze_word(word, verbs)
+
+def analyze_sentence(words):
+    return list(iter_analyze_sentence(words))
+
+def analyze_document(sentences):
+    # `sentences` is a list of word lists. Every distinct form in the document
+    # is looked up once, however often it recurs.
+    distinct = list(dict.fromkeys(word for words in sentences for word in words))
+    analyses = {word: analysis_cache.get_or_compute(normalize_form(word), analyze_form) for word in distinct}
+    doc_verbs = resolve_verbs(distinct, analyses)
+
+    results = []
+    for words in sentences:
+        verbs = {}
+        for word in words:
+            verbs[word] = doc_verbs[word]
+            for segment in analyses[word].get("split", ()):
+                verbs.setdefault(segment, doc_verbs.get(segment))
+        results.append([contextualize(analyses[word], word, verbs) for word in words])
+    return results
+
+def split_sentences(text):
+    return [words for words in (clean_and_split(s) for s in iter_sentences(text.splitlines())) if words]
+
+def clean_and_split(sentence, scheme=None):
+    # Devanagari words of `sentence`, after converting it from `scheme` (or
+    # the detected romanization) when it is not already Devanagari.
+    return re.findall(r'[ऀ-ॿ]+', to_devanagari(sentence, scheme))
+
+# "|" and "||" stand for daṇḍas in romanized text.
+DANDA_RE = re.compile(r'[।॥|]+')
+
+def iter_sentences(lines):
+    # Sentences end at a daṇḍa (। or ॥) or a blank line and may span lines;
+    # only the current unfinished sentence is ever held in memory.
+    pending = ""
+    for line in lines:
+        if not line.strip():
+            if pending.strip():
+                yield pending.strip()
+            pending = ""
+            continue
+        parts = DANDA_RE.split(pending + " " + line.strip())
+        for part in parts[:-1]:
+            if part.strip():
+                yield part.strip()
+        pending = parts[-1]
+    if pending.strip():
+        yield pending.strip()
 
 def main():
-    global sentence_words  # To allow access inside analyze_word
+    get_dhatus()
     print("🧠 Sanskrit Sentence Analyzer + Meanings")
-    print("🔠 Enter a sentence (in Devanagari). Type 'exit' to quit.\n")
+    print("🔠 Enter a sentence (Devanagari, IAST, Harvard-Kyoto or SLP1). Type 'exit' to quit.\n")
 
     while True:
         sentence = input("🔍 Enter sentence (or 'exit'): ").strip()
@@ -128,13 +467,13 @@ def main():
         sentence_words = clean_and_split(sentence)
         print(f"\n🔎 Analyzing {len(sentence_words)} word(s):\n")
 
-        results = []
+        results = analyze_sentence(sentence_words)
 
-        for word in sentence_words:
-            result = analyze_word(word)
-            results.append(result)
+        for result in results:
             print(f"🔹 Word: {result['word']}")
             print(f"   Type: {result['type']}")
+            if result.get("fuzzy_match"):
+                print(f"   ✏️ Closest form: {result['fuzzy_match']} (edit distance {result['edit_distance']})")
 
             if result["type"] == "नामपद (Noun)":
                 print(f"   नामपद: {result['naamapada']}")
@@ -144,8 +483,10 @@ def main():
                 print(f"   कारकः: {result['karaka']}")
                 if result.get("artha"):
                     print(f"   अर्थः: {result['artha']}")
-                if result.get("apadana_sutra"):
-                    print(f"   📜 सूत्रम्: {result['apadana_sutra']}")
+                if result.get("karaka_sutra") or result.get("apadana_sutra"):
+                    print(f"   📜 सूत्रम्: {result.get('karaka_sutra') or result['apadana_sutra']}")
+                if result.get("vibhakti_sutra"):
+                    print(f"   📜 विभक्तिसूत्रम्: {result['vibhakti_sutra']}")
 
             elif result["type"] == "धातु (Verb)":
                 print(f"   धातुः: {result['dhatu']}")
@@ -156,6 +497,12 @@ def main():
                 print(f"   गणः: {result['ganah']}")
                 if result.get("karaka_sutra"):
                     print(f"   📜 Kāaraka Sūtra: {result['karaka_sutra']}")
+            elif result["type"] == "सन्धि (Sandhi)":
+                print(f"   सन्धिविच्छेदः: {' + '.join(result['split'])}")
+                for segment in result["segments"]:
+                    print(f"   ↳ {segment['word']}: {segment['type']}")
+            elif result["type"] == "अव्यय (Indeclinable)":
+                pass
             else:
                 print("   🛑 No grammatical info found.")
             print("-" * 50)
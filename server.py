@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tornado import web
+from tornado.ioloop import IOLoop
+
+import metrics
+
+from batch_analyze import analyze_chunk, chunked, init_worker
+from sentence_analyzer_with_meaning import (
+    LEXICON_WATCH_INTERVAL, analysis_cache, analyze_form, cache_stats, clean_and_split, contextualize,
+    get_dhatus, iter_sentences, normalize_form, resolve_verbs, start_watcher, trace_sentence
+)
+from shabda_vibhakti import get_lexicon
+
+# Local HTTP/JSON analysis service for other programs in the stack:
+#
+#     python server.py --port 8765
+#
+#     GET  /analyze/word?word=रामः
+#     POST /analyze/word       {"word": "रामः"}
+#     POST /analyze/sentence   {"sentence": "रामः वनम् गच्छति"}  or {"words": [...]}
+#     POST /analyze/batch      {"sentences": ["...", "..."]}  or {"text": "..."}
+#     GET  /stats
+#     GET  /metrics            Prometheus text (set ANALYZER_METRICS=1 to record stages)
+#     GET  /metrics.json
+#     POST /trace              {"sentence": "..."}, per-stage breakdown for one sentence
+#
+# The lexicons stay resident for the life of the process. Lookups run on a
+# small thread pool so the event loop never blocks on a cache miss, and
+# concurrent requests for the same form share a single lookup. Batches go to a
+# process pool whose workers load their own lexicons. Edits to the lexicon
+# files are picked up without a restart (--watch-interval, see
+# lexicon_reload.py), by the server and by each batch worker. Requests with
+# more words than --max-words or more sentences than --max-sentences are
+# rejected with 413, and malformed ones (e.g. "words" that is not a list of
+# strings) with 400.
+
+BATCH_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class AnalysisService:
+    def __init__(self, lookup_workers=4, batch_workers=None, chunk_size=64, watch_interval=0,
+                 max_words=256, max_sentences=2000):
+        self.lookup_executor = ThreadPoolExecutor(lookup_workers, thread_name_prefix="lookup")
+        # The batch workers start lazily, on the first batch, when the lookup
+        # and watcher threads are already running; a forked worker could
+        # inherit a lock one of them holds. They are started from a clean
+        # process instead, and init_worker loads their lexicons.
+        self.batch_executor = ProcessPoolExecutor(batch_workers or os.cpu_count() or 1,
+                                                  mp_context=multiprocessing.get_context(BATCH_START_METHOD),
+                                                  initializer=init_worker, initargs=(watch_interval,))
+        self.chunk_size = chunk_size
+        self.max_words = max_words
+        self.max_sentences = max_sentences
+        self.coalesced = 0
+        self._inflight = {}
+
+    def run_lookup(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.lookup_executor, fn, *args)
+
+    async def analyze_form(self, word):
+        key = normalize_form(word)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self.run_lookup(analysis_cache.get_or_compute, key, analyze_form)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None)
+                                     if self._inflight.get(key) is done else None)
+        else:
+            self.coalesced += 1
+        # Shielded so one client disconnecting does not cancel the lookup
+        # other requests are waiting on.
+        return await asyncio.shield(future)
+
+    # contextualize may resolve verbs and analyze sandhi segments, so it runs
+    # on the lookup pool too, never on the event loop.
+    async def analyze_word(self, word):
+        analysis = await self.analyze_form(word)
+        return await self.run_lookup(contextualize, analysis, word, {})
+
+    async def analyze_sentence(self, words):
+        distinct = list(dict.fromkeys(words))
+        analyses = await asyncio.gather(*(self.analyze_form(word) for word in distinct))
+        return await self.run_lookup(contextualize_all, words, dict(zip(distinct, analyses)))
+
+    async def analyze_batch(self, sentences):
+        loop = asyncio.get_running_loop()
+        chunks = chunked(enumerate(sentences), self.chunk_size)
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self.batch_executor, analyze_chunk, chunk) for chunk in chunks
+        ))
+        return [record for part in parts for record in part]
+
+    def stats(self):
+        return {"cache": cache_stats(), "coalesced": self.coalesced, "inflight": len(self._inflight)}
+
+    def shutdown(self):
+        self.lookup_executor.shutdown(wait=False)
+        self.batch_executor.shutdown(wait=False)
+
+
+def contextualize_all(words, by_word):
+    # Verbs are resolved from the coalesced analyses, so a form that is not a
+    # verb is not analyzed a second time.
+    verbs = resolve_verbs(words, analyses=by_word)
+    return [contextualize(by_word[word], word, verbs) for word in words]
+
+
+class JSONHandler(web.RequestHandler):
+    @property
+    def service(self):
+        return self.application.settings["service"]
+
+    def json_body(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise web.HTTPError(400, reason="Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPError(400, reason="Request body must be a JSON object")
+        return body
+
+    def write_json(self, payload):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(payload, ensure_ascii=False))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason})
+
+    def string_list(self, body, key):
+        values = body[key]
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise web.HTTPError(400, reason=f"'{key}' must be a list of strings")
+        return values
+
+    def check_size(self, items, limit, what):
+        if len(items) > limit:
+            raise web.HTTPError(413, reason=f"Too many {what}: {len(items)} > {limit}")
+
+
+class WordHandler(JSONHandler):
+    async def get(self):
+        await self.analyze(self.get_query_argument("word", ""))
+
+    async def post(self):
+        await self.analyze(str(self.json_body().get("word", "")))
+
+    async def analyze(self, word):
+        word = word.strip()
+        if not word:
+            raise web.HTTPError(400, reason="Missing 'word'")
+        self.write_json(await self.service.analyze_word(word))
+
+
+class SentenceHandler(JSONHandler):
+    async def post(self):
+        body = self.json_body()
+        if "words" in body:
+            words = self.string_list(body, "words")
+        else:
+            words = clean_and_split(str(body.get("sentence", "")))
+        if not words:
+            raise web.HTTPError(400, reason="Missing 'sentence' or 'words'")
+        self.check_size(words, self.service.max_words, "words")
+        self.write_json({"words": await self.service.analyze_sentence(words)})
+
+
+class BatchHandler(JSONHandler):
+    async def post(self):
+        body = self.json_body()
+        if "sentences" in body:
+            sentences = self.string_list(body, "sentences")
+        else:
+            sentences = list(iter_sentences(str(body.get("text", "")).splitlines()))
+        if not sentences:
+            raise web.HTTPError(400, reason="Missing 'sentences' or 'text'")
+        self.check_size(sentences, self.service.max_sentences, "sentences")
+        self.write_json({"sentences": await self.service.analyze_batch(sentences)})
+
+
+class StatsHandler(JSONHandler):
+    def get(self):
+        self.write_json(self.service.stats())
+
+
+class MetricsHandler(JSONHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(metrics.prometheus_text())
+
+
+class MetricsJSONHandler(JSONHandler):
+    def get(self):
+        self.write_json(metrics.snapshot())
+
+
+class TraceHandler(JSONHandler):
+    async def post(self):
+        words = clean_and_split(str(self.json_body().get("sentence", "")))
+        if not words:
+            raise web.HTTPError(400, reason="Missing 'sentence'")
+        self.check_size(words, self.service.max_words, "words")
+        # trace_sentence opens its trace inside the pool thread, so only this
+        # request's stages are collected.
+        results, breakdown = await self.service.run_lookup(trace_sentence, words)
+        self.write_json({"words": results, "trace": breakdown})
+
+
+def make_app(service):
+    return web.Application([
+        (r"/analyze/word", WordHandler),
+        (r"/analyze/sentence", SentenceHandler),
+        (r"/analyze/batch", BatchHandler),
+        (r"/stats", StatsHandler),
+        (r"/metrics", MetricsHandler),
+        (r"/metrics.json", MetricsJSONHandler),
+        (r"/trace", TraceHandler),
+    ], service=service)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Sanskrit analysis over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--lookup-workers", type=int, default=4)
+    parser.add_argument("--batch-workers", type=int, default=0, help="default: one per CPU")
+    parser.add_argument("--watch-interval", type=float, default=LEXICON_WATCH_INTERVAL,
+                        help="seconds between checks of the lexicon files for edits; 0 disables")
+    parser.add_argument("--max-words", type=int, default=256, help="largest sentence accepted, in words")
+    parser.add_argument("--max-sentences", type=int, default=2000, help="largest batch accepted, in sentences")
+    args = parser.parse_args()
+
+    # Load the lexicons (and write their compiled indexes) before accepting
+    # requests, so neither the first request nor the batch workers pay for it.
+    get_lexicon()
+    get_dhatus()
+    start_watcher(args.watch_interval)
+
+    service = AnalysisService(args.lookup_workers, args.batch_workers or None,
+                              watch_interval=args.watch_interval, max_words=args.max_words,
+                              max_sentences=args.max_sentences)
+    app = make_app(service)
+    app.listen(args.port, address=args.host)
+    print(f"🌐 Serving on http://{args.host}:{args.port}")
+    try:
+        IOLoop.current().start()
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,227 @@
 import os
 import re
+import threading
+import metrics
+from lexicon_index import (COMPILE_ERRORS, LabelTable, ensure_compiled, freeze_readings, pack_array, pack_map,
+                           pack_strings, unpack_cells)
+from lexicon_stream import iter_blocks
+from parallel_index import map_ranges, merge_form_indexes
+from transliterate import normalize, to_devanagari
 
 # Dynamically resolve the data file path relative to this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SHABDA_FILE_PATH = os.path.join(BASE_DIR,"shabda_combined.txt")
 
+SHABDA_MARKER = "Sanskrit Header:"
+VACHANAS = ("एकवचन", "द्विवचन", "बहुवचन")
+TAB_SPLIT_RE = re.compile(r'\t+')
+FORM_SPLIT_RE = re.compile(r'[,\s]')
+TABLE_RE = re.compile(r'<<TABLE>>(.*?)</TABLE>', re.DOTALL)
+INFO_RE = re.compile(r'<<INFO>>(.*?)</INFO>', re.DOTALL)
+ARTHA_RE = re.compile(r'अर्थः[^\s:：\-–—]*[：:–—\-]?\s*([^\s]+)')
+DETAIL_RE = re.compile(r'Sanskrit Detail:\s*(?:\(([^)]*)\))?(.*?)(?=Sanskrit Detail:|\Z)', re.DOTALL)
 
-def load_shabdas(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
+# Source label of a "Sanskrit Detail:" line -> the language of its meaning
+MEANING_SOURCES = {"Bharati Kosha": "Sanskrit", "San → Hin": "Hindi", "San → Eng": "English"}
+MEANING_LANGUAGES = ("Sanskrit", "Hindi", "English")
+
+# Form index cells pack (entry index, vibhakti label code, vachana) into one
+# int: entry << 14 | vibhakti << 2 | vachana.
+VIBHAKTI_BITS = 12
+
+
+def table_rows(table_text):
+    # Pre-split table cells: one (vibhakti, column count, [eka, dvi, bahu
+    # forms]) tuple per row with at least four columns.
+    rows = []
+    for line in table_text.strip().split('\n'):
+        columns = TAB_SPLIT_RE.split(line.strip())
+        if len(columns) >= 4:
+            cells = [[form for form in FORM_SPLIT_RE.split(col.strip()) if form] for col in columns[1:4]]
+            rows.append((columns[0].strip(), len(columns), cells))
+    return rows
+
+
+def row_forms(rows):
+    # Only rows with exactly four columns count as listing their forms.
+    forms = set()
+    for _, width, cells in rows:
+        if width == 4:
+            for col in cells:
+                forms.update(col)
+    return forms
+
+
+def table_forms(table_text):
+    # row_forms(table_rows(table_text)), without building the rows
+    # (splitting on commas and whitespace as FORM_SPLIT_RE does).
+    forms = set()
+    for line in table_text.split('\n'):
+        columns = TAB_SPLIT_RE.split(line.strip())
+        if len(columns) == 4:
+            forms.update(" ".join(columns[1:]).replace(",", " ").split())
+    return forms
+
+
+def parse_meanings(info_text):
+    # (artha, (Sanskrit, Hindi, English)) from an <<INFO>> section. Each
+    # "Sanskrit Detail:" is filed under the language its source label names,
+    # so the order of the details in the file does not matter; the first
+    # detail per language wins and a missing one is None.
+    match = ARTHA_RE.search(info_text)
+    artha = match.group(1) if match else None
+    texts = dict.fromkeys(MEANING_LANGUAGES)
+    for source, text in DETAIL_RE.findall(info_text):
+        language = MEANING_SOURCES.get(source.strip())
+        if language and texts[language] is None:
+            texts[language] = text.strip()
+    return artha, tuple(texts.values())
+
+
+def _stripped_span(text, match):
+    start, end = match.span(1)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class ShabdaEntry:
+    """One śabda block, stored as a single string.
+
+    The header, table and info sections are slices of that string, located
+    by offsets, rather than separate copies. The meanings in the info section
+    are parsed once, when the entry is built; the set of table forms is built
+    the first time it is asked for and kept, so scanning a list of entries
+    splits each table only once. Item access (entry["table"]) is kept for
+    code written against the older dict entries.
+    """
+
+    __slots__ = ("full_block", "table_start", "table_end", "info_start", "info_end", "artha", "meaning_texts",
+                 "forms")
+
+    def __init__(self, full_block, table_start=0, table_end=0, info_start=0, info_end=0,
+                 artha=None, meaning_texts=(None, None, None)):
+        self.full_block = full_block
+        self.table_start = table_start
+        self.table_end = table_end
+        self.info_start = info_start
+        self.info_end = info_end
+        self.artha = artha
+        self.meaning_texts = meaning_texts
+
+    @classmethod
+    def parse(cls, block):
+        text = block.strip()
+        table_match = TABLE_RE.search(text)
+        info_match = INFO_RE.search(text)
+        table_span = _stripped_span(text, table_match) if table_match else (0, 0)
+        info_span = _stripped_span(text, info_match) if info_match else (0, 0)
+        return cls(text, *table_span, *info_span, *parse_meanings(text[info_span[0]:info_span[1]]))
+
+    @property
+    def header(self):
+        # Sliced up to the first newline, without copying the rest of the block
+        end = self.full_block.find('\n')
+        return (self.full_block if end < 0 else self.full_block[:end]).strip()
+
+    @property
+    def table(self):
+        return self.full_block[self.table_start:self.table_end]
+
+    @property
+    def info(self):
+        return self.full_block[self.info_start:self.info_end]
+
+    def __getattr__(self, name):
+        # Only reached while the forms slot is still unset.
+        if name != "forms":
+            raise AttributeError(name)
+        self.forms = frozenset(table_forms(self.table))
+        return self.forms
+
+    def __reduce__(self):
+        # Pickling (e.g. entries sent back by a parallel build's workers)
+        # must not go through __getattr__, which would build the forms of
+        # every entry just to send them; an unset forms slot stays unset.
+        args = (self.full_block, self.table_start, self.table_end, self.info_start, self.info_end,
+                self.artha, self.meaning_texts)
+        try:
+            forms = object.__getattribute__(self, "forms")
+        except AttributeError:
+            return ShabdaEntry, args
+        return ShabdaEntry, args, (None, {"forms": forms})
+
+    @property
+    def meanings(self):
+        # The languages with a meaning, in MEANING_LANGUAGES order
+        sanskrit, hindi, english = self.meaning_texts
+        meanings = {}
+        if sanskrit:
+            meanings["Sanskrit"] = sanskrit
+        if hindi:
+            meanings["Hindi"] = hindi
+        if english:
+            meanings["English"] = english
+        return meanings
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class CompiledEntries:
+    """The entries of a compiled index (see ShabdaLexicon.compiled_tables),
+    built from its map each time one is asked for."""
 
-    raw_blocks = content.split("Sanskrit Header:")
+    def __init__(self, index):
+        self.blocks = index.strings("blocks")
+        self.spans = index.array("spans")  # table and info spans, 4 per entry
+        self.arthas = index.strings("arthas")
+        self.meaning_texts = [index.strings(language) for language in MEANING_LANGUAGES]
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return ShabdaEntry(self.blocks[i], *self.spans[4 * i:4 * i + 4], self.arthas[i],
+                           tuple(texts[i] for texts in self.meaning_texts))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def iter_shabda_entries(file_path, start=0, end=None):
+    # Streams the file (or its bytes [start, end)) one block at a time,
+    # yielding (entry, rows) with the table already split into cells (see
+    # table_rows).
+    for _, _, block in iter_blocks(file_path, SHABDA_MARKER, start=start, end=end):
+        entry = ShabdaEntry.parse(block)
+        yield entry, table_rows(entry.table)
+
+
+def index_entries(file_path, start=0, end=None, first=0):
+    # One streaming pass over the file (or its bytes [start, end)) building
+    # the entries and their form index together, entries numbered from
+    # `first`: (entries, form index, readings as lists, vibhakti labels in
+    # code order)
     shabdas = []
+    form_index = {}
+    readings = {}
+    vibhaktis = LabelTable()
+    for entry, rows in iter_shabda_entries(file_path, start, end):
+        index_forms(form_index, readings, first + len(shabdas), rows, vibhaktis)
+        shabdas.append(entry)
+    return shabdas, form_index, readings, vibhaktis.labels
 
-    for block in raw_blocks[1:]:
-        header_line = block.strip().split('\n')[0]
-        table_match = re.search(r'<<TABLE>>(.*?)</TABLE>', block, re.DOTALL)
-        info_match = re.search(r'<<INFO>>(.*?)</INFO>', block, re.DOTALL)
-
-        table_text = table_match.group(1).strip() if table_match else ""
-        info_text = info_match.group(1).strip() if info_match else ""
-
-        forms = set()
-        for line in table_text.split('\n'):
-            columns = re.split(r'\t+', line.strip())
-            if len(columns) == 4:
-                eka = re.split(r'[,\s]', columns[1])
-                dvi = re.split(r'[,\s]', columns[2])
-                bahu = re.split(r'[,\s]', columns[3])
-                for form in eka + dvi + bahu:
-                    clean_form = form.strip()
-                    if clean_form:
-                        forms.add(clean_form)
-
-        shabdas.append({
-            "header": header_line.strip(),
-            "table": table_text,
-            "info": info_text,
-            "forms": forms,
-            "full_block": block.strip()
-        })
-
-    return shabdas
+
+def load_shabdas(file_path):
+    # Each entry's forms are built by the first scan that tests them (see
+    # ShabdaEntry), not here.
+    return [ShabdaEntry.parse(block) for _, _, block in iter_blocks(file_path, SHABDA_MARKER)]
 
 
 def extract_header_details(header):
@@ -86,9 +266,85 @@ def get_vibhakti_vachana(table_text, target):
     return None, None
 
 
+def get_vibhakti_vachana_all(table_text, target):
+    # Every (vibhakti, vachana) cell listing `target`, in table order; the
+    # first is what get_vibhakti_vachana returns.
+    readings = []
+    for vibhakti, _, columns in table_rows(table_text):
+        for vachana, col in zip(VACHANAS, columns):
+            if target in col and (vibhakti, vachana) not in readings:
+                readings.append((vibhakti, vachana))
+    return readings
+
+
+def pack_cell(e_idx, vibhakti_code, vachana_code):
+    # A code too large for its field would spill into the next one and read
+    # back as another cell.
+    if not 0 <= vibhakti_code < 1 << VIBHAKTI_BITS:
+        raise ValueError(f"vibhakti code {vibhakti_code} does not fit in {VIBHAKTI_BITS} bits; "
+                         f"the lexicon has too many distinct vibhakti labels")
+    if not 0 <= vachana_code < len(VACHANAS):
+        raise ValueError(f"vachana code {vachana_code} out of range")
+    return (e_idx << (VIBHAKTI_BITS + 2)) | (vibhakti_code << 2) | vachana_code
+
+
+def unpack_cell(cell):
+    return cell >> (VIBHAKTI_BITS + 2), (cell >> 2) & ((1 << VIBHAKTI_BITS) - 1), cell & 3
+
+
+def cell_remap(codes):
+    # Maps a cell whose vibhakti code i stands for codes[i] to the lexicon's
+    # codes; None if they are the same.
+    if codes == list(range(len(codes))):
+        return None
+
+    def remap(cell):
+        e_idx, vibhakti_code, vachana_code = unpack_cell(cell)
+        return pack_cell(e_idx, codes[vibhakti_code], vachana_code)
+    return remap
+
+
+def index_forms(form_index, readings, e_idx, rows, vibhaktis):
+    # Adds one entry's forms, keeping the first entry that lists a form,
+    # which is what search_shabda would return on a linear scan. Within the
+    # entry a form maps to its first cell, as get_vibhakti_vachana finds it.
+    # Forms with more than one cell in the lexicon also get all of them, in
+    # that order, in `readings`. Forms are keyed as queries are normalized.
+    cells = {}
+    for vibhakti, _, columns in rows:
+        vibhakti_code = vibhaktis.code(vibhakti)
+        for vachana_code, col in enumerate(columns):
+            for form in col:
+                cell = pack_cell(e_idx, vibhakti_code, vachana_code)
+                found = cells.setdefault(normalize(form), [cell])
+                if found[-1] != cell and cell not in found:
+                    found.append(cell)
+    for form in {normalize(form) for form in row_forms(rows)}:
+        found = cells[form]
+        first = form_index.setdefault(form, found[0])
+        if first != found[0]:
+            readings.setdefault(form, [first]).extend(found)
+        elif len(found) > 1:
+            readings[form] = found
+
+
+def build_form_index(shabdas, vibhaktis):
+    # (form -> packed (entry index, vibhakti, vachana) cell of the first
+    #  reading, form -> all its cells packed with pack_cells, for forms
+    #  with more than one)
+    form_index = {}
+    readings = {}
+    for e_idx, entry in enumerate(shabdas):
+        index_forms(form_index, readings, e_idx, table_rows(entry.table), vibhaktis)
+    return form_index, freeze_readings(readings)
+
+
 def search_shabda(shabdas, word):
+    if isinstance(shabdas, ShabdaLexicon):
+        return shabdas.lookup(word)
+
     for entry in shabdas:
-        if word not in entry["forms"]:
+        if word not in entry.forms:
             continue
         metadata = extract_header_details(entry["header"])
         vibhakti, vachana = get_vibhakti_vachana(entry["table"], word)
@@ -97,53 +353,235 @@ def search_shabda(shabdas, word):
             "word": word,
             "vibhakti": vibhakti,
             "vachana": vachana,
+            "artha": entry["artha"],
+            "meanings": entry["meanings"],
             "full_block": entry["full_block"]
         }
     return None
 
 
-def get_vibhakti_details(word):
-    file_path = SHABDA_FILE_PATH
-    try:
-        shabdas = load_shabdas(file_path)
-        result = search_shabda(shabdas, word)
-        if result:
-            return {
-                "word": result['word'],
-                "naamapada": result['naamapada'],
-                "anta": result['anta'],
-                "linga": result['linga'],
-                "meaning": result['meaning'],
-                "vibhakti": result['vibhakti'],
-                "vachana": result['vachana']
+def search_shabda_all(shabdas, word):
+    # Every reading of `word` across the lexicon, in the order search_shabda
+    # would reach them; the first is what search_shabda returns.
+    if isinstance(shabdas, ShabdaLexicon):
+        return shabdas.lookup_all(word)
+
+    results = []
+    for entry in shabdas:
+        if word not in entry.forms:
+            continue
+        metadata = extract_header_details(entry["header"])
+        for vibhakti, vachana in get_vibhakti_vachana_all(entry["table"], word):
+            results.append({
+                **metadata,
+                "word": word,
+                "vibhakti": vibhakti,
+                "vachana": vachana,
+                "artha": entry["artha"],
+                "meanings": entry["meanings"],
+                "full_block": entry["full_block"]
+            })
+    return results
+
+
+class ShabdaLexicon:
+    """Parsed śabda entries, loaded once and shared by every caller.
+
+    The entries are never mutated after construction, so concurrent readers
+    need no locking.
+    """
+
+    def __init__(self, shabdas, form_index=None, vibhaktis=None, readings=None):
+        self.shabdas = shabdas
+        self.vibhaktis = LabelTable() if vibhaktis is None else vibhaktis
+        if form_index is None:
+            form_index, readings = build_form_index(shabdas, self.vibhaktis)
+        self.form_index = form_index
+        self.readings = {} if readings is None else readings
+
+    @classmethod
+    def from_file(cls, file_path, workers=None):
+        # One streaming pass builds the entries and the form index together,
+        # or one pass per byte range with several workers (see parallel_index).
+        shabdas = []
+        vibhaktis = LabelTable()
+
+        def parts():
+            for entries, form_index, readings, labels in map_ranges(index_entries, file_path, SHABDA_MARKER,
+                                                                     workers):
+                shabdas.extend(entries)
+                yield form_index, readings, cell_remap([vibhaktis.code(label) for label in labels])
+
+        form_index, readings = merge_form_indexes(parts())
+        return cls(shabdas, form_index, vibhaktis, freeze_readings(readings))
+
+    @classmethod
+    def open_compiled(cls, file_path):
+        index = ensure_compiled(file_path, "shabda", lambda path: cls.from_file(path).compiled_tables())
+        entries = CompiledEntries(index)
+        return cls(
+            list(entries) if index.in_memory else entries,
+            form_index=index.map("forms"),
+            vibhaktis=LabelTable(index.strings("vibhaktis")),
+            readings=index.map("readings"),
+        )
+
+    @classmethod
+    def load(cls, file_path):
+        with metrics.stage("shabda_load"):
+            try:
+                return cls.open_compiled(file_path)
+            except COMPILE_ERRORS as e:
+                print(f"⚠️ Compiled śabda index unavailable ({e}); parsing the text file instead.")
+                return cls.from_file(file_path)
+
+    def compiled_tables(self):
+        entries = self.shabdas
+        sections = {
+            **pack_strings("blocks", (entry.full_block for entry in entries)),
+            "spans": pack_array(offset for entry in entries for offset in
+                                (entry.table_start, entry.table_end, entry.info_start, entry.info_end)),
+            **pack_strings("arthas", (entry.artha for entry in entries)),
+            **pack_map("forms", self.form_index.items()),
+            **pack_strings("vibhaktis", self.vibhaktis.labels),
+            **pack_map("readings", self.readings.items(), blobs=True),
+        }
+        for i, language in enumerate(MEANING_LANGUAGES):
+            sections.update(pack_strings(language, (entry.meaning_texts[i] for entry in entries)))
+        return sections
+
+    def __len__(self):
+        return len(self.shabdas)
+
+    def iter_meanings(self):
+        # One row per entry, in file order, for bulk export.
+        for e_idx, entry in enumerate(self.shabdas):
+            header = extract_header_details(entry.header)
+            yield {
+                "id": e_idx,
+                "naamapada": header["naamapada"],
+                "linga": header["linga"],
+                "artha": entry.artha,
+                **dict(zip(MEANING_LANGUAGES, entry.meaning_texts)),
             }
-        else:
+
+    def result(self, cell, word):
+        e_idx, vibhakti_code, vachana_code = unpack_cell(cell)
+        entry = self.shabdas[e_idx]
+        return {
+            **extract_header_details(entry.header),
+            "word": word,
+            "vibhakti": self.vibhaktis.label(vibhakti_code),
+            "vachana": VACHANAS[vachana_code],
+            "artha": entry.artha,
+            "meanings": entry.meanings,
+            "full_block": entry.full_block
+        }
+
+    def lookup(self, word):
+        cell = self.form_index.get(word)
+        if cell is None:
             return None
+        return self.result(cell, word)
+
+    def cells(self, word):
+        # Every cell of `word`, in lexicon order.
+        cells = self.readings.get(word)
+        if cells is not None:
+            return unpack_cells(cells)
+        cell = self.form_index.get(word)
+        return () if cell is None else (cell,)
+
+    def lookup_all(self, word):
+        return [self.result(cell, word) for cell in self.cells(word)]
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+_generation = 0
+
+
+def get_lexicon():
+    global _lexicon
+    lexicon = _lexicon
+    if lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                _lexicon = ShabdaLexicon.load(SHABDA_FILE_PATH)
+            lexicon = _lexicon
+    return lexicon
+
+
+def publish_lexicon(lexicon):
+    # Swaps in a fully built lexicon; lookups already running keep the one
+    # they started with.
+    global _lexicon, _generation
+    with _lexicon_lock:
+        _lexicon = lexicon
+        _generation += 1
+    return lexicon
+
+
+def reload_lexicon():
+    return publish_lexicon(ShabdaLexicon.load(SHABDA_FILE_PATH))
+
+
+def lexicon_generation():
+    # Bumped on every published lexicon, so caches built on lookups can tell
+    # when their results are stale.
+    return _generation
+
+
+def lexicon_form(word):
+    # `word` as typed, spelled as the lexicon indexes it: normalized, and
+    # converted to Devanagari if romanized
+    return to_devanagari(word).strip()
+
+
+def lookup_shabda(word):
+    try:
+        with metrics.stage("shabda_lookup"):
+            return get_lexicon().lookup(lexicon_form(word))
     except Exception as e:
         print(f"⚠️ Error: {e}")
         return None
 
 
-def get_raw_entry_for_word(word):
-    file_path = SHABDA_FILE_PATH
+def lookup_shabda_all(word):
     try:
-        shabdas = load_shabdas(file_path)
-        for entry in shabdas:
-            if word in entry["forms"]:
-                return entry["full_block"]
-        return None
+        with metrics.stage("shabda_lookup"):
+            return get_lexicon().lookup_all(lexicon_form(word))
     except Exception as e:
-        print(f"⚠️ Error in get_raw_entry_for_word: {e}")
-        return None
+        print(f"⚠️ Error: {e}")
+        return []
+
+
+def get_vibhakti_details(word):
+    result = lookup_shabda(word)
+    if result:
+        return {
+            "word": result['word'],
+            "naamapada": result['naamapada'],
+            "anta": result['anta'],
+            "linga": result['linga'],
+            "meaning": result['meaning'],
+            "vibhakti": result['vibhakti'],
+            "vachana": result['vachana']
+        }
+    return None
+
+
+def get_raw_entry_for_word(word):
+    result = lookup_shabda(word)
+    return result["full_block"] if result else None
 
 
 def main():
-    file_path = SHABDA_FILE_PATH
     print("🔄 Loading shabdas from file...")
 
     try:
-        shabdas = load_shabdas(file_path)
-        print(f"✅ Loaded {len(shabdas)} śabda entries.\n")
+        lexicon = get_lexicon()
+        print(f"✅ Loaded {len(lexicon)} śabda entries.\n")
     except Exception as e:
         print(f"❌ Failed to load shabdas: {e}")
         return
@@ -154,7 +592,7 @@ def main():
             print("👋 Exiting. Goodbye!")
             break
 
-        result = search_shabda(shabdas, user_input)
+        result = lookup_shabda(user_input)
         if result:
             print("\n🎯 Match Found:\n")
             print(f"नामपद: {result['naamapada']}")
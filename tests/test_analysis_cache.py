@@ -0,0 +1,108 @@
+# The bounded LRU cache of word analyses (analysis_cache) and its
+# invalidation when a lexicon is reloaded. Run from the repository root:
+#
+#     python -m pytest tests
+import pytest
+
+import dhatu_search
+import sentence_analyzer_with_meaning as analyzer
+import shabda_vibhakti
+from analysis_cache import LRUCache
+from benchmarks.synthetic import dhatu_block, shabda_block, stem
+from dhatu_search import DhatuLexicon
+from shabda_vibhakti import ShabdaLexicon
+
+
+class Counted:
+    # A compute function that records the keys it was called with
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key):
+        self.calls.append(key)
+        return key.upper()
+
+
+def test_least_recently_used_is_evicted_first():
+    cache, compute = LRUCache(3), Counted()
+    for key in "abc":
+        cache.get_or_compute(key, compute)
+    cache.get_or_compute("a", compute)       # b is now the oldest
+    cache.get_or_compute("d", compute)
+    assert list(cache._data) == ["c", "a", "d"]
+    assert cache.get_or_compute("a", compute) == "A"
+    cache.get_or_compute("b", compute)
+    assert compute.calls == ["a", "b", "c", "d", "b"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_the_size_stays_within_the_bound():
+    cache, compute = LRUCache(4), Counted()
+    for i in range(20):
+        cache.get_or_compute(str(i), compute)
+        assert len(cache._data) <= 4
+    stats = cache.stats()
+    assert (stats["size"], stats["misses"], stats["hits"], stats["evictions"]) == (4, 20, 0, 16)
+    cache.resize(2)
+    assert list(cache._data) == ["18", "19"]
+    cache.resize(0)
+    assert cache.get_or_compute("x", compute) == "X" and cache.stats()["size"] == 0
+
+
+def test_a_new_generation_drops_every_value():
+    generation = [0]
+    cache, compute = LRUCache(8, generation=lambda: generation[0]), Counted()
+    cache.get_or_compute("a", compute)
+    cache.get_or_compute("a", compute)
+    generation[0] += 1
+    cache.get_or_compute("a", compute)
+    assert compute.calls == ["a", "a"]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_a_value_computed_across_a_reload_is_not_served():
+    generation = [0]
+    cache, compute = LRUCache(8, generation=lambda: generation[0]), Counted()
+
+    def reloading(key):
+        generation[0] += 1   # the lexicon is reloaded while this runs
+        return compute(key)
+
+    cache.get_or_compute("a", reloading)
+    cache.get_or_compute("a", compute)
+    cache.get_or_compute("a", compute)
+    assert compute.calls == ["a", "a"]
+
+
+@pytest.fixture
+def lexicons(tmp_path):
+    # Publishes lexicons of synthetic files, then puts back the ones the
+    # process had.
+    real = dhatu_search._dhatus, shabda_vibhakti._lexicon
+
+    def publish(shabdas):
+        dhatu_path = tmp_path / "dhatu_all_combined.txt"
+        shabda_path = tmp_path / "shabda_combined.txt"
+        dhatu_path.write_text(dhatu_block(0), encoding="utf-8")
+        shabda_path.write_text("".join(shabda_block(i) for i in shabdas), encoding="utf-8")
+        dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(dhatu_path)))
+        shabda_vibhakti.publish_lexicon(ShabdaLexicon.from_file(str(shabda_path)))
+
+    yield publish
+    dhatu_search.publish_dhatus(real[0])
+    shabda_vibhakti.publish_lexicon(real[1])
+
+
+def test_analyses_are_redone_after_a_reload(lexicons):
+    word = stem(500, "श") + "ः"
+    lexicons(shabdas=range(3))
+    generation = analyzer.analysis_generation()
+    assert analyzer.analyze_word(word)["type"] == "❓ Unknown"
+    assert analyzer.analyze_word(word)["type"] == "❓ Unknown"
+    hits = analyzer.cache_stats()["hits"]
+
+    lexicons(shabdas=[*range(3), 500])
+    assert analyzer.analysis_generation() != generation
+    assert analyzer.analyze_word(word)["type"] == "नामपद (Noun)"
+    assert analyzer.cache_stats()["invalidations"] >= 1
+    assert analyzer.cache_stats()["hits"] == hits
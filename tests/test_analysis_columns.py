@@ -0,0 +1,131 @@
+# Analyses written as columns (analysis_columns) and the corpus statistics
+# read back from them (corpus_stats). Both need pyarrow; the statistics also
+# need pandas. Run from the repository root:
+#
+#     python -m pytest tests
+import json
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("numpy")
+
+from analysis_columns import INT_FIELDS, STRING_FIELDS, AnalysisWriter, read_batches
+
+NOUN = {"type": "नामपद (Noun)", "naamapada": "राम", "linga": "पुंलिङ्गः", "vibhakti": "प्रथमा",
+        "vachana": "एकवचन", "karaka": "कर्ता - doer", "vibhakti_sutra": "प्रातिपदिकार्थ…",
+        "candidates": [{}, {}], "meanings": {"English": "Rama"}}
+VERB = {"type": "धातु (Verb)", "dhatu": "गम्", "arthah": "गतौ", "lakaara": "लट्",
+        "purusha": "प्रथम पुरुष", "vachana": "एकवचन", "ganah": "भ्वादिः", "candidates": [{}]}
+
+
+def noun(word, vibhakti="प्रथमा", **fields):
+    return {**NOUN, "word": word, "vibhakti": vibhakti, **fields}
+
+
+def verb(word, **fields):
+    return {**VERB, "word": word, **fields}
+
+
+def records():
+    # Sentences as batch_analyze writes them to JSONL
+    sentences = [
+        [noun("रामः"), verb("गच्छति")],
+        [noun("वनम्", "द्वितीया", linga="नपुंसकलिङ्गः"), {"word": "च", "type": "अव्यय (Indeclinable)"}],
+        [{"word": "रामोऽपि", "type": "सन्धि (Sandhi)", "split": ["रामः", "अपि"],
+          "segments": [noun("रामः"), {"word": "अपि", "type": "अव्यय (Indeclinable)"}]},
+         verb("गछति", fuzzy_match="गच्छति", edit_distance=1, suggestions=["गच्छति"])],
+        [{"word": "क्षज्ञ", "type": "❓ Unknown"}],
+    ]
+    lines = [json.dumps({"id": i, "words": words}, ensure_ascii=False) for i, words in enumerate(sentences)]
+    return [json.loads(line) for line in lines]
+
+
+def expected_rows(records):
+    rows = []
+    for record in records:
+        for position, analysis in enumerate(record["words"]):
+            parts = [(0, None, analysis)]
+            if analysis.get("segments"):
+                parts = [(segment, analysis["word"], part) for segment, part in enumerate(analysis["segments"], 1)]
+            for segment, compound, part in parts:
+                row = {name: part.get(name) for name in STRING_FIELDS}
+                row.update(sentence_id=record["id"], position=position, segment=segment, compound=compound,
+                           readings=len(part.get("candidates", ())), edit_distance=part.get("edit_distance"))
+                rows.append(row)
+    return rows
+
+
+def read_rows(path):
+    return [row for batch in read_batches(path) for row in batch.to_pylist()]
+
+
+@pytest.mark.parametrize("name", ["analyses.parquet", "analyses.arrow"])
+@pytest.mark.parametrize("batch_size", [2, 1000])
+def test_jsonl_records_round_trip(tmp_path, name, batch_size):
+    path = str(tmp_path / name)
+    with AnalysisWriter(path, batch_size=batch_size) as writer:
+        for record in records():
+            writer.write(record)
+    assert writer.tokens == 8
+    rows = read_rows(path)
+    assert rows == expected_rows(records())
+    assert list(rows[0]) == [name for name, _, _ in INT_FIELDS] + list(STRING_FIELDS)
+
+
+def test_each_batch_carries_only_its_own_labels(tmp_path):
+    path = str(tmp_path / "analyses.arrow")
+    with AnalysisWriter(path, batch_size=2) as writer:
+        for record in records():
+            writer.write(record)
+    batches = list(read_batches(path, ["word", "type"]))
+    assert len(batches) == 4
+    words = [batch.column("word") for batch in batches]
+    assert [column.dictionary.to_pylist() for column in words] == [
+        ["रामः", "गच्छति"], ["वनम्", "च"], ["रामः", "अपि", "गछति"], ["क्षज्ञ"]]
+
+
+def test_an_unknown_format_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        AnalysisWriter(str(tmp_path / "analyses.csv"), fmt="csv")
+
+
+def test_corpus_statistics(tmp_path):
+    pytest.importorskip("pandas")
+    from corpus_stats import corpus_stats
+
+    paths = []
+    for i, batch_size in enumerate([2, 3]):
+        path = str(tmp_path / f"part{i}.parquet")
+        with AnalysisWriter(path, batch_size=batch_size) as writer:
+            for record in records():
+                writer.write(record)
+        paths.append(path)
+
+    tables = corpus_stats(paths)
+    types = tables["type"].set_index("type")["count"].to_dict()
+    assert types == {"नामपद (Noun)": 6, "धातु (Verb)": 4, "अव्यय (Indeclinable)": 4, "❓ Unknown": 2}
+    assert list(tables["type"]["count"]) == sorted(types.values(), reverse=True)
+
+    vibhakti = tables["vibhakti"]
+    assert vibhakti.to_dict("records") == [
+        {"vibhakti": "प्रथमा", "count": 4, "share": 4 / 6},
+        {"vibhakti": "द्वितीया", "count": 2, "share": 2 / 6},
+    ]
+    pairs = tables["purusha_vachana"]
+    assert pairs[["purusha", "vachana", "count"]].values.tolist() == [["प्रथम पुरुष", "एकवचन", 4]]
+
+    only = corpus_stats(paths[:1], ["dhatu", "linga"])
+    assert list(only) == ["dhatu", "linga"]
+    assert only["dhatu"].to_dict("records") == [{"dhatu": "गम्", "count": 2, "share": 1.0}]
+
+
+def test_corpus_statistics_without_matching_tokens(tmp_path):
+    pytest.importorskip("pandas")
+    from corpus_stats import corpus_stats
+
+    path = str(tmp_path / "nouns.parquet")
+    with AnalysisWriter(path) as writer:
+        writer.write({"id": 0, "words": [noun("रामः")]})
+    table = corpus_stats([path], ["lakara"])["lakara"]
+    assert table.empty and list(table.columns) == ["lakaara", "count", "share"]
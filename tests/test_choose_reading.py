@@ -0,0 +1,36 @@
+# How the sentence's verb chooses between the readings of an ambiguous noun
+# (sentence_analyzer_with_meaning.choose_reading). Run from the repository
+# root:
+#
+#     python -m pytest tests
+from karaka_lookup import get_sutra_index
+from sentence_analyzer_with_meaning import choose_reading
+
+
+def reading(vibhakti, vachana="द्विवचन"):
+    return {"type": "नामपद (Noun)", "naamapada": "राम", "linga": "पुंलिङ्ग",
+            "vibhakti": vibhakti, "vachana": vachana}
+
+
+def verb(root, vachana="एकवचन", upasarga=None):
+    return {"metadata": {"dhatu": root}, "upasarga": upasarga, "vachana": vachana}
+
+
+def test_verb_of_departure_selects_the_ablative():
+    readings = [reading("तृतीया"), reading("चतुर्थी"), reading("पञ्चमी")]
+    assert choose_reading(readings, verb("गम्"), get_sutra_index())["vibhakti"] == "पञ्चमी"
+
+
+def test_verb_of_motion_selects_its_accusative_goal():
+    readings = [reading("प्रथमा"), reading("द्वितीया"), reading("सप्तमी", "एकवचन")]
+    assert choose_reading(readings, verb("गम्"), get_sutra_index())["vibhakti"] == "द्वितीया"
+
+
+def test_nominative_agreeing_with_the_verb_is_its_agent():
+    readings = [reading("द्वितीया", "बहुवचन"), reading("प्रथमा", "बहुवचन")]
+    assert choose_reading(readings, verb("वस्", "बहुवचन"), get_sutra_index())["vibhakti"] == "प्रथमा"
+
+
+def test_otherwise_the_preferred_reading_stays():
+    readings = [reading("तृतीया"), reading("चतुर्थी")]
+    assert choose_reading(readings, verb("वस्"), get_sutra_index())["vibhakti"] == "तृतीया"
@@ -0,0 +1,19 @@
+# Form lookups through DhatuLexicon, which reads and parses a block
+# only when a lookup lands on it. Run from the repository root:
+#
+#     python -m pytest tests
+import pytest
+
+from benchmarks.synthetic import dhatu_block, dhatu_forms
+from dhatu_search import DhatuLexicon
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_every_lakara_resolves_whatever_the_line_endings(tmp_path, newline):
+    path = tmp_path / "dhatu_all_combined.txt"
+    path.write_bytes("".join(dhatu_block(i) for i in range(3)).replace("\n", newline).encode("utf-8"))
+    lexicon = DhatuLexicon.from_file(str(path))
+    assert "\r" not in lexicon.block(1)
+    for form in dhatu_forms(1):
+        result = lexicon.search_form(form)
+        assert result is not None and result["form"] == form
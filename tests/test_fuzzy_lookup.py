@@ -0,0 +1,98 @@
+# Approximate form lookup (fuzzy_lookup) and its place as the analyzer's
+# last fallback. Run from the repository root:
+#
+#     python -m pytest tests
+import pytest
+
+import dhatu_search
+import sentence_analyzer_with_meaning as analyzer
+import shabda_vibhakti
+from benchmarks.synthetic import dhatu_block, shabda_block, stem
+from dhatu_search import DhatuLexicon
+from fuzzy_lookup import FuzzyIndex, edit_distance
+from shabda_vibhakti import ShabdaLexicon
+
+FORMS = ["रामः", "रामाः", "रामम्", "रामेण", "वनम्", "वने"]
+
+
+def test_distance_one_hits_longer_forms_first():
+    index = FuzzyIndex(FORMS, max_distance=1)
+    # At equal distance a form with something the query left out (a visarga,
+    # a virāma) comes before one of the same length (a wrong vowel sign).
+    assert index.lookup("रामा") == [("रामाः", 1), ("रामः", 1)]
+    assert index.lookup("रामेन") == [("रामेण", 1)]
+    assert index.lookup("वनम") == [("वनम्", 1), ("वने", 1)]
+
+
+def test_distance_two_hits_rank_after_distance_one():
+    index = FuzzyIndex(FORMS, max_distance=2)
+    assert index.lookup("राम") == [("रामः", 1), ("रामम्", 2), ("रामाः", 2), ("रामेण", 2)]
+    assert index.lookup("राम", limit=1) == [("रामः", 1)]
+    # A query may ask for less than the index was built for, not more.
+    assert index.lookup("राम", max_distance=1) == [("रामः", 1)]
+    assert FuzzyIndex(FORMS, max_distance=1).lookup("राम", max_distance=2) == [("रामः", 1)]
+
+
+def test_misses_beyond_the_max_distance():
+    index = FuzzyIndex(FORMS, max_distance=1)
+    # वनम् is two insertions away
+    assert index.lookup("वन") == [("वने", 1)]
+    assert index.lookup("दव") == []
+    assert index.lookup("गच्छति") == []
+    assert FuzzyIndex(FORMS, max_distance=2).lookup("वन") == [("वने", 1), ("वनम्", 2)]
+
+
+def test_edit_distance():
+    assert edit_distance("रामः", "रामः", 1) == 0
+    assert edit_distance("रमाः", "रामः", 2) == 1       # adjacent transposition
+    assert edit_distance("राम", "रामेण", 1) == 2       # stops once past the limit
+    assert edit_distance("क", "खगघ", 5) == 3
+
+
+@pytest.fixture
+def lexicons(tmp_path):
+    # Publishes lexicons of synthetic files for the test, then puts back the
+    # ones the process had.
+    real = dhatu_search._dhatus, shabda_vibhakti._lexicon
+    dhatu_path = tmp_path / "dhatu_all_combined.txt"
+    shabda_path = tmp_path / "shabda_combined.txt"
+    dhatu_path.write_text("".join(dhatu_block(i) for i in range(3)), encoding="utf-8")
+    shabda_path.write_text("".join(shabda_block(i) for i in range(3)), encoding="utf-8")
+    dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(dhatu_path)))
+    shabda_vibhakti.publish_lexicon(ShabdaLexicon.from_file(str(shabda_path)))
+    yield
+    dhatu_search.publish_dhatus(real[0])
+    shabda_vibhakti.publish_lexicon(real[1])
+
+
+def test_a_typo_is_analyzed_as_its_nearest_form(lexicons):
+    base = stem(1, "श")
+    analysis = analyzer.analyze_word(base + "स्या")
+    assert analysis["fuzzy_match"] == base + "स्य" and analysis["edit_distance"] == 1
+    assert analysis["type"] == "नामपद (Noun)" and analysis["vibhakti"] == "षष्ठी"
+    assert analysis["suggestions"] == [base + "स्य"]
+    # A typo that splits into known forms is read as sandhi instead.
+    assert analyzer.analyze_word(base + "ेन")["split"] == [base + "े", "न"]
+    # Verb forms are matched with an upasarga set aside.
+    root = stem(2, "ध")
+    analysis = analyzer.analyze_word("प्र" + root + "न्त")
+    assert analysis["fuzzy_match"] == "प्र" + root + "न्ति" and analysis["type"] == "धातु (Verb)"
+
+
+def test_fuzzy_lookup_is_the_last_fallback(lexicons, monkeypatch):
+    looked_up = []
+    real_fuzzy_lookup = analyzer.fuzzy_lookup
+
+    def fuzzy_lookup(word, *args, **kwargs):
+        looked_up.append(word)
+        return real_fuzzy_lookup(word, *args, **kwargs)
+
+    monkeypatch.setattr(analyzer, "fuzzy_lookup", fuzzy_lookup)
+    noun, verb = stem(0, "श") + "ः", stem(0, "ध") + "ति"
+    assert analyzer.analyze_word(noun)["type"] == "नामपद (Noun)"
+    assert analyzer.analyze_word(verb)["type"] == "धातु (Verb)"
+    assert analyzer.analyze_word("अपि")["type"] == "अव्यय (Indeclinable)"
+    assert analyzer.analyze_word(noun[:-1] + "ो" + verb)["type"] == "सन्धि (Sandhi)"
+    assert looked_up == []
+    assert analyzer.analyze_word("क्षज्ञत्र")["type"] == "❓ Unknown"
+    assert looked_up == ["क्षज्ञत्र"]
@@ -0,0 +1,89 @@
+# Compiled lexicon indexes (lexicon_index), read through the map or loaded
+# into memory. Run from the repository root:
+#
+#     python -m pytest tests
+import os
+
+import pytest
+
+from benchmarks.synthetic import dhatu_block, dhatu_forms, shabda_block, shabda_forms
+from dhatu_search import DhatuLexicon
+from lexicon_index import FILE_MODE, CompiledIndex, compiled_path, pack_map, pack_strings, write_index
+from shabda_vibhakti import ShabdaLexicon
+
+ENTRIES = 12
+
+
+def indexes(lexicon):
+    return dict(lexicon.form_index.items()), dict(lexicon.readings.items())
+
+
+@pytest.fixture
+def paths(tmp_path):
+    dhatu_path = tmp_path / "dhatu_all_combined.txt"
+    shabda_path = tmp_path / "shabda_combined.txt"
+    dhatu_path.write_text("".join(dhatu_block(i) for i in range(ENTRIES)), encoding="utf-8")
+    shabda_path.write_text("".join(shabda_block(i) for i in range(ENTRIES)), encoding="utf-8")
+    return str(dhatu_path), str(shabda_path)
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_compiled_lexicons_match_the_parsed_ones(paths, monkeypatch, in_memory):
+    monkeypatch.setattr("lexicon_index.IN_MEMORY", in_memory)
+    dhatu_path, shabda_path = paths
+    for _ in range(2):  # built, then opened as it is
+        dhatus = DhatuLexicon.open_compiled(dhatu_path)
+        shabdas = ShabdaLexicon.open_compiled(shabda_path)
+    assert isinstance(dhatus.form_index, dict) == in_memory
+    parsed_dhatus = DhatuLexicon.from_file(dhatu_path)
+    parsed_shabdas = ShabdaLexicon.from_file(shabda_path)
+    assert indexes(dhatus) == indexes(parsed_dhatus)
+    assert indexes(shabdas) == indexes(parsed_shabdas)
+    for i in range(ENTRIES):
+        for form in dhatu_forms(i):
+            assert dhatus.search_form_all(form) == parsed_dhatus.search_form_all(form)
+        for form in shabda_forms(i):
+            assert shabdas.lookup_all(form) == parsed_shabdas.lookup_all(form)
+
+
+def test_index_is_rebuilt_when_the_source_changes(paths):
+    _, shabda_path = paths
+    ShabdaLexicon.open_compiled(shabda_path)
+    with open(shabda_path, "a", encoding="utf-8") as f:
+        f.write(shabda_block(500))
+    shabdas = ShabdaLexicon.open_compiled(shabda_path)
+    assert len(shabdas) == ENTRIES + 1
+    assert shabdas.lookup(shabda_forms(500)[0]) is not None
+
+
+def test_a_corrupt_index_is_rebuilt(paths):
+    _, shabda_path = paths
+    with open(compiled_path(shabda_path), "wb") as f:
+        f.write(b"not an index")
+    assert len(ShabdaLexicon.open_compiled(shabda_path)) == ENTRIES
+
+
+def test_packed_sections_read_back(tmp_path):
+    path = str(tmp_path / "packed.index")
+    ints = {f"रूप{i}": i * 7 for i in range(100)}
+    blobs = {"क": b"\x00\x01", "ख": b""}
+    write_index(path, "test", {}, {**pack_map("ints", ints.items()), **pack_map("blobs", blobs.items(), blobs=True),
+                                   **pack_map("empty", ()), **pack_strings("strings", ["अ", None, ""])})
+    index = CompiledIndex(path, in_memory=False)
+    assert dict(index.map("ints").items()) == ints
+    assert index.map("ints").get("रूप") is None and "रूप99" in index.map("ints")
+    assert dict(index.map("blobs").items()) == blobs
+    assert len(index.map("empty")) == 0 and index.map("empty").get("क") is None
+    assert list(index.strings("strings")) == ["अ", None, ""]
+    assert index.meta["kind"] == "test"
+    assert os.path.getsize(path) % 8 == 0
+
+
+def test_index_files_are_not_private_to_their_builder(paths):
+    _, shabda_path = paths
+    ShabdaLexicon.open_compiled(shabda_path)
+    assert os.stat(compiled_path(shabda_path)).st_mode & 0o777 == FILE_MODE
+    # Refreshing the recorded stat rewrites the index, with the same mode.
+    os.utime(shabda_path)
+    ShabdaLexicon.open_compiled(shabda_path)
+    assert os.stat(compiled_path(shabda_path)).st_mode & 0o777 == FILE_MODE
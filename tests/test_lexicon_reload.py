@@ -0,0 +1,135 @@
+# Incremental reloads of edited lexicon files (lexicon_reload). Run from the
+# repository root:
+#
+#     python -m pytest tests
+#
+# An update re-indexes only the changed entries into an overlay over the live
+# indexes; the result must be what loading the edited file afresh gives.
+import os
+
+import pytest
+
+import lexicon_reload
+from benchmarks.synthetic import dhatu_block, dhatu_forms, shabda_block, shabda_forms, stem
+from dhatu_search import DhatuLexicon
+from lexicon_reload import (Overlay, ReloadAborted, dhatu_keys, shabda_keys, update_dhatu,
+                            update_shabda)
+from shabda_vibhakti import ShabdaLexicon
+
+ENTRIES = 8
+
+
+def replace(path, text):
+    # Edits are saved by renaming a new file over the old one.
+    tmp = f"{path}.new"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def indexes(lexicon):
+    return dict(lexicon.form_index.items()), dict(lexicon.readings.items())
+
+
+@pytest.fixture
+def shabda_path(tmp_path):
+    path = str(tmp_path / "shabda_combined.txt")
+    replace(path, "".join(shabda_block(i) for i in range(ENTRIES)))
+    return path
+
+
+@pytest.fixture
+def dhatu_path(tmp_path):
+    path = str(tmp_path / "dhatu_all_combined.txt")
+    replace(path, "".join(dhatu_block(i) for i in range(ENTRIES)))
+    return path
+
+
+def test_shabda_update_matches_a_full_load(shabda_path):
+    lexicon = ShabdaLexicon.from_file(shabda_path)
+    # Entry 3 takes entry 1's stem, so its forms become ambiguous, and entry
+    # 5 gets a stem of its own.
+    blocks = [shabda_block(i) for i in range(ENTRIES)]
+    blocks[3] = blocks[3].replace(stem(3, "श"), stem(1, "श"))
+    blocks[5] = blocks[5].replace(stem(5, "श"), stem(500, "श"))
+    replace(shabda_path, "".join(blocks))
+
+    updated, keys, changed = update_shabda(lexicon, shabda_keys(lexicon), shabda_path)
+    fresh = ShabdaLexicon.from_file(shabda_path)
+    assert changed == 2
+    assert list(keys) == list(shabda_keys(fresh))
+    assert indexes(updated) == indexes(fresh)
+    for form in shabda_forms(1) + shabda_forms(3) + shabda_forms(5) + shabda_forms(500):
+        assert updated.lookup_all(form) == fresh.lookup_all(form)
+    # The live lexicon is left as it was.
+    assert len(updated.lookup_all(shabda_forms(1)[0])) == len(lexicon.lookup_all(shabda_forms(1)[0])) + 1
+
+
+def test_dhatu_update_matches_a_full_load(dhatu_path):
+    lexicon = DhatuLexicon.from_file(dhatu_path)
+    blocks = [dhatu_block(i) for i in range(ENTRIES)]
+    blocks[3] = blocks[3].replace(stem(3, "ध"), stem(1, "ध"))
+    blocks[5] = blocks[5].replace(stem(5, "ध"), stem(500, "ध"))
+    replace(dhatu_path, "".join(blocks))
+
+    updated, keys, changed = update_dhatu(lexicon, dhatu_keys(lexicon), dhatu_path)
+    fresh = DhatuLexicon.from_file(dhatu_path)
+    assert changed == 2
+    assert list(keys) == list(dhatu_keys(fresh))
+    assert indexes(updated) == indexes(fresh)
+    for form in dhatu_forms(1) + dhatu_forms(3) + dhatu_forms(5) + dhatu_forms(500):
+        assert updated.search_form_all(form) == fresh.search_form_all(form)
+    assert len(updated.search_form_all(dhatu_forms(1)[0])) == len(lexicon.search_form_all(dhatu_forms(1)[0])) + 1
+
+
+def test_dhatu_file_rewritten_in_place_is_refused_then_reloaded_whole(dhatu_path):
+    lexicon = DhatuLexicon.from_file(dhatu_path)
+    keys = dhatu_keys(lexicon)
+    with open(dhatu_path, "w", encoding="utf-8") as f:
+        f.write("".join(dhatu_block(i) for i in range(ENTRIES // 2)))
+
+    # The cut-off block raises instead of crashing the process.
+    with pytest.raises(OSError):
+        lexicon.block(ENTRIES - 1)
+    assert dhatu_keys(lexicon) is None
+
+    updated, keys, changed = update_dhatu(lexicon, keys, dhatu_path)
+    fresh = DhatuLexicon.from_file(dhatu_path)
+    assert changed == ENTRIES // 2
+    assert list(keys) == list(dhatu_keys(fresh))
+    assert indexes(updated) == indexes(fresh)
+
+
+def test_shabda_update_aborts_if_the_file_changes_while_read(shabda_path, monkeypatch):
+    lexicon = ShabdaLexicon.from_file(shabda_path)
+    blocks = [shabda_block(i) for i in range(ENTRIES)]
+    blocks[2] = blocks[2].replace(stem(2, "श"), stem(200, "श"))
+    replace(shabda_path, "".join(blocks))
+
+    # The update reads the file twice: once to diff the blocks, once to parse
+    # the changed ones. The file is edited again in between.
+    iter_blocks = lexicon_reload.iter_blocks
+    reads = []
+
+    def edited_between_reads(*args, **kwargs):
+        reads.append(args)
+        if len(reads) == 2:
+            blocks[2] = blocks[2].replace(stem(200, "श"), stem(300, "श"))
+            replace(shabda_path, "".join(blocks))
+        return iter_blocks(*args, **kwargs)
+
+    monkeypatch.setattr(lexicon_reload, "iter_blocks", edited_between_reads)
+    with pytest.raises(ReloadAborted):
+        update_shabda(lexicon, shabda_keys(lexicon), shabda_path)
+
+
+def test_overlay_of_an_overlay():
+    first = Overlay({"a": 1, "b": 2, "c": 3}, {"b": None, "d": 4})
+    second = Overlay(first, {"a": None, "b": 5, "e": 6, "x": None})
+    assert len(first) == 3
+    assert dict(first.items()) == {"a": 1, "c": 3, "d": 4}
+    assert len(second) == 4
+    assert dict(second.items()) == {"c": 3, "d": 4, "b": 5, "e": 6}
+    assert second.get("a") is None and "a" not in second
+    with pytest.raises(KeyError):
+        second["a"]
@@ -0,0 +1,52 @@
+# Block streaming over the lexicon files (lexicon_stream). Run from the
+# repository root:
+#
+#     python -m pytest tests
+#
+# Chunk sizes down to one byte put chunk boundaries inside markers and inside
+# multi-byte characters; the blocks must still be exactly those of
+# content.split(marker)[1:], with newlines translated as in text mode.
+import pytest
+
+import lexicon_stream
+from benchmarks.synthetic import dhatu_block, shabda_block
+from lexicon_stream import iter_blocks, split_ranges
+
+MARKER = "Sanskrit Header:"
+CONTENT = "preamble\n" + "".join(shabda_block(i) for i in range(4))
+
+
+def write(tmp_path, content):
+    path = tmp_path / "lexicon.txt"
+    path.write_bytes(content.encode("utf-8"))
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, len(MARKER) - 1, len(MARKER), 64, 1 << 20])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_blocks_are_those_of_split(tmp_path, chunk_size, newline):
+    content = CONTENT.replace("\n", newline)
+    path = write(tmp_path, content)
+    blocks = list(iter_blocks(path, MARKER, chunk_size=chunk_size))
+    assert [text for _, _, text in blocks] == CONTENT.split(MARKER)[1:]
+    data = content.encode("utf-8")
+    assert [data[start:end].decode("utf-8") for start, end, _ in blocks] == content.split(MARKER)[1:]
+
+
+def test_no_marker_yields_nothing(tmp_path):
+    assert list(iter_blocks(write(tmp_path, "no blocks here\n"), MARKER, chunk_size=4)) == []
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 5, 50])
+@pytest.mark.parametrize("read_size", [5, 1 << 20])
+def test_ranges_together_yield_the_whole_file(tmp_path, monkeypatch, parts, read_size):
+    # split_ranges searches for the next marker CHUNK_SIZE bytes at a time.
+    monkeypatch.setattr(lexicon_stream, "CHUNK_SIZE", read_size)
+    path = write(tmp_path, "".join(dhatu_block(i) for i in range(12)))
+    whole = list(iter_blocks(path, "Heading:", chunk_size=16))
+    ranges = split_ranges(path, "Heading:", parts)
+    assert 1 <= len(ranges) <= parts
+    assert [start for start, _ in ranges] == sorted(start for start, _ in ranges)
+    pieces = [block for start, end in ranges
+              for block in iter_blocks(path, "Heading:", chunk_size=16, start=start, end=end)]
+    assert pieces == whole
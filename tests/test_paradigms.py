@@ -0,0 +1,128 @@
+# Forward generation (paradigms) and the bulk export built on it
+# (export_paradigms). Run from the repository root:
+#
+#     python -m pytest tests
+import json
+import sys
+
+import pytest
+
+import dhatu_search
+import export_paradigms
+import paradigms
+import shabda_vibhakti
+from benchmarks.synthetic import (LAKARA_ENDINGS, VIBHAKTI_ENDINGS, dhatu_block, dhatu_forms, shabda_block,
+                                  shabda_forms, stem)
+from dhatu_search import DhatuLexicon, load_dhatus
+from paradigms import dhatu_paradigms, generate, generate_all, get_paradigms
+from shabda_vibhakti import ShabdaLexicon
+
+ENTRIES = 6
+
+
+@pytest.fixture(autouse=True)
+def lexicons(tmp_path):
+    # Publishes lexicons of synthetic files for the test, then puts back the
+    # ones the process had.
+    dhatu_path = tmp_path / "dhatu_all_combined.txt"
+    shabda_path = tmp_path / "shabda_combined.txt"
+    # Entry 4 repeats entry 1's root, as a root listed in two gaṇas would.
+    dhatu_path.write_text("".join(dhatu_block(i).replace(stem(4, "ध"), stem(1, "ध")) if i == 4 else dhatu_block(i)
+                                  for i in range(ENTRIES)), encoding="utf-8")
+    shabda_path.write_text("".join(shabda_block(i) for i in range(ENTRIES)), encoding="utf-8")
+    real = dhatu_search._dhatus, shabda_vibhakti._lexicon
+    dhatus = dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(dhatu_path)))
+    shabdas = shabda_vibhakti.publish_lexicon(ShabdaLexicon.from_file(str(shabda_path)))
+    yield dhatus, shabdas
+    dhatu_search.publish_dhatus(real[0])
+    shabda_vibhakti.publish_lexicon(real[1])
+
+
+def test_a_dhatu_cell_and_tables():
+    root = stem(0, "ध")
+    assert generate(root, "लट्", "प्रथम पुरुष", "एकवचन") == (root + "ति",)
+    assert generate(root, "लङ्", "उत्तम पुरुष") == {"एकवचन": (root + "म्",), "द्विवचन": (root + "ाव",),
+                                                  "बहुवचन": (root + "ाम",)}
+    table = generate(root)
+    assert list(table) == list(LAKARA_ENDINGS)
+    assert [form for lakara in table.values() for row in lakara.values() for cell in row.values()
+            for form in cell] == dhatu_forms(0)
+
+
+def test_a_shabda_declension():
+    base = stem(2, "श")
+    assert generate(base, vibhakti="तृतीया") == {"एकवचन": (base + "ेण",), "द्विवचन": (base + "ाभ्याम्",),
+                                                  "बहुवचन": (base + "ैः",)}
+    table = generate(base)
+    assert list(table) == [vibhakti for vibhakti, *_ in VIBHAKTI_ENDINGS]
+    assert [form for row in table.values() for cell in row.values() for form in cell] == shabda_forms(2)
+
+
+def test_labels_by_number_and_romanized():
+    root = stem(3, "ध")
+    expected = (root + "न्तु",)
+    assert generate(root, "loT", "prathama puruSa", 2) == expected
+    assert generate(root, "लोट्", 0, "बहुवचन") == expected
+    with pytest.raises(ValueError):
+        generate(root, "लट्", vachana=3)
+    with pytest.raises(ValueError):
+        generate(root, vibhakti="प्रथमा", kind="dhatu")
+
+
+def test_unknown_stems_and_homonyms():
+    assert generate(stem(500, "ध"), "लट्") is None
+    assert generate_all(stem(500, "श"), vibhakti="प्रथमा") == []
+    root = stem(1, "ध")
+    assert len(generate_all(root, "लट्", "प्रथम पुरुष", "एकवचन")) == 2
+    assert generate(root) == generate_all(root)[0]
+
+
+def test_dhatu_tables_come_from_the_lexicons_entries(lexicons):
+    dhatus, _ = lexicons
+    built = get_paradigms("dhatu")
+    # Building every table does not leave every entry parsed in memory.
+    assert dhatus._parsed == {}
+    listed = dhatu_paradigms(load_dhatus(dhatus.file_path))
+    assert list(built.iter_forms()) == list(listed.iter_forms())
+    assert built.stems == listed.stems
+
+
+def test_tables_are_rebuilt_for_a_published_lexicon(lexicons, tmp_path):
+    dhatus, _ = lexicons
+    assert get_paradigms("dhatu") is get_paradigms("dhatu")
+    path = tmp_path / "other.txt"
+    path.write_text(dhatu_block(100), encoding="utf-8")
+    dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(path)))
+    assert generate(stem(0, "ध"), "लट्") is None
+    assert generate(stem(100, "ध"), "लट्", "प्रथम पुरुष", "एकवचन") == (stem(100, "ध") + "ति",)
+
+
+def export(monkeypatch, tmp_path, name, *options):
+    output = tmp_path / name
+    monkeypatch.setattr(sys, "argv", ["export_paradigms.py", "-o", str(output), *options])
+    export_paradigms.main()
+    return output.read_text(encoding="utf-8").splitlines()
+
+
+def test_tsv_export_has_a_row_per_form(monkeypatch, tmp_path):
+    lines = export(monkeypatch, tmp_path, "paradigms.tsv")
+    assert lines[0].split("\t") == list(export_paradigms.FIELDS)
+    rows = [dict(zip(export_paradigms.FIELDS, line.split("\t"))) for line in lines[1:]]
+    dhatu_rows = [row for row in rows if row["kind"] == "dhatu"]
+    shabda_rows = [row for row in rows if row["kind"] == "shabda"]
+    assert len(dhatu_rows) == ENTRIES * len(dhatu_forms(0))
+    assert len(shabda_rows) == ENTRIES * len(shabda_forms(0))
+    assert rows.index(shabda_rows[0]) == len(dhatu_rows)
+    assert dhatu_rows[0] == {"kind": "dhatu", "id": "0", "stem": stem(0, "ध"), "lakara": "लट्",
+                             "purusha": "प्रथम पुरुष", "vibhakti": "", "vachana": "एकवचन",
+                             "form": stem(0, "ध") + "ति"}
+    assert [row["form"] for row in shabda_rows if row["id"] == "1"] == shabda_forms(1)
+
+
+def test_jsonl_export_has_an_entry_per_line(monkeypatch, tmp_path):
+    lines = export(monkeypatch, tmp_path, "paradigms.jsonl", "--kind", "shabda")
+    rows = [json.loads(line) for line in lines]
+    assert [row["id"] for row in rows] == list(range(ENTRIES))
+    for row in rows:
+        assert row["kind"] == "shabda"
+        assert row["table"] == json.loads(json.dumps(generate(row["stem"], kind="shabda")))
@@ -0,0 +1,81 @@
+# The parallel index build (parallel_index) against the sequential one. Run
+# from the repository root:
+#
+#     python -m pytest tests
+import pickle
+
+import pytest
+
+import parallel_index
+from benchmarks.synthetic import dhatu_block, shabda_block, stem
+from dhatu_search import DhatuLexicon
+from shabda_vibhakti import ShabdaEntry, ShabdaLexicon
+
+ENTRIES = 60
+
+
+def shabda_text():
+    blocks = []
+    for i in range(ENTRIES):
+        block = shabda_block(i)
+        if i % 7 == 3:
+            # Shares entry 1's forms, so some readings span several ranges.
+            block = block.replace(stem(i, "श"), stem(1, "श"))
+        if i >= ENTRIES // 2:
+            # Later ranges meet the vibhaktis in another order, so their
+            # label codes must be remapped to the lexicon's.
+            head, table = block.split("<<TABLE>>\n", 1)
+            rows, tail = table.split("</TABLE>", 1)
+            block = head + "<<TABLE>>\n" + "".join(reversed(rows.splitlines(True))) + "</TABLE>" + tail
+        blocks.append(block)
+    return "".join(blocks)
+
+
+def dhatu_text():
+    return "".join(dhatu_block(i).replace(stem(i, "ध"), stem(1, "ध")) if i % 7 == 3 else dhatu_block(i)
+                   for i in range(ENTRIES))
+
+
+@pytest.fixture(autouse=True)
+def small_ranges(monkeypatch):
+    # Split even these small files into many ranges.
+    monkeypatch.setattr(parallel_index, "MIN_RANGE_BYTES", 256)
+
+
+def indexes(lexicon):
+    return dict(lexicon.form_index.items()), dict(lexicon.readings.items())
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_shabda_build_matches_sequential(tmp_path, workers):
+    path = tmp_path / "shabda_combined.txt"
+    path.write_text(shabda_text(), encoding="utf-8")
+    sequential = ShabdaLexicon.from_file(str(path), workers=1)
+    parallel = ShabdaLexicon.from_file(str(path), workers=workers)
+    assert [entry.full_block for entry in parallel.shabdas] == [entry.full_block for entry in sequential.shabdas]
+    assert parallel.vibhaktis.labels == sequential.vibhaktis.labels
+    assert indexes(parallel) == indexes(sequential)
+    assert sequential.readings
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_dhatu_build_matches_sequential(tmp_path, workers):
+    path = tmp_path / "dhatu_all_combined.txt"
+    path.write_text(dhatu_text(), encoding="utf-8")
+    sequential = DhatuLexicon.from_file(str(path), workers=1)
+    parallel = DhatuLexicon.from_file(str(path), workers=workers)
+    assert list(parallel.offsets) == list(sequential.offsets)
+    assert indexes(parallel) == indexes(sequential)
+    assert sequential.readings
+
+
+def test_entries_cross_process_boundaries_without_their_forms():
+    entry = ShabdaEntry.parse(shabda_block(0))
+    copy = pickle.loads(pickle.dumps(entry))
+    for e in (entry, copy):
+        with pytest.raises(AttributeError):
+            object.__getattribute__(e, "forms")
+    assert copy.full_block == entry.full_block and copy.meanings == entry.meanings
+    # Forms already built travel with the entry.
+    forms = entry.forms
+    assert object.__getattribute__(pickle.loads(pickle.dumps(entry)), "forms") == forms
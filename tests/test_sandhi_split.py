@@ -0,0 +1,91 @@
+# Sandhi and compound segmentation (sandhi_split) and the analyzer's
+# segmenter built over both lexicons. Run from the repository root:
+#
+#     python -m pytest tests
+import pytest
+
+import dhatu_search
+import sentence_analyzer_with_meaning as analyzer
+import shabda_vibhakti
+from benchmarks.synthetic import dhatu_block, shabda_block, stem
+from dhatu_search import DhatuLexicon
+from sandhi_split import Segmenter
+from shabda_vibhakti import ShabdaLexicon
+
+NOUNS = ["रामः", "वनम्", "वने", "हरिः", "देव", "आलयः", "सत्", "गुणः", "महा", "ऋषिः", "इति", "आदि"]
+VERBS = ["गच्छति", "पठति"]
+
+
+@pytest.fixture
+def segmenter():
+    return Segmenter(NOUNS, VERBS)
+
+
+@pytest.mark.parametrize("token, words", [
+    ("रामोऽपि", ["रामः", "अपि"]),          # visarga before अ
+    ("वनंगच्छति", ["वनम्", "गच्छति"]),      # anusvāra for a final म्
+    ("हरिर्गच्छति", ["हरिः", "गच्छति"]),    # visarga to र्
+    ("देवालयः", ["देव", "आलयः"]),          # savarṇa dīrgha
+    ("सद्गुणः", ["सत्", "गुणः"]),           # jaśtva
+    ("महर्षिः", ["महा", "ऋषिः"]),           # guṇa
+    ("वनेऽपि", ["वने", "अपि"]),             # pūrvarūpa
+    ("इत्यादि", ["इति", "आदि"]),            # yaṇ
+    ("रामोऽनुगच्छति", ["रामः", "अनुगच्छति"]),  # a verb with an upasarga the index does not list
+    ("रामोवनेपठति", ["रामः", "वने", "पठति"]),
+])
+def test_joined_words_split_into_known_forms(segmenter, token, words):
+    assert segmenter.segment(token) == words
+
+
+@pytest.mark.parametrize("token", [
+    "रामः",          # a known form is not split
+    "प्रगच्छति",      # nor a known verb with an upasarga
+    "क्षज्ञत्र",       # no known forms at all
+    "रामोऽक्षज्ञ",     # a known first word and an unknown rest
+    "",
+])
+def test_no_split(segmenter, token):
+    assert segmenter.segment(token) is None
+
+
+def test_fewest_words_win():
+    # वनम् + अपि, not वन + म् + अपि; रामः + अपि, not राम + अः + अपि
+    assert Segmenter(["वनम्", "वन", "म्"], []).segment("वनमपि") == ["वनम्", "अपि"]
+    assert Segmenter(["रामः", "राम", "अः"], []).segment("रामःअपि") == ["रामः", "अपि"]
+
+
+@pytest.fixture
+def lexicons(tmp_path):
+    # Publishes lexicons of synthetic files, then puts back the ones the
+    # process had.
+    real = dhatu_search._dhatus, shabda_vibhakti._lexicon
+
+    def publish(dhatus, shabdas):
+        dhatu_path = tmp_path / "dhatu_all_combined.txt"
+        shabda_path = tmp_path / "shabda_combined.txt"
+        dhatu_path.write_text("".join(dhatu_block(i) for i in dhatus), encoding="utf-8")
+        shabda_path.write_text("".join(shabda_block(i) for i in shabdas), encoding="utf-8")
+        dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(dhatu_path)))
+        shabda_vibhakti.publish_lexicon(ShabdaLexicon.from_file(str(shabda_path)))
+
+    yield publish
+    dhatu_search.publish_dhatus(real[0])
+    shabda_vibhakti.publish_lexicon(real[1])
+
+
+def test_the_segmenter_is_rebuilt_after_a_reload(lexicons):
+    noun, verb = stem(0, "श") + "ः", stem(9, "ध") + "ति"
+    token = noun[:-1] + "ो" + verb   # as रामो गच्छति
+    lexicons(dhatus=range(3), shabdas=range(3))
+    before = analyzer._segmenter.fresh()
+    assert before.segment(token) is None
+    assert analyzer.analyze_word(token)["type"] == "❓ Unknown"
+
+    lexicons(dhatus=range(10), shabdas=range(3))
+    assert analyzer._segmenter.stale()
+    after = analyzer._segmenter.fresh()
+    assert after is not before and analyzer.get_segmenter() is after
+    assert after.segment(token) == [noun, verb]
+    # The cached analysis from before the reload is not served.
+    analysis = analyzer.analyze_word(token)
+    assert analysis["type"] == "सन्धि (Sandhi)" and analysis["split"] == [noun, verb]
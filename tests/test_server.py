@@ -0,0 +1,153 @@
+# The HTTP service (server): request validation, the size caps and the
+# coalescing of concurrent lookups. Run from the repository root:
+#
+#     python -m pytest tests
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("tornado")
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+
+import dhatu_search
+import server
+import shabda_vibhakti
+from benchmarks.synthetic import dhatu_block, shabda_block, stem
+from dhatu_search import DhatuLexicon
+from server import AnalysisService, make_app
+from shabda_vibhakti import ShabdaLexicon
+
+NOUN, VERB = stem(0, "श") + "ः", stem(1, "ध") + "ति"
+
+
+@pytest.fixture(autouse=True)
+def lexicons(tmp_path):
+    # Publishes lexicons of synthetic files for the test, then puts back the
+    # ones the process had.
+    real = dhatu_search._dhatus, shabda_vibhakti._lexicon
+    dhatu_path = tmp_path / "dhatu_all_combined.txt"
+    shabda_path = tmp_path / "shabda_combined.txt"
+    dhatu_path.write_text("".join(dhatu_block(i) for i in range(3)), encoding="utf-8")
+    shabda_path.write_text("".join(shabda_block(i) for i in range(3)), encoding="utf-8")
+    dhatu_search.publish_dhatus(DhatuLexicon.from_file(str(dhatu_path)))
+    shabda_vibhakti.publish_lexicon(ShabdaLexicon.from_file(str(shabda_path)))
+    yield
+    dhatu_search.publish_dhatus(real[0])
+    shabda_vibhakti.publish_lexicon(real[1])
+
+
+@pytest.fixture
+def service():
+    # No batch is ever run here, so the batch workers are never started.
+    service = AnalysisService(lookup_workers=2, batch_workers=1, max_words=3, max_sentences=2)
+    yield service
+    service.shutdown()
+
+
+def post(service, path, body):
+    # (status, decoded JSON) of one request to a server started for it
+    async def run():
+        sock, port = bind_unused_port()
+        http_server = HTTPServer(make_app(service))
+        http_server.add_sockets([sock])
+        try:
+            payload = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False)
+            return await AsyncHTTPClient().fetch(f"http://127.0.0.1:{port}{path}", method="POST",
+                                                 body=payload, raise_error=False)
+        finally:
+            http_server.stop()
+
+    response = asyncio.run(run())
+    return response.code, json.loads(response.body)
+
+
+def test_a_sentence_is_analyzed(service):
+    status, body = post(service, "/analyze/sentence", {"words": [NOUN, VERB]})
+    assert status == 200
+    assert [word["type"] for word in body["words"]] == ["नामपद (Noun)", "धातु (Verb)"]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/analyze/sentence", {"words": f"{NOUN} {VERB}"}),
+    ("/analyze/sentence", {"words": {"0": NOUN}}),
+    ("/analyze/sentence", {"words": [NOUN, 1]}),
+    ("/analyze/sentence", {"words": [[NOUN]]}),
+    ("/analyze/sentence", {"words": None}),
+    ("/analyze/batch", {"sentences": "रामः वनम् गच्छति"}),
+    ("/analyze/batch", {"sentences": [{"sentence": "रामः"}]}),
+])
+def test_words_and_sentences_must_be_lists_of_strings(service, path, body):
+    status, response = post(service, path, body)
+    assert status == 400
+    assert "must be a list of strings" in response["error"]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/analyze/sentence", b"{not json"),
+    ("/analyze/sentence", [NOUN]),
+    ("/analyze/sentence", {"words": []}),
+    ("/analyze/batch", {"sentences": []}),
+    ("/analyze/word", {"word": "  "}),
+])
+def test_malformed_or_empty_requests(service, path, body):
+    status, _ = post(service, path, body)
+    assert status == 400
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/analyze/sentence", {"words": [NOUN, VERB, NOUN, VERB]}),
+    ("/analyze/sentence", {"sentence": f"{NOUN} {VERB} {NOUN} {VERB}"}),
+    ("/trace", {"sentence": f"{NOUN} {VERB} {NOUN} {VERB}"}),
+])
+def test_sentences_over_max_words_are_refused(service, path, body):
+    status, response = post(service, path, body)
+    assert status == 413
+    assert response["error"] == "Too many words: 4 > 3"
+
+
+@pytest.mark.parametrize("body", [
+    {"sentences": ["क", "ख", "ग"]},
+    {"text": "क।\nख।\nग।"},
+])
+def test_batches_over_max_sentences_are_refused(service, body):
+    status, response = post(service, "/analyze/batch", body)
+    assert status == 413
+    assert response["error"] == "Too many sentences: 3 > 2"
+
+
+def test_a_sentence_at_the_cap_is_accepted(service):
+    status, body = post(service, "/analyze/sentence", {"words": [NOUN, VERB, NOUN]})
+    assert status == 200 and len(body["words"]) == 3
+
+
+def test_concurrent_lookups_of_a_form_are_coalesced(service, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    computed = []
+
+    def analyze_form(form):
+        computed.append(form)
+        started.set()
+        release.wait(5)
+        return {"word": form, "type": "❓ Unknown"}
+
+    monkeypatch.setattr(server, "analyze_form", analyze_form)
+    server.analysis_cache.clear()
+
+    async def run():
+        lookups = [asyncio.ensure_future(service.analyze_form(word)) for word in ("क्षज्ञ", "क्षज्ञ", " क्षज्ञ")]
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        assert service.stats()["inflight"] == 1
+        release.set()
+        return await asyncio.gather(*lookups)
+
+    results = asyncio.run(run())
+    assert computed == ["क्षज्ञ"]
+    assert results[0] is results[1] is results[2]
+    assert service.stats()["coalesced"] == 2
+    assert service.stats()["inflight"] == 0
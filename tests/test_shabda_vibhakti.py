@@ -0,0 +1,34 @@
+# The packed cells of the śabda form index (shabda_vibhakti.pack_cell). Run
+# from the repository root:
+#
+#     python -m pytest tests
+import pytest
+
+import shabda_vibhakti
+from benchmarks.synthetic import shabda_block
+from shabda_vibhakti import VIBHAKTI_BITS, ShabdaLexicon, pack_cell, unpack_cell
+
+
+def test_cells_round_trip_at_the_field_limits():
+    for parts in [(0, 0, 0), (7, 5, 1), (123456, (1 << VIBHAKTI_BITS) - 1, 2)]:
+        assert unpack_cell(pack_cell(*parts)) == parts
+
+
+@pytest.mark.parametrize("vibhakti_code, vachana_code", [
+    (1 << VIBHAKTI_BITS, 0),
+    (-1, 0),
+    (0, 3),
+    (0, -1),
+])
+def test_codes_that_would_spill_into_the_next_field_are_refused(vibhakti_code, vachana_code):
+    with pytest.raises(ValueError):
+        pack_cell(0, vibhakti_code, vachana_code)
+
+
+def test_a_lexicon_with_more_vibhakti_labels_than_bits_is_refused(tmp_path, monkeypatch):
+    # The synthetic entries have 8 vibhaktis; 2 bits hold 4.
+    monkeypatch.setattr(shabda_vibhakti, "VIBHAKTI_BITS", 2)
+    path = tmp_path / "shabda_combined.txt"
+    path.write_text(shabda_block(0), encoding="utf-8")
+    with pytest.raises(ValueError, match="too many distinct vibhakti labels"):
+        ShabdaLexicon.from_file(str(path), workers=1)
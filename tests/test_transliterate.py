@@ -0,0 +1,74 @@
+# Romanized input (transliterate): scheme detection, conversion to Devanagari
+# and the normalization shared with the lexicon indexes. Run from the
+# repository root:
+#
+#     python -m pytest tests
+import pytest
+
+from transliterate import CONSONANTS, SCHEMES, SIGNS, VIRAMA, VOWELS, detect_scheme, normalize, to_devanagari
+
+WORDS = ["रामः", "वनं", "गच्छति", "कृष्णः", "ज्ञानम्", "ऋषिः", "ऐरावतः", "औषधम्", "सिंहौ", "दुःखम्",
+         "सोऽहम्", "अङ्गम्", "पञ्च", "कण्ठः", "शिष्यः", "ॠकारः", "बालकेभ्यः", "गच्छन्ति", "अभवत्",
+         "ढक्का", "फलानि", "घटौ", "झषः", "ईशः", "ऊर्मिः", "भवतु", "नद्याम्"]
+
+
+def romanize(word, scheme):
+    # `word` in the usual spelling of `scheme`, from the same tables.
+    column = SCHEMES.index(scheme)
+    independent = {vowel: spellings[column].split()[0] for vowel, _, *spellings in VOWELS}
+    signs = {sign: spellings[column].split()[0] for _, sign, *spellings in VOWELS if sign}
+    letters = {letter: spellings[column].split()[0] for letter, *spellings in CONSONANTS}
+    others = {sign: spellings[column].split()[0] for sign, *spellings in SIGNS}
+    out = []
+    for i, char in enumerate(word):
+        following = word[i + 1] if i + 1 < len(word) else ""
+        if char in letters:
+            out.append(letters[char])
+            if following not in signs and following != VIRAMA:
+                out.append(independent["अ"])
+        else:
+            out.append(independent.get(char) or signs.get(char) or others.get(char) or "")
+    return "".join(out)
+
+
+@pytest.mark.parametrize("text, scheme", [
+    ("rāmo vanaṃ gacchati", "iast"),
+    ("rāmaḥ", "iast"),
+    ("rAmo vanaM gacchati", "hk"),
+    ("kRSNa", "hk"),
+    ("rAmo vanaM gacCati", "slp1"),
+    ("kfzRa", "slp1"),
+    ("rama", "iast"),
+    ("रामः", None),
+    ("रामः (rāma)", None),
+    ("123 ...", None),
+])
+def test_detect_scheme(text, scheme):
+    assert detect_scheme(text) == scheme
+
+
+@pytest.mark.parametrize("text", ["rāmo vanaṃ gacchati", "rAmo vanaM gacchati", "rAmo vanaM gacCati"])
+def test_every_scheme_reads_the_same_sentence(text):
+    assert to_devanagari(text) == "रामो वनं गच्छति"
+
+
+@pytest.mark.parametrize("scheme", SCHEMES)
+def test_round_trip(scheme):
+    assert [to_devanagari(romanize(word, scheme), scheme) for word in WORDS] == WORDS
+
+
+def test_devanagari_and_plain_text_pass_through():
+    assert to_devanagari("रामः") == "रामः"
+    assert to_devanagari("123, ...") == "123, ..."
+
+
+def test_normalize():
+    assert normalize("क\u200dष") == "कष"
+    assert normalize("\ufeffरामः\u00ad") == "रामः"
+    assert normalize("ra\u0304ma") == "r\u0101ma"
+    assert to_devanagari("ra\u0304ma") == "राम"
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError):
+        to_devanagari("rama", "itrans")
@@ -0,0 +1,191 @@
+import re
+import threading
+import unicodedata
+
+# Romanized Sanskrit (IAST, Harvard-Kyoto, SLP1) to Devanagari, and the one
+# Unicode normalization applied to both queries and lexicon forms.
+#
+#     to_devanagari("rāmo vanaṃ gacchati")    # "रामो वनं गच्छति"
+#     to_devanagari("rAmo vanaM gacchati")    # same, read as Harvard-Kyoto
+#     to_devanagari("rAmo vanaM gacCati")     # same, read as SLP1
+#     normalize("क‍ष")                  # "कष"
+#
+# Each scheme is one column of the tables below; alternative spellings are
+# separated by spaces and the first is the usual one. A scheme compiles to a
+# single regex over its tokens (longest first) that matches a lone vowel or
+# sign, or a consonant with its optional vowel, and a dict from every such
+# match to its Devanagari. Everything else (digits, punctuation, spaces)
+# passes through unchanged. Text is converted a space-separated word at a
+# time through a memo of words already seen, so on running text, where
+# most words repeat, the regex only runs over the vocabulary.
+
+SCHEMES = ("iast", "hk", "slp1")
+
+# Devanagari vowel, its dependent sign, then its spelling per scheme
+VOWELS = (
+    ("अ", "", "a", "a", "a"),
+    ("आ", "ा", "ā", "A aa", "A"),
+    ("इ", "ि", "i", "i", "i"),
+    ("ई", "ी", "ī", "I ii", "I"),
+    ("उ", "ु", "u", "u", "u"),
+    ("ऊ", "ू", "ū", "U uu", "U"),
+    ("ऋ", "ृ", "ṛ r̥", "R", "f"),
+    ("ॠ", "ॄ", "ṝ r̥̄", "RR", "F"),
+    ("ऌ", "ॢ", "ḷ l̥", "lR", "x"),
+    ("ॡ", "ॣ", "ḹ l̥̄", "lRR", "X"),
+    ("ए", "े", "e", "e", "e"),
+    ("ऐ", "ै", "ai", "ai", "E"),
+    ("ओ", "ो", "o", "o", "o"),
+    ("औ", "ौ", "au", "au", "O"),
+)
+
+CONSONANTS = (
+    ("क", "k", "k", "k"), ("ख", "kh", "kh", "K"), ("ग", "g", "g", "g"),
+    ("घ", "gh", "gh", "G"), ("ङ", "ṅ", "G", "N"),
+    ("च", "c", "c", "c"), ("छ", "ch", "ch", "C"), ("ज", "j", "j", "j"),
+    ("झ", "jh", "jh", "J"), ("ञ", "ñ", "J", "Y"),
+    ("ट", "ṭ", "T", "w"), ("ठ", "ṭh", "Th", "W"), ("ड", "ḍ", "D", "q"),
+    ("ढ", "ḍh", "Dh", "Q"), ("ण", "ṇ", "N", "R"),
+    ("त", "t", "t", "t"), ("थ", "th", "th", "T"), ("द", "d", "d", "d"),
+    ("ध", "dh", "dh", "D"), ("न", "n", "n", "n"),
+    ("प", "p", "p", "p"), ("फ", "ph", "ph", "P"), ("ब", "b", "b", "b"),
+    ("भ", "bh", "bh", "B"), ("म", "m", "m", "m"),
+    ("य", "y", "y", "y"), ("र", "r", "r", "r"), ("ल", "l", "l", "l"),
+    ("व", "v", "v", "v"), ("श", "ś", "z", "S"), ("ष", "ṣ", "S", "z"),
+    ("स", "s", "s", "s"), ("ह", "h", "h", "h"), ("ळ", "ḻ", "L", "L"),
+)
+
+SIGNS = (
+    ("ं", "ṃ ṁ", "M", "M"),
+    ("ः", "ḥ", "H", "H"),
+    ("ँ", "m̐", "~", "~"),
+    ("ऽ", "'", "'", "'"),
+)
+
+VIRAMA = "्"
+MEMO_SIZE = 1 << 17
+# Characters that carry no text: ZWNJ, ZWJ, soft hyphen, BOM
+IGNORABLE = {0x200c: None, 0x200d: None, 0x00ad: None, 0xfeff: None}
+
+
+def normalize(text):
+    # NFC with the invisible joiners and hyphens removed. Lexicon forms are
+    # indexed and queries looked up through this, so a decomposed vowel sign
+    # or nukta, or a ZWJ typed to steer a conjunct, still finds its form.
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    if not text.isprintable():   # all four are format characters
+        text = text.translate(IGNORABLE)
+    return text
+
+
+def _spellings(column):
+    return [unicodedata.normalize("NFC", spelling) for spelling in column.split()]
+
+
+def _alternation(tokens):
+    return "|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True))
+
+
+def _compile(column):
+    # (token regex, token -> Devanagari) for one scheme column
+    table = {}
+    vowels = {}
+    for independent, sign, *spellings in VOWELS:
+        for spelling in _spellings(spellings[column]):
+            table[spelling] = independent
+            vowels[spelling] = sign
+    consonants = []
+    others = list(vowels)
+    for letter, *spellings in CONSONANTS:
+        for spelling in _spellings(spellings[column]):
+            consonants.append(spelling)
+            table[spelling] = letter + VIRAMA
+            for vowel, sign in vowels.items():
+                table[spelling + vowel] = letter + sign
+    for sign, *spellings in SIGNS:
+        for spelling in _spellings(spellings[column]):
+            table[spelling] = sign
+            others.append(spelling)
+    # HK "lR" is a vowel that starts like the consonant "l", so lone vowels
+    # are tried first.
+    pattern = re.compile(f"{_alternation(others)}"
+                         f"|(?:{_alternation(consonants)})(?:{_alternation(vowels)})?")
+    return pattern, table
+
+
+class WordMemo(dict):
+    """Word -> Devanagari for one scheme, filled on first sight of a word
+    and emptied when it reaches MEMO_SIZE words."""
+
+    def __init__(self, scheme):
+        super().__init__()
+        self.pattern, table = _compile(SCHEMES.index(scheme))
+        self.replace = lambda match: table[match.group()]
+
+    def __missing__(self, word):
+        if len(self) >= MEMO_SIZE:
+            self.clear()
+        converted = self[word] = self.pattern.sub(self.replace, word)
+        return converted
+
+
+_MEMOS = {}
+_memo_lock = threading.Lock()
+
+
+def word_memo(scheme):
+    memo = _MEMOS.get(scheme)
+    if memo is None:
+        with _memo_lock:
+            memo = _MEMOS.get(scheme)
+            if memo is None:
+                if scheme not in SCHEMES:
+                    raise ValueError(f"Unknown scheme {scheme!r}; expected one of {', '.join(SCHEMES)}")
+                memo = _MEMOS[scheme] = WordMemo(scheme)
+    return memo
+
+
+DEVANAGARI_RE = re.compile("[ऀ-ॿ]")
+LATIN_RE = re.compile(r"[A-Za-z]")
+# Letters only IAST writes (after NFC), and the combining marks it may be
+# typed with
+IAST_RE = re.compile("[āīūṛṝḷḹṅñṭḍṇśṣṃṁḥĀĪŪṚṜḶḸṄÑṬḌṆŚṢṂṀḤ̣̥̄̐̇]")
+# Letters only SLP1 uses, against the aspirate digraphs and two-letter
+# vowels that only HK writes
+SLP1_RE = re.compile(r"[fFxXwWqQEOYKCPB]")
+HK_RE = re.compile(r"[kgcjTDtdpb]h|a[iu]|aa|ii|uu|lR|RR")
+
+
+def detect_scheme(text):
+    # "iast", "hk" or "slp1" for romanized text, None when there is nothing
+    # to convert. Text that already has Devanagari is left alone: any Latin
+    # in it is a gloss, not Sanskrit. Lower-case ASCII reads the same in IAST
+    # and HK, so it is taken as IAST.
+    if DEVANAGARI_RE.search(text):
+        return None
+    if IAST_RE.search(text):
+        return "iast"
+    if not LATIN_RE.search(text):
+        return None
+    slp1 = len(SLP1_RE.findall(text))
+    hk = len(HK_RE.findall(text))
+    if slp1 > hk:
+        return "slp1"
+    if hk or re.search(r"[A-Z]", text):
+        return "hk"
+    return "iast"
+
+
+def to_devanagari(text, scheme=None):
+    # `text` (normalized) with romanized Sanskrit in `scheme`, or the
+    # detected one, converted to Devanagari.
+    text = normalize(text)
+    scheme = scheme or detect_scheme(text)
+    if scheme is None:
+        return text
+    if scheme == "iast":
+        text = text.lower()
+    # Splitting on spaces alone is much faster than on all whitespace; a word
+    # with a line break in it is just one more memo entry.
+    return " ".join(map(word_memo(scheme).__getitem__, text.split(" ")))